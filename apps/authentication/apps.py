@@ -5,3 +5,6 @@ class AuthenticationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.authentication"
     verbose_name = "Аутентификация"
+
+    def ready(self):
+        from apps.authentication import signals  # noqa: F401
@@ -0,0 +1,185 @@
+"""
+Асинхронные views аутентификации для запуска под ASGI (JWT_ASYNC_VIEWS=True).
+
+Ответы совпадают с синхронными views из views.py. Пользователи загружаются
+через async ORM, хеширование паролей выполняется в пуле без блокировки event loop.
+"""
+import json
+from functools import wraps
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.http import HttpResponseNotAllowed, JsonResponse
+from apps.authentication.decorators import skip_authentication
+from apps.authentication.serializers import (
+    email_taken_error,
+    UserRegistrationSerializer,
+    UserLoginSerializer,
+    TokenRefreshSerializer,
+)
+from apps.authentication.throttling import get_client_ip, login_throttle, retry_after_header
+from apps.authentication.utils import (
+    adecode_token,
+    agenerate_access_token,
+    generate_refresh_token,
+)
+from apps.monitoring.metrics import login_total, refresh_total
+from apps.users.hashing import PasswordHashingBusy
+
+User = get_user_model()
+
+
+def json_response(data, status=200, headers=None) -> JsonResponse:
+    return JsonResponse(
+        data,
+        status=status,
+        headers=headers,
+        json_dumps_params={"ensure_ascii": False},
+    )
+
+
+def hashing_busy_response(exc: PasswordHashingBusy) -> JsonResponse:
+    """Ответ при переполненной очереди хеширования паролей"""
+    return json_response(
+        {"error": "Сервис перегружен, повторите попытку позже"},
+        status=503,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def async_auth_view(view_func):
+    """
+    Асинхронный view без DRF: только POST с JSON телом, без CSRF (аутентификация
+    по токенам) и без разбора JWT в middleware. View получает разобранное тело.
+    """
+    @wraps(view_func)
+    async def wrapper(request):
+        if request.method != "POST":
+            return HttpResponseNotAllowed(["POST"])
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError as exc:
+            return json_response({"detail": f"JSON parse error - {exc}"}, status=400)
+        if not isinstance(data, dict):
+            return json_response({"detail": "Ожидается JSON объект"}, status=400)
+        return await view_func(request, data)
+    
+    wrapper.csrf_exempt = True
+    return skip_authentication(wrapper)
+
+
+def user_response_data(user) -> dict:
+    return {
+        "id": str(user.id),
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+    }
+
+
+@async_auth_view
+async def register(request, data):
+    """Регистрация нового пользователя"""
+    serializer = UserRegistrationSerializer(data=data)
+    if not serializer.is_valid():
+        return json_response(serializer.errors, status=400)
+    
+    validated_data = dict(serializer.validated_data)
+    validated_data.pop("password_confirm")
+    password = validated_data.pop("password")
+    user = User(**validated_data)
+    user.email = User.objects.normalize_email(user.email)
+    try:
+        await user.aset_password(password)
+    except PasswordHashingBusy as exc:
+        return hashing_busy_response(exc)
+    
+    # Один INSERT, занятый email определяется по нарушению уникальности
+    try:
+        await user.asave()
+    except IntegrityError:
+        return json_response(email_taken_error().detail, status=400)
+    
+    return json_response(
+        {
+            "message": "Пользователь успешно зарегистрирован",
+            "access_token": await agenerate_access_token(user.id, user.role_id),
+            "refresh_token": generate_refresh_token(user.id),
+            "user": user_response_data(user),
+        },
+        status=201,
+    )
+
+
+@async_auth_view
+async def login(request, data):
+    """Вход в систему"""
+    serializer = UserLoginSerializer(data=data)
+    if not serializer.is_valid():
+        login_total.inc("bad_request")
+        return json_response(serializer.errors, status=400)
+    
+    email = serializer.validated_data["email"]
+    password = serializer.validated_data["password"]
+    client_ip = get_client_ip(request)
+    
+    retry_after = await login_throttle.acheck(email, client_ip)
+    if retry_after:
+        login_total.inc("throttled")
+        return json_response(
+            {"error": "Слишком много попыток входа, повторите попытку позже"},
+            status=429,
+            headers={"Retry-After": retry_after_header(retry_after)},
+        )
+    
+    try:
+        user = await User.objects.aget(email=email, is_active=True)
+    except User.DoesNotExist:
+        await login_throttle.arecord_failure(email, client_ip)
+        login_total.inc("invalid_credentials")
+        return json_response({"error": "Неверный email или пароль"}, status=401)
+    
+    try:
+        password_valid = await user.acheck_password(password)
+    except PasswordHashingBusy as exc:
+        login_total.inc("busy")
+        return hashing_busy_response(exc)
+    
+    if not password_valid:
+        await login_throttle.arecord_failure(email, client_ip)
+        login_total.inc("invalid_credentials")
+        return json_response({"error": "Неверный email или пароль"}, status=401)
+    
+    await user.aupgrade_password(password)
+    login_total.inc("success")
+    
+    return json_response(
+        {
+            "message": "Успешный вход в систему",
+            "access_token": await agenerate_access_token(user.id, user.role_id),
+            "refresh_token": generate_refresh_token(user.id),
+            "user": user_response_data(user),
+        },
+    )
+
+
+@async_auth_view
+async def refresh_token_view(request, data):
+    """Обновление access токена"""
+    serializer = TokenRefreshSerializer(data=data)
+    if not serializer.is_valid():
+        refresh_total.inc("bad_request")
+        return json_response(serializer.errors, status=400)
+    
+    payload = await adecode_token(serializer.validated_data["refresh_token"])
+    if not payload or payload.get("type") != "refresh":
+        refresh_total.inc("invalid_token")
+        return json_response({"error": "Неверный refresh токен"}, status=401)
+    
+    try:
+        user = await User.objects.only("id", "role_id").aget(id=payload.get("user_id"), is_active=True)
+    except User.DoesNotExist:
+        refresh_total.inc("user_not_found")
+        return json_response({"error": "Пользователь не найден"}, status=401)
+    
+    refresh_total.inc("success")
+    return json_response({"access_token": await agenerate_access_token(user.id, user.role_id)})
@@ -0,0 +1,21 @@
+"""
+Authentication классы для DRF
+"""
+from rest_framework.authentication import BaseAuthentication
+
+
+class JWTMiddlewareAuthentication(BaseAuthentication):
+    """
+    Передает в DRF пользователя, установленного JWTAuthenticationMiddleware.
+    Без него DRF заменяет request.user на AnonymousUser.
+    """
+
+    def authenticate(self, request):
+        user = getattr(request._request, "user", None)
+        if not user or not user.is_authenticated:
+            return None
+        return (user, None)
+
+    def authenticate_header(self, request):
+        """Значение WWW-Authenticate, чтобы неаутентифицированные запросы получали 401"""
+        return "Bearer"
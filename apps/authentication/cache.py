@@ -0,0 +1,247 @@
+"""
+Кэши аутентификации в памяти процесса: пользователи и проверенные токены
+"""
+import copy
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+from django.conf import settings
+
+# Поля пользователя, которые нужны API (остальные не загружаются)
+USER_CACHE_FIELDS = (
+    "id",
+    "email",
+    "first_name",
+    "last_name",
+    "patronymic",
+    "role",
+    "role__name",
+    "is_active",
+    "created_at",
+    "updated_at",
+)
+
+
+class _CacheEntry(NamedTuple):
+    user: object
+    expires_at: float
+    size: int
+
+
+def estimate_user_size(user) -> int:
+    """Приблизительный размер экземпляра пользователя в памяти (байты)"""
+    size = sys.getsizeof(user) + sys.getsizeof(user.__dict__)
+    size += sum(sys.getsizeof(value) for value in user.__dict__.values())
+    for related in user._state.fields_cache.values():
+        if related is not None:
+            size += sys.getsizeof(related.__dict__)
+            size += sum(sys.getsizeof(value) for value in related.__dict__.values())
+    return size
+
+
+class UserCache:
+    """
+    LRU кэш пользователей с TTL, ограниченный по количеству записей
+    (JWT_USER_CACHE_SIZE) и по памяти (JWT_USER_CACHE_MAX_BYTES).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.JWT_USER_CACHE_SIZE > 0
+
+    @property
+    def generation(self) -> int:
+        """Номер поколения, увеличивается при каждой инвалидации"""
+        return self._generation
+
+    def get(self, user_id: str):
+        """Копия пользователя из кэша или None"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(user_id)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+        # Копия, чтобы изменения в запросе не затрагивали общий экземпляр
+        return copy.copy(entry.user)
+
+    def set(self, user_id: str, user, generation: Optional[int] = None) -> None:
+        """
+        Сохранение пользователя. Если передан generation и с тех пор была
+        инвалидация, запись не сохраняется (данные могли устареть).
+        """
+        size = estimate_user_size(user)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if user_id in self._entries:
+                self._remove(user_id)
+            self._entries[user_id] = _CacheEntry(
+                user=user,
+                expires_at=time.monotonic() + settings.JWT_USER_CACHE_TTL_SECONDS,
+                size=size,
+            )
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > settings.JWT_USER_CACHE_SIZE
+                or self._bytes > settings.JWT_USER_CACHE_MAX_BYTES
+            ):
+                oldest_id = next(iter(self._entries))
+                self._remove(oldest_id)
+                self.evictions += 1
+
+    def invalidate(self, user_id) -> None:
+        """Удаление пользователя из кэша"""
+        with self._lock:
+            self._generation += 1
+            self._remove(str(user_id))
+
+    def clear(self) -> None:
+        """Полная очистка кэша"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики кэша"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _remove(self, user_id: str) -> None:
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+
+class TokenCache:
+    """
+    Кэш проверенных JWT токенов по хешу токена.
+    Payload хранится до истечения exp, токены с неверной подписью или
+    просроченные - JWT_TOKEN_NEGATIVE_TTL_SECONDS (negative cache).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valid: "OrderedDict[bytes, Tuple[Dict, float]]" = OrderedDict()
+        self._invalid: "OrderedDict[bytes, float]" = OrderedDict()
+        self._decode_seconds = 0.0
+        self._decodes = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.malformed = 0
+        self.time_saved = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.JWT_TOKEN_CACHE_SIZE > 0
+
+    @staticmethod
+    def make_key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+    def lookup(self, key: bytes) -> Tuple[bool, Optional[Dict]]:
+        """
+        Поиск токена: (True, payload) для проверенного, (True, None) для
+        отклоненного, (False, None) если токена нет в кэше
+        """
+        with self._lock:
+            entry = self._valid.get(key)
+            if entry is not None:
+                payload, expires_at = entry
+                if expires_at > time.time():
+                    self._valid.move_to_end(key)
+                    self.hits += 1
+                    self._count_saved()
+                    return True, dict(payload)
+                del self._valid[key]
+
+            expires_at = self._invalid.get(key)
+            if expires_at is not None:
+                if expires_at > time.monotonic():
+                    self.negative_hits += 1
+                    self._count_saved()
+                    return True, None
+                del self._invalid[key]
+
+            self.misses += 1
+            return False, None
+
+    def set_valid(self, key: bytes, payload: Dict, decode_seconds: float) -> None:
+        """Сохранение проверенного payload до истечения токена"""
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+        with self._lock:
+            self._record_decode(decode_seconds)
+            self._valid[key] = (payload, expires_at)
+            self._valid.move_to_end(key)
+            while len(self._valid) > settings.JWT_TOKEN_CACHE_SIZE:
+                self._valid.popitem(last=False)
+
+    def set_invalid(self, key: bytes, decode_seconds: float) -> None:
+        """Сохранение отклоненного токена на короткое время"""
+        with self._lock:
+            self._record_decode(decode_seconds)
+            self._invalid[key] = time.monotonic() + settings.JWT_TOKEN_NEGATIVE_TTL_SECONDS
+            self._invalid.move_to_end(key)
+            while len(self._invalid) > settings.JWT_TOKEN_CACHE_SIZE:
+                self._invalid.popitem(last=False)
+
+    def clear(self) -> None:
+        """Полная очистка (например, после смены ключей подписи)"""
+        with self._lock:
+            self._valid.clear()
+            self._invalid.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Счетчики кэша: попадания, промахи, доля попаданий и сэкономленное время"""
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "malformed": self.malformed,
+                "hit_ratio": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+                "time_saved_seconds": self.time_saved,
+                "size": len(self._valid),
+                "negative_size": len(self._invalid),
+            }
+
+    def _record_decode(self, decode_seconds: float) -> None:
+        self._decode_seconds += decode_seconds
+        self._decodes += 1
+
+    def _count_saved(self) -> None:
+        # Экономия оценивается средним временем полной проверки токена
+        if self._decodes:
+            self.time_saved += self._decode_seconds / self._decodes
+
+
+user_cache = UserCache()
+token_cache = TokenCache()
@@ -0,0 +1,13 @@
+"""
+Декораторы для views аутентификации
+"""
+
+
+def skip_authentication(view_func):
+    """
+    Помечает view, для которого JWTAuthenticationMiddleware не разбирает токен
+    и не загружает пользователя (request.user = None).
+    Декоратор ставится над @api_view.
+    """
+    view_func.skip_authentication = True
+    return view_func
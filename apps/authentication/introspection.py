@@ -0,0 +1,76 @@
+"""
+Проверка токенов для шлюзов и других сервисов (introspection)
+"""
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from apps.authentication.utils import decode_token
+from apps.authorization.matrix import permission_matrix
+
+User = get_user_model()
+
+
+def introspect_tokens(tokens: List[str]) -> Tuple[List[Dict], int]:
+    """
+    Результаты проверки токенов в порядке запроса и max-age для ответа.
+
+    Активен только действующий, не отозванный access токен активного
+    пользователя. Пользователи всех токенов загружаются одним запросом.
+    max-age не превышает оставшееся время жизни ни одного активного токена.
+    """
+    payloads = [_access_payload(token) for token in tokens]
+    user_ids = {payload["user_id"] for payload in payloads if payload is not None}
+    users = {}
+    if user_ids:
+        users = {
+            str(user_id): (role_id, role_name)
+            for user_id, role_id, role_name in User.objects.order_by()
+            .filter(id__in=user_ids, is_active=True)
+            .values_list("id", "role_id", "role__name")
+        }
+
+    now = time.time()
+    max_age = settings.JWT_INTROSPECT_MAX_AGE_SECONDS
+    results = []
+    for payload in payloads:
+        user = users.get(payload["user_id"]) if payload is not None else None
+        if user is None:
+            # Недействительный токен не станет действительным, но пользователь
+            # может быть восстановлен, поэтому отказ кэшируется недолго
+            max_age = min(max_age, settings.JWT_TOKEN_NEGATIVE_TTL_SECONDS)
+            results.append({"active": False})
+            continue
+
+        role_id, role_name = user
+        max_age = min(max_age, int(payload["exp"] - now))
+        results.append({
+            "active": True,
+            "user_id": payload["user_id"],
+            "role_id": role_id,
+            "role": role_name,
+            "exp": int(payload["exp"]),
+            "iat": int(payload["iat"]) if "iat" in payload else None,
+            "jti": payload.get("jti"),
+        })
+    return results, max(0, max_age)
+
+
+def _access_payload(token: str) -> Optional[Dict]:
+    """Payload действующего access токена с корректным user_id или None"""
+    payload = decode_token(token)
+    if not payload or payload.get("type") != "access":
+        return None
+    # Stateless токен с устаревшими правами отклоняется так же, как в middleware
+    if (
+        settings.JWT_STATELESS
+        and "pv" in payload
+        and not permission_matrix.is_current(payload.get("role_id"), payload["pv"])
+    ):
+        return None
+    try:
+        payload["user_id"] = str(uuid.UUID(str(payload.get("user_id"))))
+    except ValueError:
+        return None
+    return payload
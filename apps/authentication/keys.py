@@ -0,0 +1,235 @@
+"""
+Ключи подписи JWT: общий секрет (HS*) или набор асимметричных ключей с kid
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+from django.conf import settings
+from jwt.algorithms import get_default_algorithms
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256", "EdDSA")
+
+
+class SigningKey(NamedTuple):
+    """Ключ подписи с уже разобранными объектами ключей"""
+    kid: Optional[str]
+    algorithm: str
+    private_key: object
+    public_key: object
+    created_at: float
+    activate_at: float
+    retire_at: Optional[float]
+
+
+def generate_private_key_pem(algorithm: str) -> str:
+    """Генерация нового приватного ключа в PEM (PKCS8)"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    if algorithm == "RS256":
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == "ES256":
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    elif algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        raise ValueError(f"Алгоритм {algorithm} не поддерживается, допустимые: {', '.join(ASYMMETRIC_ALGORITHMS)}")
+
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    ).decode("utf-8")
+
+
+def read_keys_file(path: str) -> List[Dict]:
+    """Чтение файла ключей ({"keys": [...]}), пустой список если файла нет"""
+    try:
+        with open(path, encoding="utf-8") as keys_file:
+            return json.load(keys_file).get("keys", [])
+    except FileNotFoundError:
+        return []
+
+
+def write_keys_file(path: str, keys: List[Dict]) -> None:
+    """Атомарная запись файла ключей с правами 0600"""
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as keys_file:
+        json.dump({"keys": keys}, keys_file, indent=2)
+    os.replace(tmp_path, path)
+
+
+class KeyRing:
+    """
+    Набор ключей подписи.
+
+    Без JWT_KEYS_FILE используется общий секрет JWT_SECRET_KEY и JWT_ALGORITHM.
+    С JWT_KEYS_FILE ключи разбираются один раз и перечитываются только при
+    изменении файла (проверка не чаще JWT_KEYS_RELOAD_SECONDS).
+    Подписывает самый новый действующий ключ с наступившим activate_at,
+    проверка - по kid из заголовка. Ключ до activate_at уже опубликован в JWKS
+    и проверяет подпись, но не подписывает: клиенты успевают обновить
+    закэшированный JWKS до первого токена с новым kid.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: Dict[Optional[str], SigningKey] = {}
+        self._signing_key: Optional[SigningKey] = None
+        # Ближайший activate_at ключа, ожидающего активации
+        self._activates_at: Optional[float] = None
+        # Ближайший retire_at действующего ключа
+        self._retires_at: Optional[float] = None
+        self._source = None
+        self._mtime = None
+        self._checked_at = 0.0
+
+    @property
+    def uses_kid(self) -> bool:
+        """Асимметричный режим: ключ выбирается по kid"""
+        return bool(settings.JWT_KEYS_FILE)
+
+    def signing_key(self) -> SigningKey:
+        self.refresh()
+        if self._activates_at is not None and self._activates_at <= time.time():
+            with self._lock:
+                self._signing_key, self._activates_at = self._select_signing_key(self._keys, time.time())
+        if self._signing_key is None:
+            raise RuntimeError(
+                f"Нет действующих ключей подписи в {settings.JWT_KEYS_FILE}, "
+                "выполните manage.py rotate_jwt_keys"
+            )
+        return self._signing_key
+
+    def verification_key(self, kid: Optional[str]) -> Optional[SigningKey]:
+        """Ключ для проверки подписи или None, если kid неизвестен или ключ выведен"""
+        self.refresh()
+        key = self._keys.get(kid if self.uses_kid else None)
+        if key is None or (key.retire_at is not None and key.retire_at <= time.time()):
+            return None
+        return key
+
+    def jwks(self) -> Dict:
+        """Публичные ключи в формате JWKS"""
+        self.refresh()
+        algorithms = get_default_algorithms()
+        now = time.time()
+        keys = []
+        for key in self._keys.values():
+            if key.kid is None or (key.retire_at is not None and key.retire_at <= now):
+                continue
+            jwk = algorithms[key.algorithm].to_jwk(key.public_key, as_dict=True)
+            jwk.update({"kid": key.kid, "alg": key.algorithm, "use": "sig"})
+            keys.append(jwk)
+        return {"keys": keys}
+
+    def reload(self) -> None:
+        """Принудительное перечитывание ключей"""
+        with self._lock:
+            self._source = None
+            self._mtime = None
+            self._checked_at = 0.0
+
+    def refresh(self) -> None:
+        """Перечитывание ключей, если источник или файл изменились"""
+        if self._retires_at is not None and self._retires_at <= time.time():
+            self._retire_keys()
+        source = settings.JWT_KEYS_FILE or (settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
+        now = time.monotonic()
+        if source == self._source and now - self._checked_at < settings.JWT_KEYS_RELOAD_SECONDS:
+            return
+
+        with self._lock:
+            if source == self._source and now - self._checked_at < settings.JWT_KEYS_RELOAD_SECONDS:
+                return
+            self._checked_at = now
+
+            if not settings.JWT_KEYS_FILE:
+                if source == self._source:
+                    return
+                key = SigningKey(
+                    kid=None,
+                    algorithm=settings.JWT_ALGORITHM,
+                    private_key=settings.JWT_SECRET_KEY,
+                    public_key=settings.JWT_SECRET_KEY,
+                    created_at=0.0,
+                    activate_at=0.0,
+                    retire_at=None,
+                )
+                self._publish({None: key}, key, source, None)
+                return
+
+            try:
+                mtime = os.stat(settings.JWT_KEYS_FILE).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if source == self._source and mtime == self._mtime:
+                return
+
+            keys = self._load(read_keys_file(settings.JWT_KEYS_FILE))
+            signing_key, activates_at = self._select_signing_key(keys, time.time())
+            self._publish(keys, signing_key, source, mtime, activates_at)
+
+    def _retire_keys(self) -> None:
+        """Наступил retire_at ключа: файл не менялся, но токены этого ключа больше не действуют"""
+        from apps.authentication.cache import token_cache
+
+        with self._lock:
+            now = time.time()
+            if self._retires_at is None or self._retires_at > now:
+                return
+            self._signing_key, self._activates_at = self._select_signing_key(self._keys, now)
+            self._retires_at = self._next_retirement(self._keys, now)
+            token_cache.clear()
+
+    @staticmethod
+    def _next_retirement(keys, now) -> Optional[float]:
+        retirements = [key.retire_at for key in keys.values() if key.retire_at is not None and key.retire_at > now]
+        return min(retirements) if retirements else None
+
+    @staticmethod
+    def _select_signing_key(keys, now):
+        """Ключ подписи на момент now и время ближайшей активации следующего ключа"""
+        active = [key for key in keys.values() if key.retire_at is None or key.retire_at > now]
+        signing = [key for key in active if key.activate_at <= now]
+        pending = [key.activate_at for key in active if key.activate_at > now]
+        signing_key = max(signing, key=lambda key: key.created_at) if signing else None
+        return signing_key, min(pending) if pending else None
+
+    def _publish(self, keys, signing_key, source, mtime, activates_at=None) -> None:
+        from apps.authentication.cache import token_cache
+
+        self._keys = keys
+        self._signing_key = signing_key
+        self._activates_at = activates_at
+        self._retires_at = self._next_retirement(keys, time.time())
+        self._source = source
+        self._mtime = mtime
+        # Закэшированные токены могли быть подписаны выведенным ключом
+        token_cache.clear()
+
+    @staticmethod
+    def _load(raw_keys: List[Dict]) -> Dict[Optional[str], SigningKey]:
+        from cryptography.hazmat.primitives import serialization
+
+        keys = {}
+        for raw_key in raw_keys:
+            private_key = serialization.load_pem_private_key(
+                raw_key["private_key"].encode("utf-8"), password=None
+            )
+            keys[raw_key["kid"]] = SigningKey(
+                kid=raw_key["kid"],
+                algorithm=raw_key["alg"],
+                private_key=private_key,
+                public_key=private_key.public_key(),
+                created_at=raw_key["created_at"],
+                activate_at=raw_key.get("activate_at", raw_key["created_at"]),
+                retire_at=raw_key.get("retire_at"),
+            )
+        return keys
+
+
+key_ring = KeyRing()
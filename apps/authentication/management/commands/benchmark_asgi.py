@@ -0,0 +1,236 @@
+"""
+Management команда для сравнения пропускной способности WSGI и ASGI
+"""
+import asyncio
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import connection
+from apps.authentication.utils import generate_refresh_token
+
+User = get_user_model()
+
+BENCHMARK_EMAIL = "benchmark-asgi@example.com"
+BENCHMARK_PASSWORD = "benchmark-password"
+ENDPOINTS = {
+    "refresh": "/api/auth/refresh/",
+    "login": "/api/auth/login/",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение пропускной способности и задержек WSGI (синхронные views, пул потоков) "
+        "и ASGI (асинхронные views, event loop) при высокой конкурентности. "
+        "Каждый режим запускается в отдельном процессе"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoint", choices=list(ENDPOINTS), default="refresh", help="Замеряемый endpoint")
+        parser.add_argument("--requests", type=int, default=2000, help="Число запросов в каждом режиме")
+        parser.add_argument("--concurrency", type=int, default=50, help="Число одновременных запросов")
+        parser.add_argument("--handler", choices=["both", "wsgi", "asgi"], default="both", help=(
+            "Режим; wsgi и asgi выполняют замер в текущем процессе и печатают JSON"
+        ))
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests и --concurrency должны быть положительными")
+
+        if options["handler"] != "both":
+            result = self.run_benchmark(options["handler"], options)
+            self.stdout.write(json.dumps(result))
+            return
+
+        # Дочерние процессы открывают свое соединение и не видят базу в памяти родителя
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            raise CommandError(
+                "--handler both требует базу на диске: запустите --handler wsgi и --handler asgi по отдельности"
+            )
+        results = [self.run_subprocess(handler, options) for handler in ("wsgi", "asgi")]
+
+        self.stdout.write(
+            f"endpoint={options['endpoint']} requests={options['requests']} "
+            f"concurrency={options['concurrency']}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"  {result['handler']:<5} {result['rps']:>9.1f} req/s  "
+                f"p50 {result['p50_ms']:>7.2f} мс  p99 {result['p99_ms']:>7.2f} мс  "
+                f"ошибок: {result['errors']}"
+            )
+
+    def get_benchmark_user(self):
+        User.objects.filter(email=BENCHMARK_EMAIL).delete()
+        return User.objects.create_user(BENCHMARK_EMAIL, BENCHMARK_PASSWORD)
+
+    def run_subprocess(self, handler, options):
+        """Замер в отдельном процессе: набор views выбирается при импорте urls (JWT_ASYNC_VIEWS)"""
+        env = dict(os.environ, JWT_ASYNC_VIEWS="true" if handler == "asgi" else "false")
+        completed = subprocess.run(
+            [
+                sys.executable, sys.argv[0], "benchmark_asgi",
+                "--handler", handler,
+                "--endpoint", options["endpoint"],
+                "--requests", str(options["requests"]),
+                "--concurrency", str(options["concurrency"]),
+            ],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandError(completed.stderr)
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def run_benchmark(self, handler, options):
+        # Пользователь создается в процессе замера, где выполняются запросы
+        user = self.get_benchmark_user()
+        try:
+            return self.measure(handler, user, options)
+        finally:
+            user.delete()
+
+    def measure(self, handler, user, options):
+        path = ENDPOINTS[options["endpoint"]]
+        if options["endpoint"] == "refresh":
+            body = {"refresh_token": generate_refresh_token(user.id)}
+        else:
+            body = {"email": BENCHMARK_EMAIL, "password": BENCHMARK_PASSWORD}
+        request = RequestSpec(path, json.dumps(body).encode("utf-8"), self.get_host())
+
+        # Прогрев: импорт views, построение матрицы прав, первая синхронизация отзыва
+        if handler == "wsgi":
+            timings, errors, elapsed = run_wsgi(request, options["concurrency"] * 2, options["concurrency"])
+            timings, errors, elapsed = run_wsgi(request, options["requests"], options["concurrency"])
+        else:
+            timings, errors, elapsed = asyncio.run(run_asgi(request, options["concurrency"] * 2, options["concurrency"]))
+            timings, errors, elapsed = asyncio.run(run_asgi(request, options["requests"], options["concurrency"]))
+
+        timings.sort()
+        return {
+            "handler": handler,
+            "endpoint": options["endpoint"],
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "rps": options["requests"] / elapsed,
+            "p50_ms": statistics.median(timings) * 1000,
+            "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000,
+            "errors": errors,
+        }
+
+    @staticmethod
+    def get_host():
+        for host in settings.ALLOWED_HOSTS:
+            if host not in ("*", "") and not host.startswith("."):
+                return host
+        return "localhost"
+
+
+class RequestSpec:
+    """POST запрос с JSON телом"""
+
+    def __init__(self, path, body, host):
+        self.path = path
+        self.body = body
+        self.host = host
+
+
+def run_wsgi(request, total, concurrency):
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+
+    def call(_):
+        statuses = []
+        environ = {
+            "REQUEST_METHOD": "POST",
+            "PATH_INFO": request.path,
+            "SCRIPT_NAME": "",
+            "QUERY_STRING": "",
+            "SERVER_NAME": request.host,
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": request.host,
+            "REMOTE_ADDR": "127.0.0.1",
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(request.body)),
+            "wsgi.input": io.BytesIO(request.body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.url_scheme": "http",
+            "wsgi.version": (1, 0),
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        started = time.perf_counter()
+        response = handler(environ, lambda status, headers: statuses.append(status))
+        b"".join(response)
+        response.close()
+        return time.perf_counter() - started, statuses[0].startswith("2")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, range(total)))
+    elapsed = time.perf_counter() - started
+    return [timing for timing, _ in results], sum(1 for _, ok in results if not ok), elapsed
+
+
+async def run_asgi(request, total, concurrency):
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": request.path,
+        "raw_path": request.path.encode("ascii"),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", request.host.encode("ascii")),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(request.body)).encode("ascii")),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": (request.host, 80),
+    }
+
+    async def call():
+        statuses = []
+
+        async def receive():
+            return {"type": "http.request", "body": request.body, "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        started = time.perf_counter()
+        await handler(dict(scope), receive, send)
+        return time.perf_counter() - started, 200 <= statuses[0] < 300
+
+    remaining = total
+    results = []
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            results.append(await call())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return [timing for timing, _ in results], sum(1 for _, ok in results if not ok), elapsed
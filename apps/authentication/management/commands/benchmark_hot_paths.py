@@ -0,0 +1,201 @@
+"""
+Management команда для микробенчмарков горячих путей аутентификации и авторизации
+"""
+import io
+import json
+import platform
+import statistics
+import time
+from types import SimpleNamespace
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, RequestFactory
+from rest_framework.request import Request
+from apps.authentication.middleware import JWTAuthenticationMiddleware
+from apps.authentication.utils import decode_token, generate_access_token
+from apps.authorization.permissions import HasElementPermission
+from apps.users.hashers import get_hasher
+
+User = get_user_model()
+
+BENCHMARK_PASSWORD = "benchmark-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Микробенчмарки: выпуск и проверка токенов, middleware, проверки прав, "
+        "check_password при разной стоимости и полные запросы через тестовый клиент. "
+        "Результат - JSON с ops/sec, p50 и p99; --compare сравнивает с сохраненным "
+        "результатом. Запускается с --settings=config.settings_bench"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--duration", type=float, default=1.0, help="Время замера одного сценария в секундах")
+        parser.add_argument("--min-iterations", type=int, default=20, help="Минимальное число итераций сценария")
+        parser.add_argument("--warmup", type=int, default=10, help="Число итераций прогрева")
+        parser.add_argument(
+            "--bcrypt-rounds",
+            default="4,8,10,12",
+            help="Стоимости bcrypt для сценариев check_password через запятую",
+        )
+        parser.add_argument("--only", help="Запускать только сценарии, содержащие подстроку")
+        parser.add_argument("--output", help="Файл для сохранения результата в JSON")
+        parser.add_argument("--compare", help="JSON файл предыдущего результата для сравнения")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=10.0,
+            help="Падение ops/sec в процентах, считающееся регрессией при --compare",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Завершиться с ошибкой, если найдена регрессия",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError(
+                "Бенчмарки создают тестовые данные и запускаются только на SQLite: "
+                "--settings=config.settings_bench"
+            )
+        try:
+            rounds = [int(value) for value in options["bcrypt_rounds"].split(",") if value.strip()]
+        except ValueError:
+            raise CommandError("--bcrypt-rounds: ожидаются целые числа через запятую")
+
+        call_command("migrate", verbosity=0, interactive=False)
+        call_command("load_test_data", stdout=io.StringIO())
+
+        results = {}
+        for name, func in self.get_cases(rounds):
+            if options["only"] and options["only"] not in name:
+                continue
+            results[name] = measure(func, options["duration"], options["min_iterations"], options["warmup"])
+            self.stderr.write(format_result(name, results[name]))
+
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "settings": settings.SETTINGS_MODULE,
+                "jwt_stateless": settings.JWT_STATELESS,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            },
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                json.dump(report, output, indent=2, ensure_ascii=False)
+
+        if not options["compare"]:
+            self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False))
+            return
+
+        with open(options["compare"], encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = self.compare(baseline, results, options["threshold"])
+        if regressions and options["fail_on_regression"]:
+            raise CommandError(f"Регрессии: {', '.join(regressions)}")
+
+    def get_cases(self, rounds):
+        """Пары (имя сценария, функция одной операции)"""
+        user = User.objects.select_related("role").get(email="user@example.com")
+        user.set_password(BENCHMARK_PASSWORD)
+        user.save()
+        access_token = generate_access_token(user.id, user.role_id)
+        factory = RequestFactory()
+
+        middleware = JWTAuthenticationMiddleware(lambda request: None)
+        middleware_request = factory.get("/api/users/me/", HTTP_AUTHORIZATION=f"Bearer {access_token}")
+
+        def authenticate():
+            middleware.process_request(middleware_request)
+            return middleware_request.user.pk
+
+        permission_request = Request(factory.get("/api/products/"))
+        permission_request.user = user
+        read_permission = HasElementPermission("products", "read")
+        update_permission = HasElementPermission("products", "update")
+        foreign_object = SimpleNamespace(owner_id="00000000-0000-0000-0000-000000000000")
+
+        yield "generate_access_token", lambda: generate_access_token(user.id, user.role_id)
+        yield "decode_token", lambda: decode_token(access_token)
+        yield "middleware.process_request", authenticate
+        yield "permission.has_permission", lambda: read_permission.has_permission(permission_request, None)
+        yield "permission.has_object_permission", (
+            lambda: update_permission.has_object_permission(permission_request, None, foreign_object)
+        )
+
+        hasher = get_hasher("bcrypt")
+        for cost in rounds:
+            candidate = User(password=hasher.encode(BENCHMARK_PASSWORD.encode("utf-8"), {"rounds": cost}))
+            yield f"check_password.bcrypt_{cost}", lambda candidate=candidate: candidate.check_password(BENCHMARK_PASSWORD)
+
+        client = Client()
+        login_body = json.dumps({"email": user.email, "password": BENCHMARK_PASSWORD})
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {access_token}"}
+        yield "http.login", lambda: expect(
+            client.post("/api/auth/login/", login_body, content_type="application/json"), 200
+        )
+        yield "http.users_me", lambda: expect(client.get("/api/users/me/", **headers), 200)
+        yield "http.products", lambda: expect(client.get("/api/products/", **headers), 200)
+
+    def compare(self, baseline, results, threshold):
+        """Таблица сравнения с базовым результатом; возвращает сценарии с регрессией"""
+        regressions = []
+        self.stdout.write(f"{'сценарий':<36} {'было ops/s':>12} {'стало ops/s':>12} {'изменение':>10}  p99 было/стало, мкс")
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                self.stdout.write(f"{name:<36} {'-':>12} {result['ops_per_sec']:>12.1f} {'новый':>10}")
+                continue
+            change = (result["ops_per_sec"] / before["ops_per_sec"] - 1) * 100
+            mark = ""
+            if change < -threshold:
+                regressions.append(name)
+                mark = "  РЕГРЕССИЯ"
+            self.stdout.write(
+                f"{name:<36} {before['ops_per_sec']:>12.1f} {result['ops_per_sec']:>12.1f} {change:>+9.1f}%  "
+                f"{before['p99_us']:.1f}/{result['p99_us']:.1f}{mark}"
+            )
+        return regressions
+
+
+def measure(func, duration, min_iterations, warmup):
+    """Время каждой операции; замер идет не меньше duration секунд и min_iterations итераций"""
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    deadline = time.perf_counter() + duration
+    while len(timings) < min_iterations or time.perf_counter() < deadline:
+        started = time.perf_counter_ns()
+        func()
+        timings.append(time.perf_counter_ns() - started)
+
+    timings.sort()
+    return {
+        "iterations": len(timings),
+        "ops_per_sec": len(timings) / (sum(timings) / 1e9),
+        "p50_us": statistics.median(timings) / 1000,
+        "p99_us": timings[min(len(timings) - 1, int(len(timings) * 0.99))] / 1000,
+    }
+
+
+def expect(response, status_code):
+    """Ошибочный ответ не должен попасть в замер как быстрый"""
+    if response.status_code != status_code:
+        raise CommandError(f"{response.request['PATH_INFO']}: ответ {response.status_code}, ожидался {status_code}")
+    return response
+
+
+def format_result(name, result):
+    return (
+        f"{name:<36} {result['ops_per_sec']:>12.1f} ops/s  "
+        f"p50 {result['p50_us']:>10.1f} мкс  p99 {result['p99_us']:>10.1f} мкс"
+    )
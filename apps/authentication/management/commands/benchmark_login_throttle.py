@@ -0,0 +1,47 @@
+"""
+Management команда для замера накладных расходов ограничения частоты входа
+"""
+import time
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from apps.authentication.throttling import LoginThrottle
+
+
+class Command(BaseCommand):
+    help = "Замер времени проверки и учета неудачной попытки входа для хранилищ memory и cache"
+    
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=100000, help="Число итераций")
+        parser.add_argument("--emails", type=int, default=1000, help="Число различных email")
+    
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        emails = [f"user{i}@example.com" for i in range(options["emails"])]
+        
+        for store in ("memory", "cache"):
+            # Лимит не достигается, чтобы замерять полный путь проверки
+            with override_settings(
+                LOGIN_THROTTLE_STORE=store,
+                LOGIN_THROTTLE_EMAIL_LIMIT=iterations + 1,
+                LOGIN_THROTTLE_IP_LIMIT=iterations + 1,
+            ):
+                throttle = LoginThrottle()
+                check_seconds = self.measure(
+                    lambda i: throttle.check(emails[i % len(emails)], "10.0.0.1"), iterations
+                )
+                record_seconds = self.measure(
+                    lambda i: throttle.record_failure(emails[i % len(emails)], "10.0.0.1"), iterations
+                )
+                throttle.reset()
+            
+            self.stdout.write(
+                f"{store:<7} check: {check_seconds / iterations * 1e6:.2f} мкс, "
+                f"record_failure: {record_seconds / iterations * 1e6:.2f} мкс"
+            )
+    
+    @staticmethod
+    def measure(func, iterations):
+        started = time.perf_counter()
+        for i in range(iterations):
+            func(i)
+        return time.perf_counter() - started
@@ -0,0 +1,85 @@
+"""
+Management команда для ротации асимметричных ключей подписи JWT
+"""
+import time
+import uuid
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.authentication.keys import (
+    ASYMMETRIC_ALGORITHMS,
+    generate_private_key_pem,
+    read_keys_file,
+    write_keys_file,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Ротация ключей подписи JWT: новый ключ сразу публикуется в JWKS и "
+        "становится ключом подписи после истечения кэша JWKS, предыдущие "
+        "остаются в JWKS на время перекрытия и затем удаляются"
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--algorithm",
+            choices=ASYMMETRIC_ALGORITHMS,
+            default=settings.JWT_ALGORITHM if settings.JWT_ALGORITHM in ASYMMETRIC_ALGORITHMS else "RS256",
+            help="Алгоритм нового ключа",
+        )
+        parser.add_argument(
+            "--overlap-hours",
+            type=float,
+            default=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS * 24,
+            help="Сколько часов предыдущие ключи остаются действующими "
+                 "(по умолчанию - время жизни refresh токена)",
+        )
+        parser.add_argument(
+            "--activation-delay",
+            type=int,
+            default=settings.JWT_JWKS_MAX_AGE_SECONDS,
+            help="Через сколько секунд новый ключ начнет подписывать токены "
+                 "(по умолчанию - JWT_JWKS_MAX_AGE_SECONDS). Первый ключ активируется сразу",
+        )
+    
+    def handle(self, *args, **options):
+        path = settings.JWT_KEYS_FILE
+        if not path:
+            raise CommandError("JWT_KEYS_FILE не задан")
+        
+        now = time.time()
+        existing = read_keys_file(path)
+        # Без действующего ключа подписывать нечем - ждать обновления JWKS некому
+        has_signing_key = any(
+            key.get("activate_at", key["created_at"]) <= now
+            and (key.get("retire_at") is None or key["retire_at"] > now)
+            for key in existing
+        )
+        activate_at = now + options["activation_delay"] if has_signing_key else now
+        # Предыдущие ключи подписывают до activate_at и проверяют токены еще overlap после него
+        retire_at = activate_at + options["overlap_hours"] * 3600
+        
+        keys = []
+        for key in existing:
+            if key.get("retire_at") is not None and key["retire_at"] <= now:
+                self.stdout.write(f"  Удален выведенный ключ: {key['kid']}")
+                continue
+            if key.get("retire_at") is None:
+                key["retire_at"] = retire_at
+                self.stdout.write(f"  Ключ {key['kid']} действует до {time.ctime(retire_at)}")
+            keys.append(key)
+        
+        kid = uuid.uuid4().hex
+        keys.append({
+            "kid": kid,
+            "alg": options["algorithm"],
+            "private_key": generate_private_key_pem(options["algorithm"]),
+            "created_at": now,
+            "activate_at": activate_at,
+            "retire_at": None,
+        })
+        write_keys_file(path, keys)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Новый ключ подписи: {kid} ({options['algorithm']}), подписывает с {time.ctime(activate_at)}"
+        ))
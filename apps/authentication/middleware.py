@@ -1,43 +1,171 @@
 """
 Middleware для JWT аутентификации
 """
-from django.utils.deprecation import MiddlewareMixin
+import copy
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils.functional import SimpleLazyObject
 from django.contrib.auth import get_user_model
-from apps.authentication.utils import get_user_id_from_token
+from apps.authentication.cache import user_cache, USER_CACHE_FIELDS
+from apps.authentication.principal import TokenPrincipal
+from apps.authentication.utils import adecode_token, decode_token, get_bearer_token
+from apps.authorization.matrix import permission_matrix
+from apps.monitoring.metrics import middleware_auth_total
+from apps.monitoring.timing import phase
 
 User = get_user_model()
 
 
-class JWTAuthenticationMiddleware(MiddlewareMixin):
+class JWTAuthenticationMiddleware:
     """
-    Middleware для установки request.user на основе JWT токена
+    Middleware для установки request.user на основе JWT токена.
+    Работает в синхронном (WSGI) и асинхронном (ASGI) режиме без
+    переключения потоков: в асинхронных views используется await request.auser().
+    Пути из JWT_AUTH_EXEMPT_PATHS не обрабатываются.
     """
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+            # Django адаптирует синхронный process_view через sync_to_async
+            self.process_view = self.aprocess_view
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.process_request(request)
+        return self.get_response(request)
+    
+    async def __acall__(self, request):
+        self.process_request(request)
+        return await self.get_response(request)
     
     def process_request(self, request):
-        """Обработка запроса и установка пользователя"""
-        auth_header = request.META.get("HTTP_AUTHORIZATION", "")
+        """
+        Установка ленивого request.user: токен разбирается и пользователь
+        загружается только при первом обращении к request.user (или await request.auser())
+        """
+        if request.path_info.startswith(tuple(settings.JWT_AUTH_EXEMPT_PATHS)):
+            return None
         
-        if not auth_header.startswith("Bearer "):
+        async def auser():
+            if not hasattr(request, "_acached_user"):
+                request._acached_user = await self.aauthenticate(request)
+            return request._acached_user
+        
+        request.user = SimpleLazyObject(lambda: self.authenticate(request))
+        request.auser = auser
+        return None
+    
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Пропуск аутентификации для views, помеченных @skip_authentication"""
+        if getattr(view_func, "skip_authentication", False):
+            request.user = None
+        return None
+    
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        """Асинхронный вариант process_view"""
+        if getattr(view_func, "skip_authentication", False):
             request.user = None
+        return None
+    
+    def authenticate(self, request):
+        """Пользователь по JWT токену из заголовка Authorization"""
+        token = get_bearer_token(request)
+        if not token:
+            middleware_auth_total.inc("anonymous")
             return None
         
-        token = auth_header.split(" ")[1] if len(auth_header.split(" ")) > 1 else None
+        payload = decode_token(token)
+        if not payload or payload.get("type") != "access":
+            middleware_auth_total.inc("invalid_token")
+            return None
         
+        with phase("auth"):
+            if settings.JWT_STATELESS and "pv" in payload:
+                user = self.get_principal(payload)
+            else:
+                user = self.get_user(str(payload.get("user_id")))
+        middleware_auth_total.inc("authenticated" if user is not None else "user_not_found")
+        return user
+    
+    async def aauthenticate(self, request):
+        """Асинхронный вариант authenticate (запросы к БД через async ORM)"""
+        token = get_bearer_token(request)
         if not token:
-            request.user = None
+            middleware_auth_total.inc("anonymous")
             return None
         
-        user_id = get_user_id_from_token(token)
+        payload = await adecode_token(token)
+        if not payload or payload.get("type") != "access":
+            middleware_auth_total.inc("invalid_token")
+            return None
         
-        if user_id:
-            try:
-                user = User.objects.get(id=user_id, is_active=True)
-                request.user = user
-            except User.DoesNotExist:
-                request.user = None
-        else:
-            request.user = None
+        with phase("auth"):
+            if settings.JWT_STATELESS and "pv" in payload:
+                user = await self.aget_principal(payload)
+            else:
+                user = await self.aget_user(str(payload.get("user_id")))
+        middleware_auth_total.inc("authenticated" if user is not None else "user_not_found")
+        return user
+    
+    def get_user(self, user_id):
+        """Загрузка активного пользователя через кэш пользователей"""
+        if user_cache.enabled:
+            user = user_cache.get(user_id)
+            if user is not None:
+                return user
         
-        return None
-
-
+        generation = user_cache.generation
+        try:
+            user = (
+                User.objects.select_related("role")
+                .only(*USER_CACHE_FIELDS)
+                .get(id=user_id, is_active=True)
+            )
+        except (User.DoesNotExist, ValueError, ValidationError):
+            return None
+        
+        if user_cache.enabled:
+            user_cache.set(user_id, copy.copy(user), generation)
+        return user
+    
+    async def aget_user(self, user_id):
+        """Асинхронный вариант get_user"""
+        if user_cache.enabled:
+            user = user_cache.get(user_id)
+            if user is not None:
+                return user
+        
+        generation = user_cache.generation
+        try:
+            user = await (
+                User.objects.select_related("role")
+                .only(*USER_CACHE_FIELDS)
+                .aget(id=user_id, is_active=True)
+            )
+        except (User.DoesNotExist, ValueError, ValidationError):
+            return None
+        
+        if user_cache.enabled:
+            user_cache.set(user_id, copy.copy(user), generation)
+        return user
+    
+    def get_principal(self, payload):
+        """
+        Пользователь из claims stateless токена без обращения к БД.
+        Токены, выпущенные до изменения прав роли пользователя, отклоняются.
+        """
+        if not permission_matrix.is_current(payload.get("role_id"), payload["pv"]):
+            return None
+        return TokenPrincipal.from_payload(payload)
+    
+    async def aget_principal(self, payload):
+        """Асинхронный вариант get_principal"""
+        if not await permission_matrix.ais_current(payload.get("role_id"), payload["pv"]):
+            return None
+        return TokenPrincipal.from_payload(payload)
@@ -1,3 +1,45 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class RevokedToken(models.Model):
+    """Отозванные токены (по jti)"""
+    jti = models.CharField(max_length=64, unique=True, verbose_name="Идентификатор токена")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="revoked_tokens",
+        verbose_name="Пользователь"
+    )
+    expires_at = models.DateTimeField(db_index=True, verbose_name="Истекает")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Дата отзыва")
+
+    class Meta:
+        verbose_name = "Отозванный токен"
+        verbose_name_plural = "Отозванные токены"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return self.jti
+
+
+class UserTokenRevocation(models.Model):
+    """Отзыв всех токенов пользователя, выпущенных до revoked_before"""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="token_revocation",
+        verbose_name="Пользователь"
+    )
+    revoked_before = models.DateTimeField(verbose_name="Отозваны токены до")
+    expires_at = models.DateTimeField(db_index=True, verbose_name="Истекает")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Дата обновления")
+
+    class Meta:
+        verbose_name = "Отзыв токенов пользователя"
+        verbose_name_plural = "Отзывы токенов пользователей"
+
+    def __str__(self):
+        return f"{self.user_id} < {self.revoked_before}"
@@ -0,0 +1,73 @@
+"""
+Легковесный пользователь, восстановленный из claims stateless access токена
+"""
+import uuid
+from typing import Dict, Optional
+from django.contrib.auth import get_user_model
+
+
+class TokenRole:
+    """Роль из claims токена"""
+    __slots__ = ("id", "name")
+
+    def __init__(self, role_id: int, name: Optional[str]):
+        self.id = role_id
+        self.name = name
+
+    def __str__(self):
+        return self.name or ""
+
+
+class TokenPrincipal:
+    """
+    Пользователь запроса в stateless режиме JWT.
+    Создается из claims без обращения к БД.
+    """
+    __slots__ = ("id", "role_id", "role", "permission_masks", "permissions_version", "_user")
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(
+        self,
+        user_id: uuid.UUID,
+        role_id: Optional[int],
+        role_name: Optional[str],
+        permission_masks: Dict[str, int],
+        permissions_version: int,
+    ):
+        self.id = user_id
+        self.role_id = role_id
+        self.role = TokenRole(role_id, role_name) if role_id else None
+        self.permission_masks = permission_masks
+        self.permissions_version = permissions_version
+        self._user = None
+
+    @property
+    def pk(self):
+        return self.id
+
+    @classmethod
+    def from_payload(cls, payload: Dict) -> Optional["TokenPrincipal"]:
+        """Создание из payload access токена, None если claims некорректны"""
+        try:
+            return cls(
+                user_id=uuid.UUID(payload["user_id"]),
+                role_id=payload.get("role_id"),
+                role_name=payload.get("role"),
+                permission_masks=dict(payload.get("perms") or {}),
+                permissions_version=int(payload["pv"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def load_user(self):
+        """Загрузка модели User из БД (для операций, которым нужна полная запись)"""
+        if self._user is None:
+            User = get_user_model()
+            self._user = User.objects.filter(id=self.id, is_active=True).first()
+        return self._user
+
+    def __str__(self):
+        return str(self.id)
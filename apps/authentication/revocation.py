@@ -0,0 +1,213 @@
+"""
+Отзыв токенов: таблица в БД и фильтр Блума в памяти воркера
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+
+# Перекрытие окон инкрементальной синхронизации (секунды)
+SYNC_OVERLAP_SECONDS = 60
+
+
+class BloomFilter:
+    """Фильтр Блума на bytearray (ложноположительные ответы возможны, ложноотрицательные - нет)"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        self.size = max(64, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+class RevocationList:
+    """
+    Список отозванных токенов в памяти воркера.
+
+    Проверка jti идет через фильтр Блума; только при положительном ответе
+    фильтра используется точное множество. Отзыв всех токенов пользователя
+    хранится как граница revoked_before (iat токена должен быть не раньше нее).
+    Граница и iat хранятся с дробными секундами, поэтому токен, выпущенный в
+    ту же секунду до отзыва, отзывается, а выпущенный после - нет.
+    Изменения из БД подтягиваются инкрементально не чаще
+    JWT_REVOCATION_SYNC_SECONDS, истекшие записи удаляются не чаще
+    JWT_REVOCATION_SWEEP_SECONDS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom: Optional[BloomFilter] = None
+        self._revoked: Dict[str, float] = {}
+        self._user_cutoffs: Dict[str, float] = {}
+        self._synced_until: Optional[float] = None
+        self._checked_at: Optional[float] = None
+        self._swept_at: Optional[float] = None
+
+    def is_revoked(self, payload: Dict) -> bool:
+        """Отозван ли токен (без обращения к БД, кроме периодической синхронизации)"""
+        self._sync_if_due()
+        return self._is_revoked(payload)
+
+    async def ais_revoked(self, payload: Dict) -> bool:
+        """Асинхронный вариант is_revoked: синхронизация с БД выполняется в потоке"""
+        if self._sync_due():
+            await sync_to_async(self._sync_if_due)()
+        return self._is_revoked(payload)
+
+    def _is_revoked(self, payload: Dict) -> bool:
+        jti = payload.get("jti")
+        if jti is not None and self._bloom is not None and jti in self._bloom and jti in self._revoked:
+            return True
+
+        cutoff = self._user_cutoffs.get(payload.get("user_id"))
+        if cutoff is not None and payload.get("iat", 0) < cutoff:
+            return True
+
+        return False
+
+    def revoke(self, payload: Dict) -> None:
+        """Отзыв одного токена по jti"""
+        from apps.authentication.models import RevokedToken
+
+        jti = payload.get("jti")
+        if not jti:
+            return
+        RevokedToken.objects.bulk_create(
+            [
+                RevokedToken(
+                    jti=jti,
+                    user_id=payload.get("user_id"),
+                    expires_at=_to_datetime(payload["exp"]),
+                )
+            ],
+            ignore_conflicts=True,
+        )
+        with self._lock:
+            self._add(jti, payload["exp"])
+
+    def revoke_all_for_user(self, user_id) -> None:
+        """Отзыв всех выпущенных ранее токенов пользователя одной записью"""
+        from apps.authentication.models import UserTokenRevocation
+
+        now = time.time()
+        # После истечения самого долгоживущего токена запись больше не нужна
+        expires_at = now + timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS).total_seconds()
+        UserTokenRevocation.objects.update_or_create(
+            user_id=user_id,
+            defaults={
+                "revoked_before": _to_datetime(now),
+                "expires_at": _to_datetime(expires_at),
+            },
+        )
+        with self._lock:
+            self._user_cutoffs[str(user_id)] = now
+
+    def reset(self) -> None:
+        """Сброс состояния воркера, следующая проверка загрузит все из БД"""
+        with self._lock:
+            self._bloom = None
+            self._revoked.clear()
+            self._user_cutoffs.clear()
+            self._synced_until = None
+            self._checked_at = None
+
+    def _sync_due(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at >= settings.JWT_REVOCATION_SYNC_SECONDS
+
+    def _sync_if_due(self) -> None:
+        if not self._sync_due():
+            return
+
+        with self._lock:
+            if not self._sync_due():
+                return
+            now = time.monotonic()
+            self._checked_at = now
+            self._sync()
+            if self._swept_at is None or now - self._swept_at >= settings.JWT_REVOCATION_SWEEP_SECONDS:
+                self._swept_at = now
+                self._sweep()
+
+    def _sync(self) -> None:
+        from apps.authentication.models import RevokedToken, UserTokenRevocation
+
+        now = time.time()
+        revoked = RevokedToken.objects.order_by().filter(expires_at__gt=_to_datetime(now))
+        cutoffs = UserTokenRevocation.objects.order_by().filter(expires_at__gt=_to_datetime(now))
+        if self._synced_until is not None:
+            # Перекрытие окна учитывает транзакции, закоммиченные позже created_at
+            since = _to_datetime(self._synced_until - SYNC_OVERLAP_SECONDS)
+            revoked = revoked.filter(created_at__gte=since)
+            cutoffs = cutoffs.filter(updated_at__gte=since)
+
+        for jti, expires_at in revoked.values_list("jti", "expires_at"):
+            self._add(jti, expires_at.timestamp())
+        for user_id, revoked_before in cutoffs.values_list("user_id", "revoked_before"):
+            self._user_cutoffs[str(user_id)] = revoked_before.timestamp()
+        self._synced_until = now
+
+        self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        """Удаление истекших записей из памяти и пересборка фильтра"""
+        refresh_lifetime = timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS).total_seconds()
+        self._user_cutoffs = {
+            user_id: cutoff
+            for user_id, cutoff in self._user_cutoffs.items()
+            if cutoff + refresh_lifetime > now
+        }
+
+        expired = [jti for jti, expires_at in self._revoked.items() if expires_at <= now]
+        if not expired and self._bloom is not None and len(self._revoked) <= self._bloom.capacity:
+            return
+        for jti in expired:
+            del self._revoked[jti]
+        # Из фильтра Блума нельзя удалять, поэтому он собирается заново
+        self._bloom = self._new_bloom(len(self._revoked))
+        for jti in self._revoked:
+            self._bloom.add(jti)
+
+    def _sweep(self) -> None:
+        """Удаление истекших записей из БД"""
+        from apps.authentication.models import RevokedToken, UserTokenRevocation
+
+        now = _to_datetime(time.time())
+        with transaction.atomic():
+            RevokedToken.objects.filter(expires_at__lte=now).delete()
+            UserTokenRevocation.objects.filter(expires_at__lte=now).delete()
+
+    def _add(self, jti: str, expires_at: float) -> None:
+        if self._bloom is None:
+            self._bloom = self._new_bloom()
+        self._revoked[jti] = expires_at
+        self._bloom.add(jti)
+
+    @staticmethod
+    def _new_bloom(count: int = 0) -> BloomFilter:
+        capacity = max(settings.JWT_REVOCATION_BLOOM_CAPACITY, count * 2)
+        return BloomFilter(capacity, settings.JWT_REVOCATION_BLOOM_ERROR_RATE)
+
+
+revocation_list = RevocationList()
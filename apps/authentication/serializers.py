@@ -2,13 +2,17 @@
 Сериализаторы для аутентификации
 """
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from apps.authorization.models import Role
+from apps.monitoring.timing import TimedSerializerMixin
 
 User = get_user_model()
 
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+class UserRegistrationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для регистрации пользователя"""
     password = serializers.CharField(write_only=True, min_length=8)
     password_confirm = serializers.CharField(write_only=True, min_length=8)
@@ -16,6 +20,8 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["email", "password", "password_confirm", "first_name", "last_name", "patronymic"]
+        # Уникальность email проверяет ограничение БД при вставке, без SELECT перед ней
+        extra_kwargs = {"email": {"validators": []}}
     
     def validate(self, attrs):
         """Валидация паролей"""
@@ -24,27 +30,49 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return attrs
     
     def create(self, validated_data):
-        """Создание пользователя"""
+        """Создание пользователя одним INSERT: пароль хешируется до вставки"""
         validated_data.pop("password_confirm")
         password = validated_data.pop("password")
-        user = User.objects.create_user(**validated_data)
-        user.set_password(password)
-        user.save()
-        return user
+        try:
+            with transaction.atomic():
+                return User.objects.create_user(password=password, **validated_data)
+        except IntegrityError:
+            raise email_taken_error()
 
 
-class UserLoginSerializer(serializers.Serializer):
+def email_taken_error() -> serializers.ValidationError:
+    """Ошибка занятого email в том же виде, что и у UniqueValidator"""
+    return serializers.ValidationError({"email": [UniqueValidator.message]})
+
+
+class UserLoginSerializer(TimedSerializerMixin, serializers.Serializer):
     """Сериализатор для входа в систему"""
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
 
 
-class TokenRefreshSerializer(serializers.Serializer):
+class TokenRefreshSerializer(TimedSerializerMixin, serializers.Serializer):
     """Сериализатор для обновления токена"""
     refresh_token = serializers.CharField()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class TokenIntrospectSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Сериализатор для проверки токенов: один token или список tokens"""
+    token = serializers.CharField(required=False)
+    tokens = serializers.ListField(child=serializers.CharField(), required=False, allow_empty=False)
+    
+    def validate(self, attrs):
+        """Ровно одно из полей и ограничение размера пакета"""
+        if ("token" in attrs) == ("tokens" in attrs):
+            raise serializers.ValidationError("Передайте token или tokens")
+        if len(attrs.get("tokens", [])) > settings.JWT_INTROSPECT_MAX_BATCH:
+            raise serializers.ValidationError(
+                {"tokens": f"Не больше {settings.JWT_INTROSPECT_MAX_BATCH} токенов за запрос"}
+            )
+        return attrs
+
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для отображения пользователя"""
     role_name = serializers.CharField(source="role.name", read_only=True)
     
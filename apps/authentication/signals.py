@@ -0,0 +1,24 @@
+"""
+Сигналы для инвалидации кэша пользователей
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.authentication.cache import user_cache
+from apps.authorization.models import Role
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Сброс пользователя при изменении, мягком удалении или смене роли"""
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def clear_user_cache(sender, **kwargs):
+    """Закэшированные пользователи содержат роль, поэтому сбрасываем все"""
+    user_cache.clear()
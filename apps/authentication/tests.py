@@ -1,3 +1,947 @@
-from django.test import TestCase
+import io
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+import jwt
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.urls import resolve
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from apps.authentication import async_views, revocation, views
+from apps.authentication.cache import token_cache, user_cache
+from apps.authentication.middleware import JWTAuthenticationMiddleware
+from apps.authentication.keys import key_ring, read_keys_file, write_keys_file
+from apps.authentication.models import RevokedToken, UserTokenRevocation
+from apps.authentication.revocation import BloomFilter, RevocationList, revocation_list
+from apps.authentication.throttling import get_client_ip, login_throttle
+from apps.authentication.utils import (
+    MAX_TOKEN_LENGTH,
+    decode_token,
+    encode_token,
+    generate_access_token,
+    generate_refresh_token,
+    get_permission_claims,
+)
+from apps.authorization.matrix import RuleSnapshot, permission_matrix
+from apps.authorization.models import AccessRoleRule, Role
+from apps.users.hashing import PasswordHashingBusy, password_hashing
+from tests.support import api_request, load_test_users
+from tests import query_budget
+from tests.query_budget import Endpoint
 
-# Create your tests here.
+User = get_user_model()
+
+
+def data_queries(captured):
+    """SQL запросы без служебных SAVEPOINT/RELEASE транзакции"""
+    return [
+        query["sql"] for query in captured.captured_queries
+        if not query["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT"))
+    ]
+
+
+@override_settings(PASSWORD_BCRYPT_ROUNDS=4, PASSWORD_HASHING_EXECUTOR="inline")
+class RegistrationQueryCountTests(TestCase):
+    """Регистрация выполняет ровно один INSERT"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def register(self, email):
+        return self.client.post(
+            "/api/auth/register/",
+            {
+                "email": email,
+                "password": "password123",
+                "password_confirm": "password123",
+                "first_name": "Иван",
+            },
+            format="json",
+        )
+
+    def test_register_single_insert(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.register("new@example.com")
+
+        self.assertEqual(response.status_code, 201)
+        queries = data_queries(captured)
+        self.assertEqual(len(queries), 1, queries)
+        self.assertTrue(queries[0].startswith("INSERT"), queries)
+
+        user = User.objects.get(email="new@example.com")
+        self.assertTrue(user.check_password("password123"))
+
+    def test_duplicate_email_detected_by_constraint(self):
+        self.register("taken@example.com")
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.register("taken@example.com")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("email", response.data)
+        queries = data_queries(captured)
+        self.assertEqual(len(queries), 1, queries)
+        self.assertTrue(queries[0].startswith("INSERT"), queries)
+        self.assertEqual(User.objects.filter(email="taken@example.com").count(), 1)
+
+
+class AuthQueryBudgetTests(query_budget.QueryBudgetTestCase):
+    """Бюджеты SQL запросов endpoints /api/auth/"""
+    endpoints = [
+        Endpoint("POST", "/api/auth/register/", 1, {
+            "email": "new{n}@example.com",
+            "password": "{password}",
+            "password_confirm": "{password}",
+        }),
+        Endpoint("POST", "/api/auth/login/", 1, {"email": "{email}", "password": "{password}"}),
+        Endpoint("POST", "/api/auth/refresh/", 1, {"refresh_token": "{refresh_token}"}),
+        Endpoint("GET", "/api/auth/introspect/", 1),
+        Endpoint("GET", "/api/auth/.well-known/jwks.json", 0),
+        Endpoint("POST", "/api/auth/logout/", 3, {"refresh_token": "{refresh_token}"}),
+    ]
+
+
+@override_settings(
+    PASSWORD_BCRYPT_ROUNDS=4,
+    PASSWORD_HASHING_EXECUTOR="inline",
+    LOGIN_THROTTLE_STORE="memory",
+    LOGIN_THROTTLE_EMAIL_LIMIT=3,
+    LOGIN_THROTTLE_IP_LIMIT=5,
+    LOGIN_THROTTLE_TRUSTED_PROXIES=0,
+)
+class LoginThrottleTests(TestCase):
+    """Ограничение неудачных входов по email и по IP клиента"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user("victim@example.com", "password123")
+
+    def setUp(self):
+        self.client = APIClient()
+        login_throttle.reset()
+        self.addCleanup(login_throttle.reset)
+
+    def login(self, email, password="wrong-password", **extra):
+        return self.client.post("/api/auth/login/", {"email": email, "password": password}, format="json", **extra)
+
+    def test_email_limit_blocks_correct_password(self):
+        for _ in range(3):
+            self.assertEqual(self.login("victim@example.com", REMOTE_ADDR="10.0.0.1").status_code, 401)
+
+        # Другой IP не помогает: счетчик по email общий
+        response = self.login("victim@example.com", "password123", REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(response.status_code, 429)
+        retry_after = int(response["Retry-After"])
+        self.assertGreaterEqual(retry_after, 1)
+        self.assertLessEqual(retry_after, 300)
+
+        self.assertEqual(self.login("other@example.com", REMOTE_ADDR="10.0.0.2").status_code, 401)
+
+    def test_ip_limit_across_emails(self):
+        for index in range(5):
+            self.assertEqual(self.login(f"user{index}@example.com", REMOTE_ADDR="10.0.0.1").status_code, 401)
+
+        response = self.login("victim@example.com", "password123", REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(self.login("victim@example.com", "password123", REMOTE_ADDR="10.0.0.2").status_code, 200)
+
+    def test_spoofed_forwarded_for_ignored_without_trusted_proxies(self):
+        statuses = [
+            self.login(
+                f"user{index}@example.com",
+                REMOTE_ADDR="10.0.0.1",
+                HTTP_X_FORWARDED_FOR=f"192.0.2.{index}",
+            ).status_code
+            for index in range(7)
+        ]
+        self.assertEqual(statuses, [401] * 5 + [429] * 2)
+
+    @override_settings(LOGIN_THROTTLE_TRUSTED_PROXIES=1)
+    def test_forwarded_for_behind_trusted_proxy(self):
+        # Клиент подставляет произвольные адреса слева, прокси дописывает настоящий справа
+        statuses = [
+            self.login(
+                f"user{index}@example.com",
+                REMOTE_ADDR="10.0.0.254",
+                HTTP_X_FORWARDED_FOR=f"192.0.2.{index}, 198.51.100.7",
+            ).status_code
+            for index in range(6)
+        ]
+        self.assertEqual(statuses, [401] * 5 + [429])
+
+        response = self.login("user9@example.com", REMOTE_ADDR="10.0.0.254", HTTP_X_FORWARDED_FOR="198.51.100.8")
+        self.assertEqual(response.status_code, 401)
+
+    def test_get_client_ip(self):
+        factory = RequestFactory()
+        request = factory.get("/", REMOTE_ADDR="10.0.0.254", HTTP_X_FORWARDED_FOR="1.1.1.1, 2.2.2.2, 3.3.3.3")
+        self.assertEqual(get_client_ip(request), "10.0.0.254")
+        with self.settings(LOGIN_THROTTLE_TRUSTED_PROXIES=2):
+            self.assertEqual(get_client_ip(request), "2.2.2.2")
+        with self.settings(LOGIN_THROTTLE_TRUSTED_PROXIES=4):
+            # Адресов меньше, чем доверенных прокси: запрос пришел в обход них
+            self.assertEqual(get_client_ip(request), "10.0.0.254")
+
+
+@override_settings(PASSWORD_BCRYPT_ROUNDS=4, PASSWORD_HASHING_EXECUTOR="inline", JWT_REVOCATION_SYNC_SECONDS=0)
+class RevocationTests(TestCase):
+    """Отзыв токенов по jti и всех токенов пользователя"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("revoke@example.com", "password123")
+
+    def setUp(self):
+        revocation_list.reset()
+        self.addCleanup(revocation_list.reset)
+
+    def payload(self, **claims):
+        now = int(time.time())
+        return {"user_id": str(self.user.id), "jti": uuid.uuid4().hex, "iat": now, "exp": now + 600, **claims}
+
+    def login(self):
+        response = APIClient().post(
+            "/api/auth/login/", {"email": "revoke@example.com", "password": "password123"}, format="json",
+        )
+        return response.json()["access_token"]
+
+    def me(self, token):
+        return APIClient().get("/api/users/me/", HTTP_AUTHORIZATION=f"Bearer {token}").status_code
+
+    def test_revoked_jti_stored_and_synced_by_other_worker(self):
+        payload = self.payload()
+        revocation_list.revoke(payload)
+        self.assertTrue(revocation_list.is_revoked(payload))
+        self.assertTrue(RevokedToken.objects.filter(jti=payload["jti"]).exists())
+
+        worker = RevocationList()
+        self.assertTrue(worker.is_revoked(payload))
+        self.assertFalse(worker.is_revoked(self.payload()))
+
+    def test_bloom_false_positive_falls_back_to_exact_set(self):
+        revoked = self.payload()
+        revocation_list.revoke(revoked)
+        saturated = BloomFilter(16, 0.5)
+        saturated._bits[:] = b"\xff" * len(saturated._bits)
+        revocation_list._bloom = saturated
+
+        other = self.payload()
+        self.assertIn(other["jti"], saturated)
+        self.assertFalse(revocation_list.is_revoked(other))
+        self.assertTrue(revocation_list.is_revoked(revoked))
+
+    def test_periodic_incremental_sync(self):
+        worker = RevocationList()
+        payload = self.payload()
+        with self.settings(JWT_REVOCATION_SYNC_SECONDS=3600):
+            self.assertFalse(worker.is_revoked(payload))
+            revocation_list.revoke(payload)
+            # До следующей синхронизации воркер не видит отзыв другого воркера
+            self.assertFalse(worker.is_revoked(payload))
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertTrue(worker.is_revoked(payload))
+        self.assertTrue(any("created_at" in query["sql"] for query in captured.captured_queries))
+
+        UserTokenRevocation.objects.create(
+            user=self.user,
+            revoked_before=revocation._to_datetime(payload["iat"] + 1),
+            expires_at=revocation._to_datetime(payload["exp"]),
+        )
+        self.assertTrue(worker.is_revoked(self.payload(jti=uuid.uuid4().hex)))
+
+    @override_settings(JWT_REVOCATION_SWEEP_SECONDS=0)
+    def test_sweep_removes_expired_records(self):
+        expired = self.payload(exp=int(time.time()) - 10)
+        revocation_list.revoke(expired)
+        revocation_list.reset()
+        self.assertFalse(revocation_list.is_revoked(expired))
+        self.assertFalse(RevokedToken.objects.filter(jti=expired["jti"]).exists())
+
+    def test_cutoff_separates_tokens_in_same_second(self):
+        second = math.floor(time.time())
+        revocation_list.is_revoked({})
+        with self.settings(JWT_REVOCATION_SYNC_SECONDS=3600):
+            with mock.patch.object(revocation.time, "time", return_value=second + 0.5):
+                revocation_list.revoke_all_for_user(self.user.id)
+            self.assertTrue(revocation_list.is_revoked(self.payload(iat=second)))
+            self.assertTrue(revocation_list.is_revoked(self.payload(iat=second + 0.4)))
+            self.assertFalse(revocation_list.is_revoked(self.payload(iat=second + 0.6)))
+
+        # Другой воркер получает границу из БД с той же точностью
+        worker = RevocationList()
+        self.assertTrue(worker.is_revoked(self.payload(iat=second + 0.4)))
+        self.assertFalse(worker.is_revoked(self.payload(iat=second + 0.6)))
+
+    def test_token_issued_in_same_second_before_revoke_all(self):
+        second = math.floor(time.time())
+        with mock.patch("time.time", return_value=second + 0.2):
+            token = generate_access_token(self.user.id)
+        self.assertEqual(self.me(token), 200)
+        with mock.patch("time.time", return_value=second + 0.7):
+            revocation_list.revoke_all_for_user(self.user.id)
+        self.assertEqual(self.me(token), 401)
+
+    def test_logout_all_then_relogin(self):
+        old_token = self.login()
+        self.assertEqual(self.me(old_token), 200)
+        response = APIClient().post(
+            "/api/auth/logout/", {"all": True}, format="json", HTTP_AUTHORIZATION=f"Bearer {old_token}",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        # Новый вход в ту же секунду не попадает под границу отзыва
+        new_token = self.login()
+        self.assertEqual(self.me(new_token), 200)
+        self.assertEqual(self.me(old_token), 401)
+
+
+@override_settings(JWT_STATELESS=True, RBAC_MATRIX_TTL_SECONDS=3600)
+class StatelessTokenTests(TestCase):
+    """Stateless access токены: права в claims и версия прав роли"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = load_test_users()
+
+    def setUp(self):
+        permission_matrix.invalidate()
+        self.addCleanup(permission_matrix.invalidate)
+        revocation_list.reset()
+        self.addCleanup(revocation_list.reset)
+
+    def products(self, token):
+        return APIClient().get("/api/products/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def admin_roles(self, token):
+        return APIClient().get("/api/admin/roles/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def toggle_rule(self, role_name):
+        rule = AccessRoleRule.objects.get(role__name=role_name, element__code="products")
+        rule.create_permission = not rule.create_permission
+        rule.save()
+
+    def test_claims(self):
+        user = self.users["user"]
+        payload = jwt.decode(generate_access_token(user.id, user.role_id), options={"verify_signature": False})
+        self.assertEqual((payload["role_id"], payload["role"]), (user.role_id, "user"))
+        self.assertEqual(
+            RuleSnapshot.from_mask(payload["perms"]["products"]),
+            permission_matrix.get_rule(user.role_id, "products"),
+        )
+        self.assertEqual(payload["pv"], permission_matrix.role_version(user.role_id))
+
+        # Пользователь загружается из claims, запрос к БД - только список товаров
+        token = generate_access_token(user.id, user.role_id)
+        self.products(token)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.products(token).status_code, 200)
+        self.assertEqual(len(captured), 1, [query["sql"] for query in captured.captured_queries])
+        self.assertNotIn('"users_user"', captured[0]["sql"])
+
+    def test_rule_change_invalidates_only_that_role(self):
+        admin, guest = self.users["admin"], self.users["guest"]
+        admin_token = generate_access_token(admin.id, admin.role_id)
+        guest_token = generate_access_token(guest.id, guest.role_id)
+
+        self.toggle_rule("guest")
+        self.assertEqual(self.products(admin_token).status_code, 200)
+        self.assertEqual(self.products(guest_token).status_code, 401)
+        self.assertEqual(self.products(generate_access_token(guest.id, guest.role_id)).status_code, 200)
+
+    def test_role_change_revokes_old_tokens(self):
+        admin, demoted = self.users["admin"], User.objects.create_user("demoted@example.com")
+        demoted.role = admin.role
+        demoted.save()
+        old_token = generate_access_token(demoted.id, demoted.role_id)
+        self.assertEqual(self.admin_roles(old_token).status_code, 200)
+
+        response = api_request(
+            APIClient(), admin, "PATCH", f"/api/admin/users/{demoted.id}/assign_role/",
+            {"role_id": self.users["user"].role_id},
+        )
+        self.assertEqual(response.status_code, 200)
+        # Старый токен с ролью admin отклоняется, новый несет права роли user
+        self.assertEqual(self.admin_roles(old_token).status_code, 401)
+        demoted.refresh_from_db()
+        self.assertEqual(self.admin_roles(generate_access_token(demoted.id, demoted.role_id)).status_code, 403)
+
+    def test_token_from_fresher_worker_accepted(self):
+        user = self.users["user"]
+        permission_matrix.snapshot()
+        # Изменение без сигналов: матрица этого воркера устарела, как у воркера до истечения TTL
+        AccessRoleRule.objects.filter(role=user.role, element__code="products").update(create_permission=False)
+        payload = jwt.decode(generate_access_token(user.id, user.role_id), options={"verify_signature": False})
+        fresh_claims = get_permission_claims(user.role_id, permission_matrix._build())
+        self.assertNotEqual(payload["pv"], fresh_claims["pv"])
+
+        with mock.patch("apps.authentication.utils.get_permission_claims", return_value=fresh_claims):
+            token = generate_access_token(user.id, user.role_id)
+        with mock.patch.object(permission_matrix, "version_recheck_seconds", 0):
+            response = api_request(APIClient(), None, "POST", "/api/products/", {"name": "x"}, HTTP_AUTHORIZATION=f"Bearer {token}")
+        # Матрица перестроена: токен принят, и права уже новые
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(permission_matrix.role_version(user.role_id), fresh_claims["pv"])
+
+
+class KeyRotationTests(TestCase):
+    """Асимметричные ключи: выбор kid, отложенная активация, выведенные ключи и JWKS"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "jwt_keys.json")
+        overrides = override_settings(JWT_KEYS_FILE=self.path, JWT_KEYS_RELOAD_SECONDS=0)
+        overrides.enable()
+        self.addCleanup(key_ring.reload)
+        self.addCleanup(overrides.disable)
+
+    def rotate(self, **options):
+        call_command("rotate_jwt_keys", algorithm="EdDSA", stdout=io.StringIO(), **options)
+        key_ring.reload()
+        return read_keys_file(self.path)[-1]["kid"]
+
+    def token_kid(self):
+        return jwt.get_unverified_header(encode_token({"sub": "1"}))["kid"]
+
+    def jwks_kids(self):
+        response = APIClient().get("/api/auth/.well-known/jwks.json")
+        self.assertEqual(response.status_code, 200)
+        return {jwk["kid"] for jwk in response.json()["keys"]}
+
+    def sign_with(self, kid):
+        key = key_ring.verification_key(kid)
+        return jwt.encode(
+            {"sub": "1", "exp": int(time.time()) + 60}, key.private_key,
+            algorithm=key.algorithm, headers={"kid": kid},
+        )
+
+    def test_first_key_signs_immediately(self):
+        kid = self.rotate()
+        self.assertEqual(self.token_kid(), kid)
+        self.assertEqual(self.jwks_kids(), {kid})
+        jwk = APIClient().get("/api/auth/.well-known/jwks.json").json()["keys"][0]
+        self.assertEqual((jwk["alg"], jwk["use"], jwk["kty"]), ("EdDSA", "sig", "OKP"))
+        self.assertNotIn("d", jwk)
+
+    def test_new_key_published_before_signing(self):
+        old_kid = self.rotate()
+        new_kid = self.rotate(activation_delay=3600)
+
+        # Новый ключ уже в JWKS и проверяет подпись, но подписывает пока старый
+        self.assertEqual(self.jwks_kids(), {old_kid, new_kid})
+        self.assertEqual(self.token_kid(), old_kid)
+        self.assertIsNotNone(decode_token(self.sign_with(new_kid)))
+
+        with mock.patch("apps.authentication.keys.time.time", return_value=time.time() + 3601):
+            self.assertEqual(key_ring.signing_key().kid, new_kid)
+        # Токены старого ключа проверяются на время перекрытия
+        self.assertIsNotNone(decode_token(self.sign_with(old_kid)))
+
+    def test_retired_key_rejected(self):
+        old_kid = self.rotate()
+        old_token = encode_token({"sub": "1", "exp": int(time.time()) + 60})
+        self.assertIsNotNone(decode_token(old_token))
+        new_kid = self.rotate(activation_delay=0, overlap_hours=0)
+
+        self.assertEqual(self.token_kid(), new_kid)
+        self.assertEqual(self.jwks_kids(), {new_kid})
+        self.assertIsNone(decode_token(old_token))
+
+        # Следующая ротация удаляет выведенный ключ из файла
+        self.rotate()
+        self.assertNotIn(old_kid, [key["kid"] for key in read_keys_file(self.path)])
+
+    def test_cached_token_rejected_after_retire_at(self):
+        self.rotate()
+        old_token = encode_token({"sub": "1", "exp": int(time.time()) + 7200})
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.rotate(activation_delay=0, overlap_hours=1)
+
+        # Токен старого ключа закэширован, файл ключей больше не меняется
+        self.assertIsNotNone(decode_token(old_token))
+        with mock.patch("apps.authentication.utils.jwt.decode") as jwt_decode:
+            self.assertIsNotNone(decode_token(old_token))
+        jwt_decode.assert_not_called()
+
+        with mock.patch("apps.authentication.keys.time.time", return_value=time.time() + 3601):
+            self.assertIsNone(decode_token(old_token))
+            self.assertEqual(self.jwks_kids(), {key_ring.signing_key().kid})
+
+    def test_unknown_kid_rejected(self):
+        self.rotate()
+        token = self.sign_with(key_ring.signing_key().kid)
+        keys = read_keys_file(self.path)
+        keys[0]["kid"] = "other"
+        write_keys_file(self.path, keys)
+        key_ring.reload()
+        self.assertIsNone(decode_token(token))
+
+
+@override_settings(JWT_INTROSPECT_MAX_BATCH=3)
+class IntrospectionTests(TestCase):
+    """Проверка токенов шлюзом: GET по заголовку и POST с token/tokens"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("introspect@example.com", "password123")
+        cls.inactive = User.objects.create_user("inactive@example.com", "password123", is_active=False)
+
+    def setUp(self):
+        revocation_list.reset()
+        self.addCleanup(revocation_list.reset)
+
+    def access_token(self, user=None, **claims):
+        now = int(time.time())
+        return encode_token({
+            "user_id": str((user or self.user).id), "exp": now + 600, "iat": now,
+            "type": "access", "jti": uuid.uuid4().hex, **claims,
+        })
+
+    def introspect(self, **data):
+        return APIClient().post("/api/auth/introspect/", data, format="json")
+
+    def test_active_token(self):
+        token = self.access_token()
+        response = APIClient().get("/api/auth/introspect/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Authorization", response["Vary"])
+        body = response.json()
+        self.assertTrue(body["active"])
+        self.assertEqual(body["user_id"], str(self.user.id))
+        self.assertEqual(body["role_id"], self.user.role_id)
+
+        max_age = int(response["Cache-Control"].removeprefix("max-age="))
+        self.assertTrue(0 < max_age <= 60, response["Cache-Control"])
+        self.assertTrue(self.introspect(token=token).json()["active"])
+
+    def test_inactive_tokens(self):
+        now = int(time.time())
+        revoked = self.access_token()
+        revocation_list.revoke(decode_token(revoked))
+        tokens = {
+            "expired": self.access_token(exp=now - 1, iat=now - 601),
+            "revoked": revoked,
+            "refresh": self.access_token(type="refresh"),
+            "inactive user": self.access_token(self.inactive),
+            "malformed": "not-a-token",
+            "bad signature": self.access_token()[:-4] + "AAAA",
+        }
+        for name, token in tokens.items():
+            with self.subTest(name):
+                response = self.introspect(token=token)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), {"active": False})
+                self.assertEqual(response["Cache-Control"], "max-age=30")
+
+    def test_unauthorized_caller(self):
+        for headers in ({}, {"HTTP_AUTHORIZATION": "Basic dXNlcjpwYXNz"}, {"HTTP_AUTHORIZATION": "Bearer abc"}):
+            with self.subTest(headers):
+                response = APIClient().get("/api/auth/introspect/", **headers)
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual(response.json(), {"active": False})
+
+    def test_batch_keeps_order_with_single_user_query(self):
+        tokens = [self.access_token(), "not-a-token", self.access_token(self.inactive)]
+        with CaptureQueriesContext(connection) as captured:
+            response = self.introspect(tokens=tokens)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result["active"] for result in response.json()["results"]], [True, False, False])
+        self.assertEqual(len([query for query in data_queries(captured) if '"users_user"' in query]), 1)
+
+    def test_invalid_requests(self):
+        for data in ({"tokens": ["a"] * 4}, {"tokens": []}, {}, {"token": "a", "tokens": ["a"]}):
+            with self.subTest(data):
+                self.assertEqual(self.introspect(**data).status_code, 400)
+        self.assertEqual(self.introspect(tokens=["a"] * 3).status_code, 200)
+
+
+class UserCacheTests(TestCase):
+    """Кэш пользователей в middleware и его инвалидация"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("cached@example.com", "password123")
+
+    def setUp(self):
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.token = generate_access_token(self.user.id, self.user.role_id)
+
+    def me(self):
+        return APIClient().get("/api/users/me/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def test_cached_user_skips_users_query(self):
+        self.assertEqual(self.me().status_code, 200)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.me().status_code, 200)
+        self.assertFalse([query for query in data_queries(captured) if '"users_user"' in query])
+
+    def test_deactivated_user_rejected_after_save(self):
+        self.assertEqual(self.me().status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.me().status_code, 401)
+
+    def assert_evicted(self, change):
+        # Пользователь в кэше: запрос без обращения к users_user
+        self.assertEqual(self.me().status_code, 200)
+        self.assertIn(str(self.user.id), user_cache._entries)
+        generation = user_cache.generation
+
+        change()
+        self.assertNotIn(str(self.user.id), user_cache._entries)
+        self.assertGreater(user_cache.generation, generation)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.me()
+        self.assertTrue([query for query in data_queries(captured) if '"users_user"' in query])
+        return response
+
+    def test_save_evicts_cached_user(self):
+        def rename():
+            self.user.first_name = "Новое имя"
+            self.user.save()
+
+        self.assertEqual(self.assert_evicted(rename).json()["first_name"], "Новое имя")
+
+    def test_role_change_evicts_cached_user(self):
+        role = Role.objects.create(name="cache-role")
+
+        def assign_role():
+            self.user.role = role
+            self.user.save(update_fields=["role"])
+
+        self.assertEqual(self.assert_evicted(assign_role).json()["role_name"], "cache-role")
+
+    def test_delete_evicts_cached_user(self):
+        self.assertEqual(self.assert_evicted(self.user.delete).status_code, 401)
+
+    def test_update_without_signals_visible_after_invalidate(self):
+        self.assertEqual(self.me().status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        # Изменение в обход сигналов видно после явной инвалидации
+        self.assertEqual(self.me().status_code, 200)
+        user_cache.invalidate(self.user.pk)
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_stale_load_not_stored_after_invalidation(self):
+        generation = user_cache.generation
+        user_cache.invalidate(self.user.pk)
+        user_cache.set(str(self.user.pk), self.user, generation)
+        self.assertIsNone(user_cache.get(str(self.user.pk)))
+
+
+class TokenCacheTests(TestCase):
+    """Кэш проверенных токенов, отзыв и ранний отказ для некорректных токенов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("token-cache@example.com", "password123")
+
+    def setUp(self):
+        token_cache.clear()
+        revocation_list.reset()
+        self.addCleanup(token_cache.clear)
+        self.addCleanup(revocation_list.reset)
+        self.token = generate_access_token(self.user.id, self.user.role_id)
+
+    def me(self, token):
+        return APIClient().get("/api/users/me/", HTTP_AUTHORIZATION=f"Bearer {token}").status_code
+
+    def test_cached_token_skips_signature_verification(self):
+        self.assertIsNotNone(decode_token(self.token))
+        with mock.patch("apps.authentication.utils.jwt.decode") as jwt_decode:
+            self.assertEqual(decode_token(self.token)["user_id"], str(self.user.id))
+        jwt_decode.assert_not_called()
+
+    def test_revoked_token_rejected_while_cached(self):
+        self.assertEqual(self.me(self.token), 200)
+        revocation_list.revoke(decode_token(self.token))
+        self.assertEqual(self.me(self.token), 401)
+
+    def test_bad_signature_cached_as_invalid(self):
+        forged = self.token[:-4] + ("AAAA" if not self.token.endswith("AAAA") else "BBBB")
+        self.assertIsNone(decode_token(forged))
+        with mock.patch("apps.authentication.utils.jwt.decode") as jwt_decode:
+            self.assertIsNone(decode_token(forged))
+        jwt_decode.assert_not_called()
+
+    def test_malformed_token_rejected_before_verification(self):
+        malformed = ["", "abc", "a.b", "a.b.c.d", "a!.b.c", "a.b.c" + "a" * MAX_TOKEN_LENGTH]
+        with mock.patch("apps.authentication.utils.jwt") as jwt_module:
+            for token in malformed:
+                with self.subTest(token[:20]):
+                    self.assertIsNone(decode_token(token))
+                    self.assertEqual(self.me(token), 401)
+        self.assertEqual(jwt_module.mock_calls, [])
+        self.assertEqual(token_cache.stats()["size"] + token_cache.stats()["negative_size"], 0)
+
+
+@override_settings(
+    PASSWORD_BCRYPT_ROUNDS=4,
+    PASSWORD_HASHING_EXECUTOR="thread",
+    PASSWORD_HASHING_WORKERS=1,
+    PASSWORD_HASHING_QUEUE_SIZE=0,
+)
+class HashingBackpressureTests(TestCase):
+    """Переполненный пул хеширования: 503 с Retry-After без ожидания в очереди"""
+
+    @classmethod
+    def setUpTestData(cls):
+        with override_settings(PASSWORD_HASHING_EXECUTOR="inline"):
+            User.objects.create_user("busy@example.com", "password123")
+
+    def setUp(self):
+        login_throttle.reset()
+        self.addCleanup(login_throttle.reset)
+        # Пул создается с размерами из настроек при первом использовании
+        password_hashing.shutdown()
+        self.addCleanup(password_hashing.shutdown)
+
+    def occupy_pool(self):
+        """Занимает единственное место в пуле до конца теста"""
+        release = threading.Event()
+        worker = threading.Thread(target=password_hashing.run, args=(release.wait, 10))
+        worker.start()
+        self.addCleanup(worker.join)
+        self.addCleanup(release.set)
+        deadline = time.monotonic() + 5
+        while password_hashing.stats()["in_flight"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def assertBusy(self, response):
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertIn("error", response.json())
+
+    def test_login_and_register_rejected_when_pool_full(self):
+        self.occupy_pool()
+        rejected = password_hashing.stats()["rejected"]
+        client = APIClient()
+
+        self.assertBusy(client.post(
+            "/api/auth/login/", {"email": "busy@example.com", "password": "password123"}, format="json",
+        ))
+        self.assertBusy(client.post("/api/auth/register/", {
+            "email": "new@example.com",
+            "password": "password123",
+            "password_confirm": "password123",
+            "first_name": "Иван",
+            "last_name": "Иванов",
+        }, format="json"))
+
+        self.assertEqual(password_hashing.stats()["rejected"], rejected + 2)
+        self.assertFalse(User.objects.filter(email="new@example.com").exists())
+
+    def test_login_succeeds_when_pool_free(self):
+        response = APIClient().post(
+            "/api/auth/login/", {"email": "busy@example.com", "password": "password123"}, format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(
+    PASSWORD_BCRYPT_ROUNDS=4,
+    PASSWORD_HASHING_EXECUTOR="inline",
+    LOGIN_THROTTLE_EMAIL_LIMIT=2,
+    LOGIN_THROTTLE_IP_LIMIT=100,
+)
+class AsyncViewsTests(TestCase):
+    """Асинхронные views (JWT_ASYNC_VIEWS=True) отвечают так же, как синхронные"""
+
+    urlconfs = {"sync": "tests.urls_sync", "async": "tests.urls_async"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("async@example.com", "password123", first_name="Иван")
+
+    def setUp(self):
+        login_throttle.reset()
+        revocation_list.reset()
+        self.addCleanup(login_throttle.reset)
+        self.addCleanup(revocation_list.reset)
+
+    async def post(self, handler, path, data):
+        with override_settings(ROOT_URLCONF=self.urlconfs[handler]):
+            return await self.async_client.post(path, data, content_type="application/json")
+
+    async def assertSameResponses(self, path, data, status_code, before=None):
+        """Ответы обоих наборов views на одинаковый запрос; before готовит состояние перед каждым"""
+        responses = {}
+        for handler in self.urlconfs:
+            login_throttle.reset()
+            if before is not None:
+                await before(handler)
+            responses[handler] = await self.post(handler, path, data)
+
+        sync, async_ = responses["sync"], responses["async"]
+        self.assertEqual(sync.status_code, status_code, sync.content)
+        self.assertEqual(async_.status_code, status_code, async_.content)
+        self.assertEqual(self.normalize(async_.json()), self.normalize(sync.json()))
+        self.assertEqual(async_.get("Retry-After"), sync.get("Retry-After"))
+        return sync, async_
+
+    @staticmethod
+    def normalize(body):
+        """Токены и id различаются между запросами, сравнивается только их наличие"""
+        body = dict(body)
+        for key in ("access_token", "refresh_token"):
+            if key in body:
+                body[key] = bool(body[key])
+        if "user" in body:
+            body["user"] = {**body["user"], "id": bool(body["user"]["id"])}
+        return body
+
+    def test_urlconfs_route_to_each_views_module(self):
+        for handler, module in (("sync", views), ("async", async_views)):
+            for path, view in (("/api/auth/login/", module.login), ("/api/auth/refresh/", module.refresh_token_view)):
+                self.assertIs(resolve(path, urlconf=self.urlconfs[handler]).func, view)
+
+    async def test_register(self):
+        for handler in self.urlconfs:
+            response = await self.post(handler, "/api/auth/register/", {
+                "email": f"new-{handler}@example.com",
+                "password": "password123",
+                "password_confirm": "password123",
+                "first_name": "Иван",
+            })
+            self.assertEqual(response.status_code, 201, response.content)
+            body = self.normalize(response.json())
+            self.assertEqual(body["user"]["email"], f"new-{handler}@example.com")
+            self.assertEqual(set(body), {"message", "access_token", "refresh_token", "user"})
+
+        register = {"password": "password123", "password_confirm": "password123", "first_name": "Иван"}
+        await self.assertSameResponses("/api/auth/register/", {**register, "email": "async@example.com"}, 400)
+        await self.assertSameResponses(
+            "/api/auth/register/", {**register, "email": "other@example.com", "password_confirm": "other"}, 400,
+        )
+
+    async def test_login(self):
+        await self.assertSameResponses("/api/auth/login/", {"email": "async@example.com", "password": "password123"}, 200)
+        await self.assertSameResponses("/api/auth/login/", {"email": "async@example.com", "password": "wrong"}, 401)
+        await self.assertSameResponses("/api/auth/login/", {"email": "missing@example.com", "password": "wrong"}, 401)
+        await self.assertSameResponses("/api/auth/login/", {"email": "not-an-email"}, 400)
+
+    async def test_login_throttled(self):
+        async def fail_twice(handler):
+            for _ in range(2):
+                await self.post(handler, "/api/auth/login/", {"email": "async@example.com", "password": "wrong"})
+
+        with mock.patch("apps.authentication.throttling.time.time", return_value=1_000_000.0):
+            await self.assertSameResponses(
+                "/api/auth/login/", {"email": "async@example.com", "password": "password123"}, 429, fail_twice,
+            )
+
+    async def test_hashing_busy(self):
+        with mock.patch.object(password_hashing, "run", side_effect=PasswordHashingBusy), \
+                mock.patch.object(password_hashing, "arun", side_effect=PasswordHashingBusy):
+            await self.assertSameResponses(
+                "/api/auth/login/", {"email": "async@example.com", "password": "password123"}, 503,
+            )
+            await self.assertSameResponses("/api/auth/register/", {
+                "email": "busy-register@example.com",
+                "password": "password123",
+                "password_confirm": "password123",
+                "first_name": "Иван",
+            }, 503)
+
+    async def test_refresh(self):
+        refresh_token = generate_refresh_token(self.user.id)
+        sync, _ = await self.assertSameResponses("/api/auth/refresh/", {"refresh_token": refresh_token}, 200)
+        self.assertEqual(set(sync.json()), {"access_token"})
+
+        access_token = generate_access_token(self.user.id, self.user.role_id)
+        await self.assertSameResponses("/api/auth/refresh/", {"refresh_token": access_token}, 401)
+        await self.assertSameResponses("/api/auth/refresh/", {"refresh_token": "not-a-token"}, 401)
+        await self.assertSameResponses("/api/auth/refresh/", {}, 400)
+
+    def test_benchmark_both_requires_file_database(self):
+        # Тестовая база в памяти не видна дочерним процессам замера
+        with self.assertRaises(CommandError):
+            call_command("benchmark_asgi", requests=1, concurrency=1, stdout=io.StringIO())
+
+
+class LazyAuthenticationTests(TestCase):
+    """Middleware разбирает токен и загружает пользователя только при обращении к request.user"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("lazy@example.com", "password123")
+
+    def setUp(self):
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.token = generate_access_token(self.user.id, self.user.role_id)
+        self.middleware = JWTAuthenticationMiddleware(lambda request: HttpResponse())
+
+    def patch_auth(self):
+        """Счетчики разбора токена и загрузки пользователя (поведение не меняется)"""
+        decode = mock.patch("apps.authentication.middleware.decode_token", wraps=decode_token)
+        get_user = mock.patch.object(
+            JWTAuthenticationMiddleware, "get_user", autospec=True,
+            side_effect=JWTAuthenticationMiddleware.get_user,
+        )
+        return decode.start(), get_user.start()
+
+    def test_skipped_and_exempt_paths_do_no_auth_work(self):
+        decode, get_user = self.patch_auth()
+        self.addCleanup(mock.patch.stopall)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        requests = [
+            ("POST", "/api/auth/login/", {"email": "not-an-email"}, 400),
+            ("POST", "/api/auth/register/", {"email": "not-an-email"}, 400),
+            ("POST", "/api/auth/refresh/", {}, 400),
+            ("GET", "/admin/", None, 302),
+        ]
+        for method, path, data, status_code in requests:
+            with self.subTest(path):
+                with CaptureQueriesContext(connection) as captured:
+                    response = client.generic(
+                        method, path, json.dumps(data) if data else "", content_type="application/json",
+                    )
+                self.assertEqual(response.status_code, status_code)
+                self.assertEqual(captured.captured_queries, [])
+        decode.assert_not_called()
+        get_user.assert_not_called()
+
+    def test_user_resolved_once_on_first_access(self):
+        decode, get_user = self.patch_auth()
+        self.addCleanup(mock.patch.stopall)
+        request = RequestFactory().get("/api/users/me/", HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        with CaptureQueriesContext(connection) as captured:
+            self.middleware.process_request(request)
+        self.assertEqual(captured.captured_queries, [])
+        decode.assert_not_called()
+
+        self.assertEqual(request.user.email, "lazy@example.com")
+        self.assertEqual(request.user.id, self.user.id)
+        self.assertEqual((decode.call_count, get_user.call_count), (1, 1))
+
+    async def test_auser_resolved_once(self):
+        request = AsyncRequestFactory().get("/api/users/me/", headers={"Authorization": f"Bearer {self.token}"})
+        self.middleware.process_request(request)
+        aget_user = JWTAuthenticationMiddleware.aget_user
+        calls = []
+
+        async def counting_aget_user(middleware, user_id):
+            calls.append(user_id)
+            return await aget_user(middleware, user_id)
+
+        with mock.patch.object(JWTAuthenticationMiddleware, "aget_user", counting_aget_user):
+            first = await request.auser()
+            second = await request.auser()
+        self.assertEqual(first.email, "lazy@example.com")
+        self.assertIs(first, second)
+        self.assertEqual(calls, [str(self.user.id)])
@@ -0,0 +1,212 @@
+"""
+Ограничение частоты неудачных попыток входа по email и по IP клиента
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+
+class ThrottleRule(NamedTuple):
+    scope: str
+    # Хеш email/IP: ключ безопасен для memcached и не хранит email
+    digest: str
+    limit: int
+    window: int
+
+
+class MemoryThrottleStore:
+    """Счетчики в памяти процесса (один узел)"""
+
+    # Как часто удалять счетчики истекших окон (секунды)
+    sweep_interval = 60
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, List] = {}
+        self._swept_at = time.monotonic()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, int]:
+        now = time.monotonic()
+        counters = self._counters
+        result = {}
+        for key in keys:
+            entry = counters.get(key)
+            if entry is not None and entry[1] > now:
+                result[key] = entry[0]
+        return result
+
+    def incr(self, key: str, ttl: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None or entry[1] <= now:
+                self._counters[key] = [1, now + ttl]
+            else:
+                entry[0] += 1
+            if now - self._swept_at >= self.sweep_interval:
+                self._swept_at = now
+                self._counters = {
+                    key: entry for key, entry in self._counters.items() if entry[1] > now
+                }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counters = {}
+
+
+class CacheThrottleStore:
+    """Счетчики в кэше Django (общие для нескольких узлов)"""
+
+    def __init__(self, alias: str):
+        self.alias = alias
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, int]:
+        return caches[self.alias].get_many(list(keys))
+
+    def incr(self, key: str, ttl: int) -> None:
+        cache = caches[self.alias]
+        # add атомарно создает счетчик только если его еще нет
+        if cache.add(key, 1, ttl):
+            return
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Ключ истек между add и incr
+            cache.set(key, 1, ttl)
+
+
+class LoginThrottle:
+    """
+    Скользящее окно неудачных попыток входа.
+
+    Используются два соседних фиксированных окна: счетчик предыдущего окна
+    учитывается с весом оставшейся доли текущего. Проверка выполняется до
+    загрузки пользователя и проверки пароля, поэтому заблокированные попытки
+    не тратят CPU на хеширование. Хранилище счетчиков задает
+    LOGIN_THROTTLE_STORE: "memory" или "cache" (LOGIN_THROTTLE_CACHE_ALIAS).
+    """
+
+    def __init__(self):
+        self._memory_store = MemoryThrottleStore()
+
+    @property
+    def store(self):
+        if settings.LOGIN_THROTTLE_STORE == "cache":
+            return CacheThrottleStore(settings.LOGIN_THROTTLE_CACHE_ALIAS)
+        return self._memory_store
+
+    def check(self, email: str, ip: Optional[str]) -> float:
+        """Через сколько секунд можно повторить попытку (0 - попытка разрешена)"""
+        rules = self._rules(email, ip)
+        if not rules:
+            return 0.0
+
+        now = time.time()
+        keys = {}
+        for rule in rules:
+            window_index = int(now // rule.window)
+            keys[rule] = (self._key(rule, window_index - 1), self._key(rule, window_index))
+        counters = self.store.get_many(key for pair in keys.values() for key in pair)
+
+        retry_after = 0.0
+        for rule, (previous_key, current_key) in keys.items():
+            elapsed = now % rule.window
+            previous = counters.get(previous_key, 0)
+            current = counters.get(current_key, 0)
+            weight = 1 - elapsed / rule.window
+            if previous * weight + current < rule.limit:
+                continue
+            if previous and current < rule.limit:
+                # Момент, когда вес предыдущего окна уменьшится достаточно
+                wait = rule.window * (1 - (rule.limit - current) / previous) - elapsed
+            else:
+                wait = rule.window - elapsed
+            retry_after = max(retry_after, wait)
+        return retry_after
+
+    def record_failure(self, email: str, ip: Optional[str]) -> None:
+        """Учет неудачной попытки входа"""
+        now = time.time()
+        store = self.store
+        for rule in self._rules(email, ip):
+            # Счетчик нужен еще одно окно после своего (как предыдущее окно)
+            store.incr(self._key(rule, int(now // rule.window)), rule.window * 2)
+
+    async def acheck(self, email: str, ip: Optional[str]) -> float:
+        """Асинхронный вариант check (кэш Django опрашивается в потоке)"""
+        if settings.LOGIN_THROTTLE_STORE == "cache":
+            return await sync_to_async(self.check)(email, ip)
+        return self.check(email, ip)
+
+    async def arecord_failure(self, email: str, ip: Optional[str]) -> None:
+        """Асинхронный вариант record_failure"""
+        if settings.LOGIN_THROTTLE_STORE == "cache":
+            await sync_to_async(self.record_failure)(email, ip)
+        else:
+            self.record_failure(email, ip)
+
+    def reset(self) -> None:
+        """Сброс счетчиков в памяти процесса (счетчики в кэше истекают сами)"""
+        self._memory_store.clear()
+
+    @staticmethod
+    def _rules(email: str, ip: Optional[str]) -> List[ThrottleRule]:
+        rules = []
+        if settings.LOGIN_THROTTLE_EMAIL_LIMIT > 0:
+            rules.append(ThrottleRule(
+                "email",
+                _digest(email.strip().lower()),
+                settings.LOGIN_THROTTLE_EMAIL_LIMIT,
+                settings.LOGIN_THROTTLE_EMAIL_WINDOW_SECONDS,
+            ))
+        if ip and settings.LOGIN_THROTTLE_IP_LIMIT > 0:
+            rules.append(ThrottleRule(
+                "ip",
+                _digest(ip),
+                settings.LOGIN_THROTTLE_IP_LIMIT,
+                settings.LOGIN_THROTTLE_IP_WINDOW_SECONDS,
+            ))
+        return rules
+
+    @staticmethod
+    def _key(rule: ThrottleRule, window_index: int) -> str:
+        return f"login-throttle:{rule.scope}:{rule.digest}:{window_index}"
+
+
+def _digest(ident: str) -> str:
+    return hashlib.blake2b(ident.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def get_client_ip(request) -> Optional[str]:
+    """
+    IP клиента для ограничения по IP. Без доверенных прокси - REMOTE_ADDR:
+    X-Forwarded-For задает сам клиент, и подмена заголовка давала бы новый
+    счетчик на каждую попытку. За LOGIN_THROTTLE_TRUSTED_PROXIES прокси
+    каждый дописывает в конец X-Forwarded-For адрес своего клиента, поэтому
+    IP клиента - N-й адрес справа (первый недоверенный узел); адреса левее
+    мог подставить клиент.
+    """
+    remote_addr = request.META.get("REMOTE_ADDR")
+    trusted_proxies = settings.LOGIN_THROTTLE_TRUSTED_PROXIES
+    if trusted_proxies <= 0:
+        return remote_addr
+    forwarded = [
+        address.strip() for address in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+        if address.strip()
+    ]
+    if len(forwarded) < trusted_proxies:
+        # Запрос пришел в обход части доверенных прокси
+        return remote_addr
+    return forwarded[-trusted_proxies]
+
+
+def retry_after_header(retry_after: float) -> str:
+    return str(max(1, math.ceil(retry_after)))
+
+
+login_throttle = LoginThrottle()
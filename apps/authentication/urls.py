@@ -1,16 +1,22 @@
 """
 URLs для аутентификации
 """
+from django.conf import settings
 from django.urls import path
-from apps.authentication import views
+from apps.authentication import async_views, views
 
 app_name = "authentication"
 
+# Под ASGI регистрация, вход и обновление токена обслуживаются асинхронными views
+auth_views = async_views if settings.JWT_ASYNC_VIEWS else views
+
 urlpatterns = [
-    path("register/", views.register, name="register"),
-    path("login/", views.login, name="login"),
+    path("register/", auth_views.register, name="register"),
+    path("login/", auth_views.login, name="login"),
     path("logout/", views.logout, name="logout"),
-    path("refresh/", views.refresh_token_view, name="refresh"),
+    path("refresh/", auth_views.refresh_token_view, name="refresh"),
+    path("introspect/", views.introspect, name="introspect"),
+    path(".well-known/jwks.json", views.jwks, name="jwks"),
 ]
 
 
@@ -1,21 +1,72 @@
 """
 Утилиты для работы с JWT токенами
 """
+import re
+import time
+import uuid
 import jwt
 from datetime import datetime, timedelta
 from django.conf import settings
 from typing import Dict, Optional
+from apps.authentication.cache import token_cache
+from apps.authentication.keys import key_ring
+from apps.authentication.revocation import revocation_list
+from apps.authorization.matrix import permission_matrix
+from apps.monitoring.metrics import token_decode_total, token_verify_seconds
+from apps.monitoring.timing import phase
 
+# Ограничение длины токена и формат header.payload.signature в base64url
+MAX_TOKEN_LENGTH = 8192
+TOKEN_RE = re.compile(r"^[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]*$")
 
-def generate_access_token(user_id: str) -> str:
+
+def generate_access_token(user_id: str, role_id: Optional[int] = None) -> str:
     """Генерация access токена"""
-    payload = {
+    payload = _access_token_payload(user_id)
+    if settings.JWT_STATELESS:
+        payload.update(get_permission_claims(role_id))
+    return encode_token(payload)
+
+
+async def agenerate_access_token(user_id: str, role_id: Optional[int] = None) -> str:
+    """Асинхронный вариант generate_access_token (матрица прав строится в потоке)"""
+    payload = _access_token_payload(user_id)
+    if settings.JWT_STATELESS:
+        payload.update(get_permission_claims(role_id, await permission_matrix.asnapshot()))
+    return encode_token(payload)
+
+
+def _access_token_payload(user_id: str) -> Dict:
+    return {
         "user_id": str(user_id),
         "exp": datetime.utcnow() + timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES),
-        "iat": datetime.utcnow(),
+        # Дробные секунды: отзыв всех токенов пользователя отделяет токены,
+        # выпущенные в ту же секунду до и после него
+        "iat": time.time(),
         "type": "access",
+        "jti": uuid.uuid4().hex,
+    }
+
+
+def get_permission_claims(role_id: Optional[int], state=None) -> Dict:
+    """
+    Claims роли и прав для stateless режима:
+    role_id, название роли, битовые маски прав по кодам элементов и версия прав роли
+    """
+    # Один снимок матрицы, чтобы права и версия были согласованы
+    state = state or permission_matrix.snapshot()
+    role_rules = state.rules_by_role.get(role_id, {}) if role_id else {}
+    perms = {}
+    for element_code, rule in role_rules.items():
+        mask = rule.to_mask()
+        if mask:
+            perms[element_code] = mask
+    return {
+        "role_id": role_id,
+        "role": state.role_names.get(role_id) if role_id else None,
+        "perms": perms,
+        "pv": state.role_version(role_id),
     }
-    return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
 
 
 def generate_refresh_token(user_id: str) -> str:
@@ -23,19 +74,41 @@ def generate_refresh_token(user_id: str) -> str:
     payload = {
         "user_id": str(user_id),
         "exp": datetime.utcnow() + timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS),
-        "iat": datetime.utcnow(),
+        # Дробные секунды: отзыв всех токенов пользователя отделяет токены,
+        # выпущенные в ту же секунду до и после него
+        "iat": time.time(),
         "type": "refresh",
+        "jti": uuid.uuid4().hex,
     }
-    return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    return encode_token(payload)
 
 
-def decode_token(token: str) -> Optional[Dict]:
-    """Декодирование и валидация JWT токена"""
+def is_well_formed_token(token: str) -> bool:
+    """Структурная проверка JWT (три base64url сегмента) до криптографии"""
+    return (
+        isinstance(token, str)
+        and len(token) <= MAX_TOKEN_LENGTH
+        and TOKEN_RE.match(token) is not None
+    )
+
+
+def encode_token(payload: Dict) -> str:
+    """Подпись payload текущим ключом подписи (с kid в заголовке для асимметричных ключей)"""
+    key = key_ring.signing_key()
+    headers = {"kid": key.kid} if key.kid else None
+    return jwt.encode(payload, key.private_key, algorithm=key.algorithm, headers=headers)
+
+
+def _decode_token(token: str) -> Optional[Dict]:
     try:
+        kid = jwt.get_unverified_header(token).get("kid") if key_ring.uses_kid else None
+        key = key_ring.verification_key(kid)
+        if key is None:
+            return None
         payload = jwt.decode(
             token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
+            key.public_key,
+            algorithms=[key.algorithm]
         )
         return payload
     except jwt.ExpiredSignatureError:
@@ -44,6 +117,74 @@ def decode_token(token: str) -> Optional[Dict]:
         return None
 
 
+def decode_token(token: str) -> Optional[Dict]:
+    """Декодирование и валидация JWT токена (включая проверку отзыва)"""
+    with phase("jwt"):
+        payload = _decode_token_cached(token)
+        if payload is None:
+            token_decode_total.inc("invalid")
+            return None
+        if revocation_list.is_revoked(payload):
+            token_decode_total.inc("revoked")
+            return None
+        token_decode_total.inc("valid")
+        return payload
+
+
+async def adecode_token(token: str) -> Optional[Dict]:
+    """Асинхронный вариант decode_token (синхронизация списка отзыва выполняется в потоке)"""
+    with phase("jwt"):
+        payload = _decode_token_cached(token)
+        if payload is None:
+            token_decode_total.inc("invalid")
+            return None
+        if await revocation_list.ais_revoked(payload):
+            token_decode_total.inc("revoked")
+            return None
+        token_decode_total.inc("valid")
+        return payload
+
+
+def _decode_token_cached(token: str) -> Optional[Dict]:
+    if not is_well_formed_token(token):
+        token_cache.malformed += 1
+        return None
+    
+    if not token_cache.enabled:
+        started = time.perf_counter()
+        payload = _decode_token(token)
+        token_verify_seconds.observe(time.perf_counter() - started)
+        return payload
+    
+    # Смена ключей сбрасывает кэш, поэтому проверяем ее до поиска в кэше
+    key_ring.refresh()
+    key = token_cache.make_key(token)
+    found, payload = token_cache.lookup(key)
+    if found:
+        return payload
+    
+    started = time.perf_counter()
+    payload = _decode_token(token)
+    duration = time.perf_counter() - started
+    token_verify_seconds.observe(duration)
+    if payload is None:
+        token_cache.set_invalid(key, duration)
+    else:
+        token_cache.set_valid(key, payload, duration)
+        payload = dict(payload)
+    return payload
+
+
+def get_bearer_token(request) -> Optional[str]:
+    """Токен из заголовка Authorization: Bearer <token>"""
+    auth_header = request.META.get("HTTP_AUTHORIZATION", "")
+    
+    if not auth_header.startswith("Bearer "):
+        return None
+    
+    return auth_header[len("Bearer "):].strip() or None
+
+
 def get_user_id_from_token(token: str) -> Optional[str]:
     """Извлечение user_id из токена"""
     payload = decode_token(token)
@@ -5,29 +5,52 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from apps.authentication.decorators import skip_authentication
+from apps.authentication.introspection import introspect_tokens
+from apps.authentication.keys import key_ring
+from apps.authentication.revocation import revocation_list
 from apps.authentication.serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
     TokenRefreshSerializer,
+    TokenIntrospectSerializer,
 )
+from apps.authentication.throttling import get_client_ip, login_throttle, retry_after_header
 from apps.authentication.utils import (
     generate_access_token,
     generate_refresh_token,
     decode_token,
+    get_bearer_token,
 )
+from apps.monitoring.metrics import login_total, refresh_total
+from apps.users.hashing import PasswordHashingBusy
 
 User = get_user_model()
 
 
+def hashing_busy_response(exc: PasswordHashingBusy) -> Response:
+    """Ответ при переполненной очереди хеширования паролей"""
+    return Response(
+        {"error": "Сервис перегружен, повторите попытку позже"},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@skip_authentication
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def register(request):
     """Регистрация нового пользователя"""
     serializer = UserRegistrationSerializer(data=request.data)
     if serializer.is_valid():
-        user = serializer.save()
-        access_token = generate_access_token(user.id)
+        try:
+            user = serializer.save()
+        except PasswordHashingBusy as exc:
+            return hashing_busy_response(exc)
+        access_token = generate_access_token(user.id, user.role_id)
         refresh_token = generate_refresh_token(user.id)
         
         return Response(
@@ -47,33 +70,60 @@ def register(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@skip_authentication
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def login(request):
     """Вход в систему"""
     serializer = UserLoginSerializer(data=request.data)
     if not serializer.is_valid():
+        login_total.inc("bad_request")
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     email = serializer.validated_data["email"]
     password = serializer.validated_data["password"]
+    client_ip = get_client_ip(request)
+    
+    # Проверка до загрузки пользователя и bcrypt: подбор паролей не тратит CPU
+    retry_after = login_throttle.check(email, client_ip)
+    if retry_after:
+        login_total.inc("throttled")
+        return Response(
+            {"error": "Слишком много попыток входа, повторите попытку позже"},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": retry_after_header(retry_after)},
+        )
     
     try:
         user = User.objects.get(email=email, is_active=True)
     except User.DoesNotExist:
+        login_throttle.record_failure(email, client_ip)
+        login_total.inc("invalid_credentials")
         return Response(
             {"error": "Неверный email или пароль"},
             status=status.HTTP_401_UNAUTHORIZED,
         )
     
-    if not user.check_password(password):
+    try:
+        password_valid = user.check_password(password)
+    except PasswordHashingBusy as exc:
+        login_total.inc("busy")
+        return hashing_busy_response(exc)
+    
+    if not password_valid:
+        login_throttle.record_failure(email, client_ip)
+        login_total.inc("invalid_credentials")
         return Response(
             {"error": "Неверный email или пароль"},
             status=status.HTTP_401_UNAUTHORIZED,
         )
     
-    access_token = generate_access_token(user.id)
+    # Хеш с устаревшим алгоритмом или стоимостью обновляется, пока известен пароль
+    user.upgrade_password(password)
+    
+    access_token = generate_access_token(user.id, user.role_id)
     refresh_token = generate_refresh_token(user.id)
+    login_total.inc("success")
     
     return Response(
         {
@@ -91,18 +141,21 @@ def login(request):
     )
 
 
+@skip_authentication
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def refresh_token_view(request):
     """Обновление access токена"""
     serializer = TokenRefreshSerializer(data=request.data)
     if not serializer.is_valid():
+        refresh_total.inc("bad_request")
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     refresh_token = serializer.validated_data["refresh_token"]
     payload = decode_token(refresh_token)
     
     if not payload or payload.get("type") != "refresh":
+        refresh_total.inc("invalid_token")
         return Response(
             {"error": "Неверный refresh токен"},
             status=status.HTTP_401_UNAUTHORIZED,
@@ -112,12 +165,14 @@ def refresh_token_view(request):
     try:
         user = User.objects.get(id=user_id, is_active=True)
     except User.DoesNotExist:
+        refresh_total.inc("user_not_found")
         return Response(
             {"error": "Пользователь не найден"},
             status=status.HTTP_401_UNAUTHORIZED,
         )
     
-    access_token = generate_access_token(user.id)
+    access_token = generate_access_token(user.id, user.role_id)
+    refresh_total.inc("success")
     
     return Response(
         {
@@ -129,11 +184,73 @@ def refresh_token_view(request):
 
 @api_view(["POST"])
 def logout(request):
-    """Выход из системы"""
-    # В простой реализации JWT logout не требует действий на сервере
-    # Токен инвалидируется на клиенте
-    # В production можно использовать blacklist токенов
+    """
+    Выход из системы: отзыв текущего access токена и переданного refresh токена.
+    С {"all": true} отзываются все токены пользователя.
+    """
+    # Текущий токен отзывается по jti и при {"all": true}: граница отзыва всех
+    # токенов - целая секунда, а он мог быть выпущен в ту же секунду
+    access_payload = decode_token(get_bearer_token(request))
+    if access_payload:
+        revocation_list.revoke(access_payload)
+    
+    if request.data.get("all"):
+        revocation_list.revoke_all_for_user(request.user.id)
+    else:
+        refresh_token = request.data.get("refresh_token")
+        refresh_payload = decode_token(refresh_token) if refresh_token else None
+        if (
+            refresh_payload
+            and refresh_payload.get("type") == "refresh"
+            and refresh_payload.get("user_id") == str(request.user.id)
+        ):
+            revocation_list.revoke(refresh_payload)
+    
     return Response(
         {"message": "Успешный выход из системы"},
         status=status.HTTP_200_OK,
     )
+
+
+@skip_authentication
+@api_view(["GET", "POST"])
+@permission_classes([AllowAny])
+def introspect(request):
+    """
+    Проверка токенов для шлюза.
+    GET проверяет токен из заголовка Authorization (200 или 401, для nginx auth_request),
+    POST принимает {"token": ...} или {"tokens": [...]}.
+    """
+    if request.method == "GET":
+        results, max_age = introspect_tokens([get_bearer_token(request) or ""])
+        result = results[0]
+        response = Response(
+            result,
+            status=status.HTTP_200_OK if result["active"] else status.HTTP_401_UNAUTHORIZED,
+        )
+        response["Vary"] = "Authorization"
+    else:
+        serializer = TokenIntrospectSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        if "token" in serializer.validated_data:
+            results, max_age = introspect_tokens([serializer.validated_data["token"]])
+            response = Response(results[0], status=status.HTTP_200_OK)
+        else:
+            results, max_age = introspect_tokens(serializer.validated_data["tokens"])
+            response = Response({"results": results}, status=status.HTTP_200_OK)
+    
+    # Ответ можно кэшировать не дольше оставшегося времени жизни токенов
+    response["Cache-Control"] = f"max-age={max_age}" if max_age else "no-store"
+    return response
+
+
+@skip_authentication
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def jwks(request):
+    """Публичные ключи подписи (JWKS) для проверки токенов другими сервисами"""
+    response = Response(key_ring.jwks(), status=status.HTTP_200_OK)
+    response["Cache-Control"] = f"public, max-age={settings.JWT_JWKS_MAX_AGE_SECONDS}"
+    return response
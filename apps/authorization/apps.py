@@ -5,3 +5,6 @@ class AuthorizationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.authorization"
     verbose_name = "Авторизация"
+
+    def ready(self):
+        from apps.authorization import signals  # noqa: F401
@@ -1,17 +1,70 @@
 """
 Management команда для загрузки тестовых данных
 """
-from django.core.management.base import BaseCommand
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from apps.authorization.matrix import permission_matrix
 from apps.authorization.models import Role, BusinessElement, AccessRoleRule
+from apps.business.models import Order, Product, Store
+from apps.users.hashing import hash_password
 
 User = get_user_model()
 
+# Распределение синтетических пользователей по ролям; остаток делится
+# поровну между синтетическими ролями (--roles)
+ROLE_WEIGHTS = {"admin": 0.001, "manager": 0.05, "user": 0.8, "guest": 0.1}
+SOFT_DELETED_SHARE = 0.03
+SYNTHETIC_PASSWORD = "password123"
+SYNTHETIC_EMAIL_DOMAIN = "@synthetic.example.com"
+SYNTHETIC_EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+SYNTHETIC_PERIOD = timedelta(days=730)
+FIRST_NAMES = ["Александр", "Мария", "Дмитрий", "Анна", "Иван", "Елена", "Сергей", "Ольга", "Андрей", "Наталья"]
+LAST_NAMES = ["Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов", "Новиков", "Федоров"]
+PATRONYMICS = ["Александрович", "Дмитриевич", "Иванович", "Сергеевич", "Андреевич", ""]
+STREETS = ["Ленина", "Мира", "Садовая", "Советская", "Пушкина", "Гагарина", "Лесная", "Школьная"]
+RULE_FLAGS = (
+    "read_permission",
+    "create_permission",
+    "update_permission",
+    "delete_permission",
+    "read_all_permission",
+    "update_all_permission",
+    "delete_all_permission",
+)
+
 
 class Command(BaseCommand):
-    help = "Загрузка тестовых данных: роли, бизнес-объекты, правила доступа, пользователи"
+    help = (
+        "Загрузка тестовых данных: роли, бизнес-объекты, правила доступа, пользователи, "
+        "товары, заказы и магазины. С --users/--roles/--elements/--objects дополнительно "
+        "генерируется синтетический набор данных заданного размера, детерминированный "
+        "при одинаковом --seed"
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=0, help="Число синтетических пользователей")
+        parser.add_argument("--roles", type=int, default=0, help="Число синтетических ролей сверх базовых")
+        parser.add_argument("--elements", type=int, default=0, help="Число синтетических бизнес-объектов сверх базовых")
+        parser.add_argument(
+            "--objects",
+            type=int,
+            default=0,
+            help="Число синтетических товаров, заказов и магазинов (каждого вида) у синтетических пользователей",
+        )
+        parser.add_argument("--seed", type=int, default=42, help="Зерно генератора случайных чисел")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Число строк в одном INSERT")
     
     def handle(self, *args, **options):
+        sizes = (options["users"], options["roles"], options["elements"], options["objects"])
+        if min(sizes) < 0 or options["batch_size"] < 1:
+            raise CommandError("Размеры набора данных не могут быть отрицательными")
+        
         self.stdout.write("Создание ролей...")
         self.create_roles()
         
@@ -24,6 +77,12 @@ class Command(BaseCommand):
         self.stdout.write("Создание тестовых пользователей...")
         self.create_test_users()
         
+        self.stdout.write("Создание товаров, заказов и магазинов...")
+        self.create_owned_objects()
+        
+        if any(sizes):
+            self.generate_synthetic_data(options)
+        
         self.stdout.write(self.style.SUCCESS("Тестовые данные успешно загружены!"))
     
     def create_roles(self):
@@ -187,5 +246,197 @@ class Command(BaseCommand):
                 self.stdout.write(f"  Создан пользователь: {user.email} (пароль: {password})")
             else:
                 self.stdout.write(f"  Пользователь уже существует: {user.email}")
+    
+    def create_owned_objects(self):
+        """Создание товаров, заказов и магазинов тестовых пользователей"""
+        owners = {
+            user.email: user
+            for user in User.objects.filter(email__in=["admin@example.com", "manager@example.com", "user@example.com"])
+        }
+        objects_data = [
+            (Product, {"name": "Товар 1", "price": 100}, "user@example.com"),
+            (Product, {"name": "Товар 2", "price": 200}, "manager@example.com"),
+            (Product, {"name": "Товар 3", "price": 300}, "admin@example.com"),
+            (Order, {"total": 500}, "user@example.com"),
+            (Order, {"total": 750}, "manager@example.com"),
+            (Order, {"total": 1000}, "admin@example.com"),
+            (Store, {"name": "Магазин 1", "address": "Адрес 1"}, "user@example.com"),
+            (Store, {"name": "Магазин 2", "address": "Адрес 2"}, "manager@example.com"),
+            (Store, {"name": "Магазин 3", "address": "Адрес 3"}, "admin@example.com"),
+        ]
+        
+        created = 0
+        for model, data, email in objects_data:
+            _, is_created = model.objects.get_or_create(owner=owners[email], **data)
+            created += is_created
+        self.stdout.write(f"  Создано объектов: {created}")
+    
+    def generate_synthetic_data(self, options):
+        """
+        Синтетический набор данных: роли, бизнес-объекты, правила, пользователи
+        и принадлежащие им товары, заказы и магазины.
+        Все значения (включая id и даты создания) выводятся из --seed, поэтому
+        повторный запуск с теми же параметрами дает те же данные и ничего не дублирует.
+        """
+        started = time.perf_counter()
+        # Отдельные генераторы, чтобы пользователи не зависели от числа правил
+        rules_rng = random.Random(f"{options['seed']}:rules")
+        users_rng = random.Random(f"{options['seed']}:users")
+        batch_size = options["batch_size"]
+        
+        roles = [
+            Role(name=f"role-{index:04d}", description=f"Синтетическая роль {index}")
+            for index in range(1, options["roles"] + 1)
+        ]
+        elements = [
+            BusinessElement(code=f"element-{index:04d}", name=f"Объект {index}")
+            for index in range(1, options["elements"] + 1)
+        ]
+        with transaction.atomic():
+            Role.objects.bulk_create(roles, batch_size=batch_size, ignore_conflicts=True)
+            BusinessElement.objects.bulk_create(elements, batch_size=batch_size, ignore_conflicts=True)
+        
+        roles = {role.name: role for role in Role.objects.all()}
+        synthetic_roles = sorted(name for name in roles if name not in ROLE_WEIGHTS)
+        elements = list(BusinessElement.objects.all())
+        
+        self.stdout.write("Генерация правил доступа...")
+        rules = []
+        for role_name in sorted(roles):
+            for element in elements:
+                if role_name in ROLE_WEIGHTS and not element.code.startswith("element-"):
+                    continue  # правила базовых ролей к базовым объектам созданы выше
+                rules.append(AccessRoleRule(
+                    role=roles[role_name],
+                    element=element,
+                    **synthetic_rule(role_name, rules_rng),
+                ))
+        with transaction.atomic():
+            AccessRoleRule.objects.bulk_create(rules, batch_size=batch_size, ignore_conflicts=True)
+        permission_matrix.invalidate()
+        self.stdout.write(f"  Ролей: {len(roles)}, объектов: {len(elements)}, правил: {len(rules)}")
+        
+        if options["users"]:
+            self.stdout.write(f"Генерация {options['users']} пользователей...")
+            role_names = list(ROLE_WEIGHTS)
+            weights = list(ROLE_WEIGHTS.values())
+            if synthetic_roles:
+                share = (1 - sum(weights)) / len(synthetic_roles)
+                role_names += synthetic_roles
+                weights += [share] * len(synthetic_roles)
+            
+            # Один хеш на весь набор: bcrypt на каждого пользователя занял бы часы
+            password = hash_password(SYNTHETIC_PASSWORD)
+            created = 0
+            for offset in range(0, options["users"], batch_size):
+                count = min(batch_size, options["users"] - offset)
+                users = [
+                    synthetic_user(offset + index, options["users"], roles, role_names, weights, password, users_rng)
+                    for index in range(count)
+                ]
+                with transaction.atomic():
+                    bulk_create_with_timestamps(User, users, ignore_conflicts=True)
+                created += count
+                self.stdout.write(f"  {created}/{options['users']}")
+            self.stdout.write(f"  Пароль синтетических пользователей: {SYNTHETIC_PASSWORD}")
+        
+        if options["objects"]:
+            self.generate_owned_objects(options)
+        
+        self.stdout.write(f"  Синтетические данные созданы за {time.perf_counter() - started:.1f} с")
+    
+    def generate_owned_objects(self, options):
+        """
+        Синтетические товары, заказы и магазины. Объект с номером i зависит
+        только от --seed и i, поэтому повторный запуск досоздает недостающие.
+        """
+        owner_ids = list(
+            User.objects.filter(email__endswith=SYNTHETIC_EMAIL_DOMAIN)
+            .order_by("email")
+            .values_list("id", flat=True)
+        )
+        if not owner_ids:
+            raise CommandError("--objects требует синтетических пользователей (--users)")
+        
+        total = options["objects"]
+        for model in (Product, Order, Store):
+            existing = model.objects.filter(owner__email__endswith=SYNTHETIC_EMAIL_DOMAIN).count()
+            self.stdout.write(f"Генерация объектов ({model._meta.verbose_name_plural.lower()}): {existing}/{total}")
+            for offset in range(existing, total, options["batch_size"]):
+                count = min(options["batch_size"], total - offset)
+                objects = [
+                    synthetic_object(model, offset + index, total, owner_ids, options["seed"])
+                    for index in range(count)
+                ]
+                with transaction.atomic():
+                    bulk_create_with_timestamps(model, objects)
+                self.stdout.write(f"  {offset + count}/{total}")
+
+
+def synthetic_rule(role_name, rng):
+    """Флаги правила: профиль базовой роли или случайный профиль синтетической"""
+    if role_name == "admin":
+        return dict.fromkeys(RULE_FLAGS, True)
+    if role_name == "guest":
+        return {**dict.fromkeys(RULE_FLAGS, False), "read_all_permission": rng.random() < 0.3}
+    own = role_name in ("manager", "user") or rng.random() < 0.8
+    return {
+        "read_permission": own,
+        "create_permission": own,
+        "update_permission": own,
+        "delete_permission": own,
+        "read_all_permission": role_name == "manager" or rng.random() < 0.3,
+        "update_all_permission": role_name not in ("manager", "user") and rng.random() < 0.1,
+        "delete_all_permission": role_name not in ("manager", "user") and rng.random() < 0.05,
+    }
+
+
+def synthetic_user(index, total, roles, role_names, weights, password, rng):
+    """Синтетический пользователь с детерминированными id, ролью и датой создания"""
+    created_at = SYNTHETIC_EPOCH + SYNTHETIC_PERIOD * (index / max(total, 1))
+    return User(
+        id=uuid.UUID(int=rng.getrandbits(128), version=4),
+        email=f"user-{index:07d}{SYNTHETIC_EMAIL_DOMAIN}",
+        password=password,
+        first_name=rng.choice(FIRST_NAMES),
+        last_name=rng.choice(LAST_NAMES),
+        patronymic=rng.choice(PATRONYMICS),
+        role=roles[rng.choices(role_names, weights)[0]],
+        is_active=rng.random() >= SOFT_DELETED_SHARE,
+        created_at=created_at,
+        updated_at=created_at,
+    )
+
+
+def synthetic_object(model, index, total, owner_ids, seed):
+    """Синтетический товар, заказ или магазин со случайным синтетическим владельцем"""
+    rng = random.Random(f"{seed}:{model._meta.model_name}:{index}")
+    created_at = SYNTHETIC_EPOCH + SYNTHETIC_PERIOD * (index / max(total, 1))
+    fields = {
+        "owner_id": owner_ids[rng.randrange(len(owner_ids))],
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+    if model is Product:
+        fields.update(name=f"Товар {index + 1:07d}", price=Decimal(rng.randrange(100, 10_000_000)) / 100)
+    elif model is Order:
+        fields.update(total=Decimal(rng.randrange(100, 100_000_000)) / 100)
+    else:
+        fields.update(
+            name=f"Магазин {index + 1:07d}",
+            address=f"ул. {rng.choice(STREETS)}, д. {rng.randint(1, 200)}",
+        )
+    return model(**fields)
 
 
+def bulk_create_with_timestamps(model, objects, **kwargs):
+    """
+    bulk_create с заданными created_at/updated_at. auto_now/auto_now_add
+    подставляют текущее время при вставке, поэтому даты записываются
+    следующим UPDATE (bulk_update их не перезаписывает)
+    """
+    timestamps = [(obj.created_at, obj.updated_at) for obj in objects]
+    model.objects.bulk_create(objects, **kwargs)
+    for obj, (created_at, updated_at) in zip(objects, timestamps):
+        obj.created_at, obj.updated_at = created_at, updated_at
+    model.objects.bulk_update(objects, ["created_at", "updated_at"])
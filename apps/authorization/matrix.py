@@ -0,0 +1,198 @@
+"""
+Скомпилированная матрица прав RBAC (кэш в памяти процесса)
+"""
+import threading
+import time
+import zlib
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+PERMISSION_FIELDS = (
+    "read_permission",
+    "read_all_permission",
+    "create_permission",
+    "update_permission",
+    "update_all_permission",
+    "delete_permission",
+    "delete_all_permission",
+)
+
+
+class RuleSnapshot(NamedTuple):
+    """Неизменяемый снимок правила доступа (AccessRoleRule)"""
+    read_permission: bool = False
+    read_all_permission: bool = False
+    create_permission: bool = False
+    update_permission: bool = False
+    update_all_permission: bool = False
+    delete_permission: bool = False
+    delete_all_permission: bool = False
+
+    def to_mask(self) -> int:
+        """Упаковка прав в битовую маску (порядок битов - PERMISSION_FIELDS)"""
+        mask = 0
+        for bit, allowed in enumerate(self):
+            if allowed:
+                mask |= 1 << bit
+        return mask
+
+    @classmethod
+    def from_mask(cls, mask: int) -> "RuleSnapshot":
+        """Распаковка прав из битовой маски"""
+        return cls(*(bool(mask & (1 << bit)) for bit in range(len(PERMISSION_FIELDS))))
+
+
+class _MatrixState(NamedTuple):
+    rules: Dict[Tuple[int, str], RuleSnapshot]
+    rules_by_role: Dict[int, Dict[str, RuleSnapshot]]
+    role_names: Dict[int, str]
+    role_versions: Dict[int, int]
+    built_at: float
+
+    def role_version(self, role_id: Optional[int]) -> int:
+        """Версия прав роли (0 - пользователь без роли или роли нет в матрице)"""
+        return self.role_versions.get(role_id, 0)
+
+
+class PermissionMatrix:
+    """
+    Матрица прав (role_id, element_code) -> RuleSnapshot.
+
+    Строится одним запросом и живет в памяти процесса до инвалидации
+    (сигналы post_save/post_delete на Role, BusinessElement, AccessRoleRule)
+    или до истечения RBAC_MATRIX_TTL_SECONDS, который ограничивает
+    устаревание в остальных воркерах.
+    """
+
+    # Как часто токен с незнакомой версией прав может вызвать перестроение матрицы (секунды)
+    version_recheck_seconds = 1.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state: Optional[_MatrixState] = None
+        self._generation = 0
+
+    def get_rule(self, role_id: int, element_code: str) -> Optional[RuleSnapshot]:
+        """Правило роли для бизнес-элемента или None, если правила нет"""
+        return self._get_state().rules.get((role_id, element_code))
+
+    def get_role_rules(self, role_id: int) -> Dict[str, RuleSnapshot]:
+        """Все правила роли в виде {element_code: RuleSnapshot}"""
+        return dict(self._get_state().rules_by_role.get(role_id, {}))
+
+    def get_role_name(self, role_id: int) -> Optional[str]:
+        """Название роли по id"""
+        return self._get_state().role_names.get(role_id)
+
+    def role_version(self, role_id: Optional[int]) -> int:
+        """
+        Версия прав роли - контрольная сумма названия и правил роли.
+        Одинакова во всех процессах при одинаковых данных в БД и меняется
+        только при изменении этой роли или ее правил.
+        """
+        return self._get_state().role_version(role_id)
+
+    def is_current(self, role_id: Optional[int], version: int) -> bool:
+        """
+        Совпадает ли версия прав из токена с текущей версией роли.
+        Токен мог выпустить воркер, уже перестроивший матрицу после изменения
+        прав, пока у этого воркера не истек RBAC_MATRIX_TTL_SECONDS: при
+        несовпадении матрица перестраивается, но не чаще раза в
+        version_recheck_seconds.
+        """
+        state = self._get_state()
+        if state.role_version(role_id) == version:
+            return True
+        if time.monotonic() - state.built_at < self.version_recheck_seconds:
+            return False
+        self._expire(state)
+        return self._get_state().role_version(role_id) == version
+
+    async def ais_current(self, role_id: Optional[int], version: int) -> bool:
+        """Асинхронный вариант is_current: перестроение матрицы выполняется в потоке"""
+        state = await self.asnapshot()
+        if state.role_version(role_id) == version:
+            return True
+        if time.monotonic() - state.built_at < self.version_recheck_seconds:
+            return False
+        return await sync_to_async(self.is_current)(role_id, version)
+
+    def snapshot(self) -> _MatrixState:
+        """Текущее состояние матрицы целиком (согласованное для нескольких обращений)"""
+        return self._get_state()
+
+    async def asnapshot(self) -> _MatrixState:
+        """Асинхронный вариант snapshot: перестроение матрицы выполняется в потоке"""
+        state = self._state
+        if state is not None and time.monotonic() - state.built_at < settings.RBAC_MATRIX_TTL_SECONDS:
+            return state
+        return await sync_to_async(self._get_state)()
+
+    def invalidate(self) -> None:
+        """Сброс матрицы, следующее обращение перестроит ее"""
+        with self._lock:
+            self._generation += 1
+            self._state = None
+
+    def _expire(self, state: _MatrixState) -> None:
+        """Сброс состояния, если его еще не заменили"""
+        with self._lock:
+            if self._state is state:
+                self._state = None
+
+    def _get_state(self) -> _MatrixState:
+        state = self._state
+        if state is not None and time.monotonic() - state.built_at < settings.RBAC_MATRIX_TTL_SECONDS:
+            return state
+
+        with self._lock:
+            state = self._state
+            if state is not None and time.monotonic() - state.built_at < settings.RBAC_MATRIX_TTL_SECONDS:
+                return state
+            generation = self._generation
+
+        state = self._build()
+
+        with self._lock:
+            # Если матрицу инвалидировали во время построения, не публикуем ее
+            if generation == self._generation:
+                self._state = state
+        return state
+
+    def _build(self) -> _MatrixState:
+        """Построение матрицы одним запросом (roles LEFT JOIN rules LEFT JOIN elements)"""
+        from apps.authorization.models import Role
+
+        rows = Role.objects.order_by().values_list(
+            "id",
+            "name",
+            "access_rules__element__code",
+            *(f"access_rules__{field}" for field in PERMISSION_FIELDS),
+        )
+
+        rules: Dict[Tuple[int, str], RuleSnapshot] = {}
+        rules_by_role: Dict[int, Dict[str, RuleSnapshot]] = {}
+        role_names: Dict[int, str] = {}
+        for role_id, role_name, element_code, *flags in rows:
+            role_names[role_id] = role_name
+            if element_code is not None:
+                rule = RuleSnapshot(*(bool(flag) for flag in flags))
+                rules[(role_id, element_code)] = rule
+                rules_by_role.setdefault(role_id, {})[element_code] = rule
+
+        role_versions = {
+            role_id: zlib.crc32(repr((role_name, sorted(rules_by_role.get(role_id, {}).items()))).encode("utf-8"))
+            for role_id, role_name in role_names.items()
+        }
+        return _MatrixState(
+            rules=rules,
+            rules_by_role=rules_by_role,
+            role_names=role_names,
+            role_versions=role_versions,
+            built_at=time.monotonic(),
+        )
+
+
+permission_matrix = PermissionMatrix()
@@ -1,94 +1,157 @@
 """
 Permission classes для системы RBAC
 """
+from functools import wraps
+from types import SimpleNamespace
 from rest_framework import permissions
 from rest_framework.request import Request
-from apps.authorization.models import BusinessElement, AccessRoleRule
+from apps.authorization.matrix import permission_matrix, RuleSnapshot
+from apps.monitoring.metrics import permission_checks_total
+from apps.monitoring.timing import phase, timed
+from typing import Dict, Iterable, List, Optional
 
 
-class HasElementPermission(permissions.BasePermission):
+def get_user_rule(user, element_code: str) -> Optional[RuleSnapshot]:
+    """Правило доступа роли пользователя к бизнес-элементу (из матрицы прав)"""
+    if not user or not user.is_authenticated:
+        return None
+    
+    if not user.role_id:
+        return None
+    
+    # Stateless токен: права уже лежат в claims в виде битовых масок
+    permission_masks = getattr(user, "permission_masks", None)
+    if permission_masks is not None:
+        mask = permission_masks.get(element_code)
+        return RuleSnapshot.from_mask(mask) if mask is not None else None
+    
+    return permission_matrix.get_rule(user.role_id, element_code)
+
+
+class AuthorizationContext:
     """
-    Permission class для проверки доступа к бизнес-элементам
+    Права пользователя в рамках одного запроса (request.authz).
+    Правило роли к каждому бизнес-элементу вычисляется один раз и
+    переиспользуется всеми проверками прав и фильтром по владельцу.
     """
     
-    def __init__(self, element_code: str, action: str):
-        """
-        :param element_code: Код бизнес-элемента (например, 'products', 'orders')
-        :param action: Действие ('read', 'create', 'update', 'delete')
-        """
-        self.element_code = element_code
-        self.action = action
+    def __init__(self, user):
+        self.user = user
+        self._rules: Dict[str, Optional[RuleSnapshot]] = {}
     
-    def has_permission(self, request: Request, view) -> bool:
-        """Проверка прав доступа на уровне запроса"""
-        if not request.user or not request.user.is_authenticated:
-            return False
-        
-        if not request.user.role:
-            return False
-        
+    def rule(self, element_code: str) -> Optional[RuleSnapshot]:
         try:
-            element = BusinessElement.objects.get(code=self.element_code)
-        except BusinessElement.DoesNotExist:
-            return False
-        
-        try:
-            rule = AccessRoleRule.objects.get(role=request.user.role, element=element)
-        except AccessRoleRule.DoesNotExist:
+            return self._rules[element_code]
+        except KeyError:
+            rule = self._rules[element_code] = get_user_rule(self.user, element_code)
+            return rule
+    
+    def is_owner(self, obj) -> bool:
+        owner_id = getattr(obj, "owner_id", None)
+        return owner_id is not None and str(owner_id) == str(self.user.id)
+    
+    def has_permission(self, element_code: str, action: str) -> bool:
+        """Проверка прав доступа на уровне запроса"""
+        rule = self.rule(element_code)
+        if rule is None:
             return False
         
         # Для чтения проверяем read_permission или read_all_permission
-        if self.action == "read":
+        if action == "read":
             return rule.read_permission or rule.read_all_permission
         
         # Для создания проверяем create_permission
-        if self.action == "create":
+        if action == "create":
             return rule.create_permission
         
         # Для обновления и удаления проверка будет в has_object_permission
-        if self.action in ["update", "delete"]:
+        if action in ["update", "delete"]:
             return rule.update_permission or rule.update_all_permission or \
                    rule.delete_permission or rule.delete_all_permission
         
         return False
     
-    def has_object_permission(self, request: Request, view, obj) -> bool:
+    def has_object_permission(self, element_code: str, action: str, obj) -> bool:
         """Проверка прав доступа на уровне объекта"""
-        if not request.user or not request.user.is_authenticated:
-            return False
-        
-        if not request.user.role:
-            return False
-        
-        try:
-            element = BusinessElement.objects.get(code=self.element_code)
-        except BusinessElement.DoesNotExist:
-            return False
-        
-        try:
-            rule = AccessRoleRule.objects.get(role=request.user.role, element=element)
-        except AccessRoleRule.DoesNotExist:
+        rule = self.rule(element_code)
+        if rule is None:
             return False
         
         # Проверяем, является ли пользователь владельцем объекта
-        is_owner = hasattr(obj, "owner_id") and obj.owner_id == request.user.id
+        is_owner = self.is_owner(obj)
         
-        if self.action == "read":
+        if action == "read":
             if is_owner:
                 return rule.read_permission or rule.read_all_permission
             return rule.read_all_permission
         
-        if self.action == "update":
+        if action == "update":
             if is_owner:
                 return rule.update_permission or rule.update_all_permission
             return rule.update_all_permission
         
-        if self.action == "delete":
+        if action == "delete":
             if is_owner:
                 return rule.delete_permission or rule.delete_all_permission
             return rule.delete_all_permission
         
         return False
+    
+    def filter_readable(self, queryset, element_code: str):
+        """Без права на чтение всех объектов остаются только свои (фильтр в SQL)"""
+        rule = self.rule(element_code)
+        if rule and not rule.read_all_permission and rule.read_permission:
+            return queryset.filter(owner_id=self.user.id)
+        return queryset
+
+
+def get_authorization(request) -> AuthorizationContext:
+    """
+    Контекст прав запроса: создается при первом обращении и хранится в
+    request.authz исходного HttpRequest, поэтому общий для view и permission
+    классов DRF.
+    """
+    http_request = getattr(request, "_request", request)
+    authz = getattr(http_request, "authz", None)
+    if authz is None:
+        authz = http_request.authz = AuthorizationContext(request.user)
+    return authz
+
+
+def counted(check):
+    """Декоратор проверки HasElementPermission: результат учитывается в метрике"""
+    @wraps(check)
+    def wrapper(self, *args):
+        allowed = check(self, *args)
+        permission_checks_total.inc(self.element_code, self.action, "allowed" if allowed else "denied")
+        return allowed
+    return wrapper
+
+
+class HasElementPermission(permissions.BasePermission):
+    """
+    Permission class для проверки доступа к бизнес-элементам
+    """
+    
+    def __init__(self, element_code: str, action: str):
+        """
+        :param element_code: Код бизнес-элемента (например, 'products', 'orders')
+        :param action: Действие ('read', 'create', 'update', 'delete')
+        """
+        self.element_code = element_code
+        self.action = action
+    
+    @timed("perm")
+    @counted
+    def has_permission(self, request: Request, view) -> bool:
+        """Проверка прав доступа на уровне запроса"""
+        return get_authorization(request).has_permission(self.element_code, self.action)
+    
+    @timed("perm")
+    @counted
+    def has_object_permission(self, request: Request, view, obj) -> bool:
+        """Проверка прав доступа на уровне объекта"""
+        return get_authorization(request).has_object_permission(self.element_code, self.action, obj)
 
 
 def get_element_permission(element_code: str, action: str):
@@ -100,12 +163,41 @@ def get_element_permission(element_code: str, action: str):
     )(element_code, action)
 
 
+def authorize_many(request: Request, checks: Iterable[Dict]) -> List[bool]:
+    """
+    Проверка набора (element_code, action, owner_id) для пользователя запроса.
+    Каждая проверка повторяет HasElementPermission: has_permission, а при
+    переданном owner_id (кроме create) еще и has_object_permission.
+    Правила берутся из матрицы прав в памяти, запросов к БД нет.
+    """
+    with phase("perm"):
+        return _authorize_many(request, checks)
+
+
+def _authorize_many(request: Request, checks: Iterable[Dict]) -> List[bool]:
+    permissions_by_check = {}
+    results = []
+    for check in checks:
+        key = (check["element_code"], check["action"])
+        permission = permissions_by_check.get(key)
+        if permission is None:
+            permission = permissions_by_check[key] = HasElementPermission(*key)
+        
+        allowed = permission.has_permission(request, None)
+        owner_id = check.get("owner_id")
+        if allowed and owner_id is not None and permission.action != "create":
+            allowed = permission.has_object_permission(request, None, SimpleNamespace(owner_id=owner_id))
+        results.append(allowed)
+    return results
+
+
 class IsAdmin(permissions.BasePermission):
     """Проверка, является ли пользователь администратором"""
     
+    @timed("perm")
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
-        return request.user.role and request.user.role.name == "admin"
+        return permission_matrix.get_role_name(request.user.role_id) == "admin"
 
 
@@ -2,10 +2,12 @@
 Сериализаторы для авторизации
 """
 from rest_framework import serializers
+from django.conf import settings
 from apps.authorization.models import Role, BusinessElement, AccessRoleRule
+from apps.monitoring.timing import TimedSerializerMixin
 
 
-class RoleSerializer(serializers.ModelSerializer):
+class RoleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для ролей"""
     
     class Meta:
@@ -14,7 +16,7 @@ class RoleSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at"]
 
 
-class BusinessElementSerializer(serializers.ModelSerializer):
+class BusinessElementSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для бизнес-объектов"""
     
     class Meta:
@@ -23,7 +25,7 @@ class BusinessElementSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at"]
 
 
-class AccessRoleRuleSerializer(serializers.ModelSerializer):
+class AccessRoleRuleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для правил доступа"""
     role_name = serializers.CharField(source="role.name", read_only=True)
     element_code = serializers.CharField(source="element.code", read_only=True)
@@ -51,7 +53,7 @@ class AccessRoleRuleSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at"]
 
 
-class AccessRoleRuleCreateSerializer(serializers.ModelSerializer):
+class AccessRoleRuleCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для создания правил доступа"""
     
     class Meta:
@@ -69,3 +71,21 @@ class AccessRoleRuleCreateSerializer(serializers.ModelSerializer):
         ]
 
 
+class AuthorizationCheckSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Одна проверка доступа: бизнес-элемент, действие и владелец объекта"""
+    element_code = serializers.CharField(max_length=50)
+    action = serializers.ChoiceField(choices=["read", "create", "update", "delete"])
+    owner_id = serializers.CharField(required=False, allow_null=True)
+
+
+class AuthorizationBatchSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Набор проверок доступа для одного запроса"""
+    checks = AuthorizationCheckSerializer(many=True, allow_empty=False)
+    
+    def validate_checks(self, checks):
+        """Ограничение размера пакета"""
+        if len(checks) > settings.RBAC_AUTHORIZE_MAX_CHECKS:
+            raise serializers.ValidationError(
+                f"Не больше {settings.RBAC_AUTHORIZE_MAX_CHECKS} проверок за запрос"
+            )
+        return checks
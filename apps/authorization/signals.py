@@ -0,0 +1,21 @@
+"""
+Сигналы для инвалидации матрицы прав
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.authorization.models import Role, BusinessElement, AccessRoleRule
+from apps.authorization.matrix import permission_matrix
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=BusinessElement)
+@receiver(post_delete, sender=BusinessElement)
+@receiver(post_save, sender=AccessRoleRule)
+@receiver(post_delete, sender=AccessRoleRule)
+def invalidate_permission_matrix(sender, **kwargs):
+    """Сброс матрицы прав при изменении ролей, элементов или правил"""
+    permission_matrix.invalidate()
+    # Повторно после коммита, чтобы не закэшировать незакоммиченное состояние
+    transaction.on_commit(permission_matrix.invalidate)
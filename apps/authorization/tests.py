@@ -1,3 +1,164 @@
-from django.test import TestCase
+import io
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+from apps.authorization.management.commands.load_test_data import SYNTHETIC_EMAIL_DOMAIN, SYNTHETIC_EPOCH
+from apps.authorization.matrix import permission_matrix
+from apps.authorization.models import AccessRoleRule, BusinessElement, Role
+from apps.business.models import Order, Product, Store
+from tests import query_budget
+from tests.query_budget import Endpoint
+from tests.support import api_request, load_test_users
 
-# Create your tests here.
+User = get_user_model()
+
+
+class AdminQueryBudgetTests(query_budget.QueryBudgetTestCase):
+    """Бюджеты SQL запросов endpoints /api/admin/"""
+    endpoints = [
+        Endpoint("GET", "/api/admin/roles/", 3),
+        Endpoint("GET", "/api/admin/roles/{role_id}/", 2),
+        Endpoint("POST", "/api/admin/roles/", 3, {"name": "role-{n}"}),
+        Endpoint("GET", "/api/admin/elements/", 3),
+        Endpoint("GET", "/api/admin/rules/", 2),
+        Endpoint("GET", "/api/admin/rules/{rule_id}/", 2),
+        Endpoint("PATCH", "/api/admin/rules/{rule_id}/", 3, {"read_all_permission": True}),
+        Endpoint("PATCH", "/api/admin/users/{other_user_id}/assign_role/", 4, {"role_id": "{other_role_id}"}),
+        Endpoint("GET", "/api/admin/profiles/", 1),
+    ]
+
+
+@override_settings(RBAC_AUTHORIZE_MAX_CHECKS=3)
+class AuthorizeTests(APITestCase):
+    """Пакетная проверка прав POST /api/users/me/authorize/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = load_test_users()
+
+    def setUp(self):
+        permission_matrix.invalidate()
+        self.addCleanup(permission_matrix.invalidate)
+
+    def authorize(self, role, checks):
+        return api_request(self.client, self.users.get(role), "POST", "/api/users/me/authorize/", {"checks": checks})
+
+    def assertResults(self, role, checks, expected):
+        response = self.authorize(role, checks)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {"results": expected})
+
+    def test_results_per_check(self):
+        own_id = str(self.users["user"].id)
+        other_id = str(self.users["manager"].id)
+        self.assertResults("user", [
+            {"element_code": "products", "action": "read"},
+            {"element_code": "products", "action": "update", "owner_id": own_id},
+            {"element_code": "products", "action": "update", "owner_id": other_id},
+        ], [True, True, False])
+        self.assertResults("user", [
+            {"element_code": "orders", "action": "delete", "owner_id": other_id},
+            {"element_code": "orders", "action": "create", "owner_id": other_id},
+            {"element_code": "orders", "action": "read", "owner_id": None},
+        ], [False, True, True])
+        self.assertResults("manager", [
+            {"element_code": "products", "action": "read", "owner_id": own_id},
+            {"element_code": "products", "action": "update", "owner_id": own_id},
+            {"element_code": "products", "action": "delete", "owner_id": other_id},
+        ], [True, False, True])
+        self.assertResults("guest", [
+            {"element_code": "products", "action": "read"},
+            {"element_code": "orders", "action": "read"},
+            {"element_code": "stores", "action": "create"},
+        ], [True, False, False])
+
+    def test_unknown_element_denied(self):
+        self.assertResults("admin", [
+            {"element_code": "unknown", "action": "read"},
+            {"element_code": "products", "action": "read"},
+        ], [False, True])
+
+    def test_invalid_requests(self):
+        check = {"element_code": "products", "action": "read"}
+        for checks in ([check] * 4, [], [{"element_code": "products", "action": "approve"}], [{"action": "read"}]):
+            with self.subTest(checks=checks):
+                self.assertEqual(self.authorize("user", checks).status_code, 400)
+        self.assertResults("user", [check] * 3, [True] * 3)
+
+    def test_requires_authentication(self):
+        response = self.authorize(None, [{"element_code": "products", "action": "read"}])
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(PASSWORD_BCRYPT_ROUNDS=4, PASSWORD_HASHING_EXECUTOR="inline")
+class SyntheticDataTests(TestCase):
+    """Синтетический набор load_test_data: детерминированность и повторный запуск"""
+
+    options = {"users": 30, "roles": 3, "elements": 2, "objects": 12, "batch_size": 7}
+
+    def load(self, **options):
+        call_command("load_test_data", stdout=io.StringIO(), **{**self.options, **options})
+
+    def snapshot(self):
+        users = list(
+            User.objects.filter(email__endswith=SYNTHETIC_EMAIL_DOMAIN).order_by("email").values_list(
+                "id", "email", "first_name", "role__name", "is_active", "created_at", "updated_at",
+            )
+        )
+        objects = {
+            model._meta.model_name: list(
+                model.objects.order_by("created_at", "owner__email")
+                .filter(owner__email__endswith=SYNTHETIC_EMAIL_DOMAIN)
+                .values_list("owner__email", "created_at", "updated_at")
+            )
+            for model in (Product, Order, Store)
+        }
+        rules = list(
+            AccessRoleRule.objects.order_by("role__name", "element__code")
+            .values_list("role__name", "element__code", "read_all_permission", "update_all_permission")
+        )
+        return users, objects, rules
+
+    def test_second_run_changes_nothing(self):
+        self.load()
+        first = self.snapshot()
+        self.assertEqual(len(first[0]), 30)
+        self.assertEqual([len(objects) for objects in first[1].values()], [12, 12, 12])
+
+        self.load()
+        self.assertEqual(self.snapshot(), first)
+
+    def test_same_seed_gives_same_data(self):
+        self.load()
+        first = self.snapshot()
+        self.assertEqual(first[0][0][5], SYNTHETIC_EPOCH)
+        self.assertEqual(first[0][0][5], first[0][0][6])
+
+        User.objects.filter(email__endswith=SYNTHETIC_EMAIL_DOMAIN).delete()
+        for model in (Product, Order, Store):
+            model.objects.filter(owner__isnull=True).delete()
+        AccessRoleRule.objects.all().delete()
+        Role.objects.filter(name__startswith="role-").delete()
+        BusinessElement.objects.filter(code__startswith="element-").delete()
+
+        self.load()
+        self.assertEqual(self.snapshot(), first)
+
+    def test_model_fields_not_patched_during_load(self):
+        # auto_now/auto_now_add общие для процесса: их отключение затронуло бы чужие save()
+        bulk_create = QuerySet.bulk_create
+        flags = []
+
+        def recording_bulk_create(queryset, objs, *args, **kwargs):
+            fields = queryset.model._meta
+            if fields.model in (User, Product):
+                flags.append((fields.get_field("created_at").auto_now_add, fields.get_field("updated_at").auto_now))
+            return bulk_create(queryset, objs, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, "bulk_create", recording_bulk_create):
+            self.load()
+        self.assertTrue(flags)
+        self.assertTrue(all(created and updated for created, updated in flags))
@@ -10,6 +10,7 @@ router.register(r"roles", views.RoleViewSet, basename="role")
 router.register(r"elements", views.BusinessElementViewSet, basename="element")
 router.register(r"rules", views.AccessRoleRuleViewSet, basename="rule")
 router.register(r"users", views.UserRoleViewSet, basename="user-role")
+router.register(r"profiles", views.ProfileViewSet, basename="profile")
 
 urlpatterns = [
     path("", include(router.urls)),
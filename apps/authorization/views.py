@@ -1,11 +1,14 @@
 """
 Views для управления авторизацией (Admin API)
 """
+import os
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth import get_user_model
+from django.http import FileResponse
+from apps.authentication.revocation import revocation_list
 from apps.authorization.models import Role, BusinessElement, AccessRoleRule
 from apps.authorization.permissions import IsAdmin
 from apps.authorization.serializers import (
@@ -14,6 +17,8 @@ from apps.authorization.serializers import (
     AccessRoleRuleSerializer,
     AccessRoleRuleCreateSerializer,
 )
+from apps.monitoring import profiling
+from config.pagination import KeysetPagination
 
 User = get_user_model()
 
@@ -36,6 +41,7 @@ class AccessRoleRuleViewSet(viewsets.ModelViewSet):
     """ViewSet для управления правилами доступа"""
     queryset = AccessRoleRule.objects.select_related("role", "element").all()
     permission_classes = [IsAuthenticated, IsAdmin]
+    pagination_class = KeysetPagination
     
     def get_serializer_class(self):
         if self.action == "create":
@@ -43,8 +49,12 @@ class AccessRoleRuleViewSet(viewsets.ModelViewSet):
         return AccessRoleRuleSerializer
     
     def list(self, request, *args, **kwargs):
-        """Список правил доступа с фильтрацией"""
-        queryset = self.filter_queryset(self.get_queryset())
+        """Список правил доступа с фильтрацией и курсорной пагинацией"""
+        # Из роли и элемента нужны только поля AccessRoleRuleSerializer
+        queryset = self.filter_queryset(self.get_queryset()).defer(
+            "role__description", "role__created_at", "role__updated_at",
+            "element__description", "element__created_at", "element__updated_at",
+        )
         
         # Фильтрация по роли
         role_id = request.query_params.get("role_id")
@@ -56,8 +66,9 @@ class AccessRoleRuleViewSet(viewsets.ModelViewSet):
         if element_id:
             queryset = queryset.filter(element_id=element_id)
         
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.paginator.get_paginated_response(serializer.data, key="rules")
 
 
 class UserRoleViewSet(viewsets.ViewSet):
@@ -90,9 +101,56 @@ class UserRoleViewSet(viewsets.ViewSet):
                 status=status.HTTP_404_NOT_FOUND,
             )
         
+        role_changed = user.role_id != role.id
         user.role = role
         user.save()
+        if role_changed:
+            # Stateless access токены несут role_id и права прежней роли,
+            # поэтому все выпущенные токены пользователя отзываются
+            revocation_list.revoke_all_for_user(user.id)
         
         from apps.users.serializers import UserSerializer
         serializer = UserSerializer(user)
         return Response(serializer.data)
+
+
+class ProfileViewSet(viewsets.ViewSet):
+    """
+    ViewSet для профилей запросов, снятых ProfilingMiddleware (заголовок X-Profile)
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    lookup_value_regex = profiling.PROFILE_ID_RE.pattern
+    
+    def list(self, request):
+        """Список профилей, новые первыми"""
+        return Response(profiling.list_profiles())
+    
+    def retrieve(self, request, pk=None):
+        """Описание профиля: запрос, длительность и доступные артефакты"""
+        profile = profiling.get_profile(pk)
+        if profile is None:
+            return Response(
+                {"error": "Профиль не найден"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(profile)
+    
+    def destroy(self, request, pk=None):
+        """Удаление профиля вместе с артефактами"""
+        if not profiling.delete_profile(pk):
+            return Response(
+                {"error": "Профиль не найден"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=True, methods=["get"], url_path=r"download/(?P<kind>[a-z]+)")
+    def download(self, request, pk=None, kind=None):
+        """Скачивание артефакта: pstats, collapsed или memory"""
+        path = profiling.artifact_path(pk, kind)
+        if path is None:
+            return Response(
+                {"error": "Артефакт не найден"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return FileResponse(open(path, "rb"), as_attachment=True, filename=os.path.basename(path))
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-17 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='order',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name': 'Заказ', 'verbose_name_plural': 'Заказы'},
+        ),
+        migrations.AlterModelOptions(
+            name='product',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name': 'Товар', 'verbose_name_plural': 'Товары'},
+        ),
+        migrations.AlterModelOptions(
+            name='store',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name': 'Магазин', 'verbose_name_plural': 'Магазины'},
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_owner_id_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_owner_id_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='store',
+            name='store_owner_id_idx',
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['owner', 'created_at', 'id'], name='order_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at', 'id'], name='order_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['owner', 'created_at', 'id'], name='product_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['created_at', 'id'], name='product_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='store',
+            index=models.Index(fields=['owner', 'created_at', 'id'], name='store_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='store',
+            index=models.Index(fields=['created_at', 'id'], name='store_created_idx'),
+        ),
+    ]
@@ -1,3 +1,79 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class OwnedObject(models.Model):
+    """
+    Бизнес-объект с владельцем. Списки упорядочены по (created_at, id) от новых
+    к старым (KeysetPagination). Отдельный индекс по owner_id не создается:
+    составной индекс (owner_id, created_at, id) наследников покрывает и поиск
+    по владельцу, и страницы своих объектов, а (created_at, id) - страницы всех.
+    """
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False,
+        verbose_name="Владелец"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        abstract = True
+        ordering = ["-created_at", "-id"]
+
+
+class Product(OwnedObject):
+    """Товар"""
+    name = models.CharField(max_length=200, default="Новый товар", verbose_name="Название")
+    price = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Цена")
+
+    class Meta(OwnedObject.Meta):
+        verbose_name = "Товар"
+        verbose_name_plural = "Товары"
+        indexes = [
+            models.Index(fields=["owner", "created_at", "id"], name="product_owner_created_idx"),
+            models.Index(fields=["created_at", "id"], name="product_created_idx"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class Order(OwnedObject):
+    """Заказ"""
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Сумма")
+
+    class Meta(OwnedObject.Meta):
+        verbose_name = "Заказ"
+        verbose_name_plural = "Заказы"
+        indexes = [
+            models.Index(fields=["owner", "created_at", "id"], name="order_owner_created_idx"),
+            models.Index(fields=["created_at", "id"], name="order_created_idx"),
+        ]
+
+    def __str__(self):
+        return self.order_number
+
+    @property
+    def order_number(self):
+        """Номер заказа выводится из id и не хранится отдельно"""
+        return f"ORD-{self.id:03d}"
+
+
+class Store(OwnedObject):
+    """Магазин"""
+    name = models.CharField(max_length=200, default="Новый магазин", verbose_name="Название")
+    address = models.CharField(max_length=500, blank=True, verbose_name="Адрес")
+
+    class Meta(OwnedObject.Meta):
+        verbose_name = "Магазин"
+        verbose_name_plural = "Магазины"
+        indexes = [
+            models.Index(fields=["owner", "created_at", "id"], name="store_owner_created_idx"),
+            models.Index(fields=["created_at", "id"], name="store_created_idx"),
+        ]
+
+    def __str__(self):
+        return self.name
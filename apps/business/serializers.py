@@ -0,0 +1,35 @@
+"""
+Сериализаторы для бизнес-объектов
+"""
+from rest_framework import serializers
+from apps.business.models import Order, Product, Store
+from apps.monitoring.timing import TimedSerializerMixin
+
+
+class ProductSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Сериализатор товара"""
+    price = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0, coerce_to_string=False, required=False)
+    
+    class Meta:
+        model = Product
+        fields = ["id", "name", "price", "owner_id"]
+        read_only_fields = ["id"]
+
+
+class OrderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Сериализатор заказа"""
+    total = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0, coerce_to_string=False, required=False)
+    
+    class Meta:
+        model = Order
+        fields = ["id", "order_number", "total", "owner_id"]
+        read_only_fields = ["id"]
+
+
+class StoreSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Сериализатор магазина"""
+    
+    class Meta:
+        model = Store
+        fields = ["id", "name", "address", "owner_id"]
+        read_only_fields = ["id"]
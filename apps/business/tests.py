@@ -1,3 +1,114 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
+from rest_framework.test import APITestCase
+from apps.authorization import permissions
+from apps.business.models import Product
+from tests import query_budget
+from tests.query_budget import Endpoint
+from tests.support import api_request, load_test_users
 
-# Create your tests here.
+
+class BusinessQueryBudgetTests(query_budget.QueryBudgetTestCase):
+    """Бюджеты SQL запросов endpoints /api/ (бизнес-объекты)"""
+    endpoints = [
+        Endpoint("GET", "/api/products/", 2),
+        Endpoint("GET", "/api/products/?limit=5", 2),
+        Endpoint("GET", "/api/products/{product_id}/", 2),
+        Endpoint("POST", "/api/products/", 2, {"name": "product-{n}", "price": "10.50"}),
+        Endpoint("GET", "/api/orders/", 2),
+        Endpoint("GET", "/api/orders/{order_id}/", 2),
+        Endpoint("GET", "/api/stores/", 2),
+        Endpoint("GET", "/api/stores/{store_id}/", 2),
+    ]
+
+
+class OwnedObjectsTests(APITestCase):
+    """Товары хранятся в БД, список своих объектов фильтруется по владельцу"""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = load_test_users()
+        cls.user, cls.manager = users["user"], users["manager"]
+
+    def test_owner_scoped_listing(self):
+        response = api_request(self.client, self.user, "POST", "/api/products/", {"name": "Мой товар", "price": 99.9})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["owner_id"], str(self.user.id))
+        self.assertEqual(Product.objects.get(pk=response.json()["id"]).price, Decimal("99.90"))
+
+        own = api_request(self.client, self.user, "GET", "/api/products/").json()["products"]
+        self.assertEqual({item["owner_id"] for item in own}, {str(self.user.id)})
+        self.assertEqual(len(own), Product.objects.filter(owner=self.user).count())
+
+        everything = api_request(self.client, self.manager, "GET", "/api/products/").json()["products"]
+        self.assertEqual(len(everything), Product.objects.count())
+
+    def test_foreign_object_permissions(self):
+        foreign = Product.objects.filter(owner=self.manager).first()
+        path = f"/api/products/{foreign.id}/"
+        self.assertEqual(api_request(self.client, self.user, "GET", path).status_code, 403)
+        self.assertEqual(api_request(self.client, self.user, "PATCH", path, {"price": 1}).status_code, 403)
+
+        response = api_request(self.client, self.manager, "PATCH", path, {"name": "Новое имя", "owner_id": str(self.user.id)})
+        self.assertEqual(response.status_code, 200)
+        foreign.refresh_from_db()
+        self.assertEqual((foreign.name, foreign.owner_id), ("Новое имя", self.manager.id))
+
+        self.assertEqual(api_request(self.client, self.manager, "DELETE", path).status_code, 204)
+        missing = api_request(self.client, self.manager, "GET", path)
+        self.assertEqual((missing.status_code, missing.json()), (404, {"error": "Товар не найден"}))
+
+    def test_rule_resolved_once_per_request(self):
+        own = Product.objects.filter(owner=self.user).first()
+        foreign = Product.objects.filter(owner=self.manager).first()
+        with mock.patch.object(permissions, "get_user_rule", wraps=permissions.get_user_rule) as get_user_rule:
+            response = api_request(self.client, self.user, "PATCH", f"/api/products/{own.id}/", {"price": 5})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(get_user_rule.call_count, 1)
+
+            response = api_request(self.client, self.user, "DELETE", f"/api/products/{foreign.id}/")
+            self.assertEqual(response.json(), {"error": "Нет прав на удаление этого товара"})
+            self.assertEqual(get_user_rule.call_count, 2)
+
+
+class KeysetPaginationTests(APITestCase):
+    """Курсорная пагинация списков с учетом фильтра по владельцу"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = load_test_users()
+        owners = [cls.users["user"], cls.users["manager"]]
+        Product.objects.bulk_create([
+            Product(name=f"product-{index}", owner=owners[index % 2]) for index in range(30)
+        ])
+
+    def walk(self, user, url):
+        pages = []
+        while url:
+            body = api_request(self.client, user, "GET", url).json()
+            pages.append(body)
+            url = body["next"]
+        return pages
+
+    def test_pages_cover_owner_scoped_list(self):
+        user = self.users["user"]
+        pages = self.walk(user, "/api/products/?limit=4")
+        ids = [item["id"] for page in pages for item in page["products"]]
+        expected = list(
+            Product.objects.filter(owner=user).order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(ids, expected)
+        self.assertTrue(all(len(page["products"]) == 4 for page in pages[:-1]))
+        self.assertIsNone(pages[0]["previous"])
+
+        second = api_request(self.client, user, "GET", pages[1]["next"]).json()
+        previous = api_request(self.client, user, "GET", second["previous"]).json()
+        self.assertEqual(previous["products"], pages[1]["products"])
+
+    def test_limit_and_invalid_cursor(self):
+        admin = self.users["admin"]
+        self.assertEqual(len(api_request(self.client, admin, "GET", "/api/products/?limit=1000").json()["products"]), 33)
+        self.assertEqual(len(api_request(self.client, admin, "GET", "/api/products/?limit=0").json()["products"]), 20)
+        response = api_request(self.client, admin, "GET", "/api/products/?cursor=garbage")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"error": "Некорректный курсор"})
@@ -1,18 +1,17 @@
 """
 URLs для бизнес-объектов
 """
-from django.urls import path
+from django.urls import path, include
+from rest_framework.routers import SimpleRouter
 from apps.business import views
 
 app_name = "business"
 
+router = SimpleRouter()
+router.register(r"products", views.ProductViewSet, basename="product")
+router.register(r"orders", views.OrderViewSet, basename="order")
+router.register(r"stores", views.StoreViewSet, basename="store")
+
 urlpatterns = [
-    path("products/", views.products_list, name="products-list"),
-    path("products/<int:pk>/", views.product_detail, name="product-detail"),
-    path("orders/", views.orders_list, name="orders-list"),
-    path("orders/<int:pk>/", views.order_detail, name="order-detail"),
-    path("stores/", views.stores_list, name="stores-list"),
-    path("stores/<int:pk>/", views.store_detail, name="store-detail"),
+    path("", include(router.urls)),
 ]
-
-
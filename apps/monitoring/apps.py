@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.monitoring"
+    verbose_name = "Мониторинг"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from apps.monitoring.metrics import collect_process_stats, registry
+        from apps.monitoring.timing import install_query_recorder
+
+        connection_created.connect(install_query_recorder)
+        registry.register_collector(collect_process_stats)
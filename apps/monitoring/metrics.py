@@ -0,0 +1,400 @@
+"""
+Реестр метрик (счетчики и гистограммы с фиксированными интервалами) в формате Prometheus.
+
+Запись - обновление словаря под блокировкой метрики, без форматирования и
+ввода-вывода. В режиме нескольких процессов (METRICS_MULTIPROC_DIR) каждый
+воркер раз в METRICS_FLUSH_SECONDS и при завершении сохраняет снимок своих
+значений в отдельный файл, а endpoint /metrics суммирует файлы всех воркеров
+и текущие значения обслуживающего процесса. Снимки завершившихся воркеров
+сводятся в один файл, чтобы счетчики не уменьшались, а при новом запуске
+сервиса (нет ни одного живого процесса) каталог очищается.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from django.conf import settings
+
+# Сумма снимков завершившихся воркеров текущего запуска сервиса
+DEAD_SNAPSHOT = "metrics-dead.json"
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values = {}
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            values = [[list(labels), self._copy(value)] for labels, value in self._values.items()]
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "values": values,
+        }
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+
+class Counter(Metric):
+    """Монотонный счетчик; значения меток передаются позиционно: counter.inc("success")"""
+
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными верхними границами интервалов (le)"""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Счетчики интервалов (последний - +Inf) и сумма наблюдений
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def snapshot(self) -> Dict:
+        data = super().snapshot()
+        data["buckets"] = list(self.buckets)
+        return data
+
+    @staticmethod
+    def _copy(value):
+        return list(value)
+
+
+class MetricsRegistry:
+    """Метрики процесса и их экспорт (с суммированием по воркерам в METRICS_MULTIPROC_DIR)"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, Dict[str, str], float]]]] = []
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._file: Optional[str] = None
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector) -> None:
+        """
+        Источник значений текущего процесса (gauge), вызываемый при экспорте.
+        collector() возвращает кортежи (name, help, labels, value).
+        """
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def reset(self) -> None:
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def start(self) -> None:
+        """
+        Включение режима нескольких процессов: периодическое сохранение снимка.
+        Вызывается из точек входа сервера (config/wsgi.py, config/asgi.py), поэтому
+        команды manage.py снимков не пишут. В дочерних процессах после fork значения сбрасываются (они учтены в файле
+        родителя), а сохранение запускается заново в новый файл.
+        """
+        if not settings.METRICS_ENABLED or not settings.METRICS_MULTIPROC_DIR or self._flusher is not None:
+            return
+        os.makedirs(settings.METRICS_MULTIPROC_DIR, exist_ok=True)
+        self._start_flusher()
+        atexit.register(self.flush)
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def flush(self) -> None:
+        """Сохранение снимка текущего процесса (атомарная замена файла)"""
+        if self._file is None:
+            return
+        snapshot = self.snapshot()
+        if not any(metric["values"] for metric in snapshot.values()):
+            return
+        write_snapshot(self._file, snapshot)
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        merged = self.snapshot()
+        if self._file is not None:
+            # Разделяемая блокировка: снимки не сводятся в DEAD_SNAPSHOT во время чтения
+            with snapshot_dir_lock(fcntl.LOCK_SH):
+                for path in snapshot_files():
+                    if path == self._file:
+                        continue
+                    snapshot = read_snapshot(path)
+                    if snapshot is not None:
+                        merge_snapshot(merged, snapshot)
+
+        lines = []
+        for name, metric in sorted(merged.items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for labels, value in sorted(metric["values"], key=lambda item: item[0]):
+                pairs = list(zip(metric["labelnames"], labels))
+                if metric["type"] == "histogram":
+                    cumulative = 0
+                    for bound, count in zip(metric["buckets"] + ["+Inf"], value[:-1]):
+                        cumulative += count
+                        le = bound if bound == "+Inf" else format_value(bound)
+                        lines.append(f"{name}_bucket{format_labels(pairs + [('le', le)])} {cumulative}")
+                    lines.append(f"{name}_sum{format_labels(pairs)} {format_value(value[-1])}")
+                    lines.append(f"{name}_count{format_labels(pairs)} {cumulative}")
+                else:
+                    lines.append(f"{name}{format_labels(pairs)} {format_value(value)}")
+
+        gauges: Dict[str, Tuple[str, List[str]]] = {}
+        pid = str(os.getpid())
+        for collector in self._collectors:
+            for name, documentation, labels, value in collector():
+                _, samples = gauges.setdefault(name, (documentation, []))
+                pairs = [("pid", pid)] + sorted(labels.items())
+                samples.append(f"{name}{format_labels(pairs)} {format_value(value)}")
+        for name, (documentation, samples) in sorted(gauges.items()):
+            lines.append(f"# HELP {name} {documentation} (обслуживающий процесс)")
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def _start_flusher(self) -> None:
+        self._file = os.path.join(
+            settings.METRICS_MULTIPROC_DIR,
+            f"metrics-{os.getpid()}-{uuid.uuid4().hex[:8]}.json",
+        )
+        self._collect_snapshots()
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(settings.METRICS_FLUSH_SECONDS):
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def _collect_snapshots(self) -> None:
+        """
+        Уборка каталога при запуске процесса. Если ни один владелец снимка не жив,
+        это новый запуск сервиса и снимки прошлого удаляются. Иначе снимки
+        завершившихся воркеров прибавляются к DEAD_SNAPSHOT и удаляются.
+        """
+        with snapshot_dir_lock(fcntl.LOCK_EX):
+            live, dead = [], []
+            for path in snapshot_files():
+                pid = snapshot_pid(path)
+                if pid is None:
+                    continue
+                (live if pid != os.getpid() and is_process_alive(pid) else dead).append(path)
+
+            dead_path = os.path.join(settings.METRICS_MULTIPROC_DIR, DEAD_SNAPSHOT)
+            if not live:
+                for path in dead + [dead_path]:
+                    remove_file(path)
+            elif dead:
+                merged = read_snapshot(dead_path) or {}
+                for path in dead:
+                    merge_snapshot(merged, read_snapshot(path) or {})
+                write_snapshot(dead_path, merged)
+                for path in dead:
+                    remove_file(path)
+            # Пустой снимок отмечает процесс живым до первого сохранения значений
+            write_snapshot(self._file, {})
+
+    def _after_fork(self) -> None:
+        for metric in self._metrics.values():
+            metric._lock = threading.Lock()
+            metric._values = {}
+        self._lock = threading.Lock()
+        self._start_flusher()
+
+
+@contextmanager
+def snapshot_dir_lock(operation):
+    with open(os.path.join(settings.METRICS_MULTIPROC_DIR, ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file, operation)
+        yield
+
+
+def snapshot_files() -> List[str]:
+    return glob.glob(os.path.join(settings.METRICS_MULTIPROC_DIR, "metrics-*.json"))
+
+
+def snapshot_pid(path: str) -> Optional[int]:
+    """pid процесса из имени metrics-<pid>-<id>.json, None для DEAD_SNAPSHOT"""
+    try:
+        return int(os.path.basename(path).split("-")[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_snapshot(path: str) -> Optional[Dict]:
+    try:
+        with open(path, encoding="utf-8") as snapshot_file:
+            return json.load(snapshot_file)
+    except (OSError, ValueError):
+        return None  # файл удален или записывается
+
+
+def write_snapshot(path: str, snapshot: Dict) -> None:
+    """Атомарная замена файла снимка"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as snapshot_file:
+        json.dump(snapshot, snapshot_file)
+    os.replace(tmp_path, path)
+
+
+def remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def merge_snapshot(target: Dict[str, Dict], snapshot: Dict[str, Dict]) -> None:
+    """Прибавление снимка другого процесса к target"""
+    for name, metric in snapshot.items():
+        existing = target.get(name)
+        if existing is None:
+            target[name] = metric
+            continue
+        values = {tuple(labels): value for labels, value in existing["values"]}
+        for labels, value in metric["values"]:
+            labels = tuple(labels)
+            current = values.get(labels)
+            if current is None:
+                values[labels] = value
+            elif metric["type"] == "histogram":
+                values[labels] = [a + b for a, b in zip(current, value)]
+            else:
+                values[labels] = current + value
+        existing["values"] = [[list(labels), value] for labels, value in values.items()]
+
+
+def format_labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs) + "}"
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value) -> str:
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+
+registry = MetricsRegistry()
+
+# Аутентификация
+login_total = registry.counter(
+    "auth_login_total", "Попытки входа по результату", ("result",),
+)
+refresh_total = registry.counter(
+    "auth_refresh_total", "Обновления access токена по результату", ("result",),
+)
+token_decode_total = registry.counter(
+    "jwt_decode_total", "Проверки JWT токенов по результату", ("result",),
+)
+token_verify_seconds = registry.histogram(
+    "jwt_verify_seconds", "Время проверки подписи JWT (без попаданий в кэш токенов)",
+)
+middleware_auth_total = registry.counter(
+    "jwt_middleware_auth_total", "Аутентификация запросов в JWTAuthenticationMiddleware по результату", ("result",),
+)
+password_hash_seconds = registry.histogram(
+    "password_hash_seconds", "Время хеширования или проверки пароля",
+)
+password_hash_wait_seconds = registry.histogram(
+    "password_hash_wait_seconds", "Время ожидания в очереди пула хеширования",
+)
+
+# Авторизация
+permission_checks_total = registry.counter(
+    "rbac_permission_checks_total", "Проверки HasElementPermission", ("element", "action", "result"),
+)
+
+# HTTP
+http_requests_total = registry.counter(
+    "http_requests_total", "Запросы по endpoint и статусу", ("method", "route", "status"),
+)
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Время обработки запроса", ("method", "route"),
+)
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "Время SQL запросов за запрос", ("method", "route"),
+)
+
+
+def collect_process_stats():
+    """Состояние кэшей и пула хеширования текущего процесса в виде gauge"""
+    from apps.authentication.cache import token_cache, user_cache
+    from apps.users.hashing import password_hashing
+
+    sources = (
+        ("user_cache", "Кэш пользователей", user_cache.stats()),
+        ("token_cache", "Кэш проверенных токенов", token_cache.stats()),
+        ("password_hashing", "Пул хеширования паролей", password_hashing.stats()),
+    )
+    for prefix, documentation, stats in sources:
+        for key, value in stats.items():
+            yield f"{prefix}_{key}", f"{documentation}: {key}", {}, value
@@ -0,0 +1,151 @@
+"""
+Middleware для замера фаз запроса, заголовка Server-Timing, журнала медленных
+запросов и профилирования запросов администратором
+"""
+import json
+import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from apps.authorization.permissions import IsAdmin
+from apps.monitoring import profiling
+from apps.monitoring.metrics import http_request_db_seconds, http_request_seconds, http_requests_total
+from apps.monitoring.timing import start_timer, stop_timer
+
+slow_request_logger = logging.getLogger("apps.monitoring.slow_requests")
+
+# Метод вне списка попадает в метку "other", чтобы число рядов метрик было ограничено
+KNOWN_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+class RequestTimingMiddleware:
+    """
+    Замер длительности фаз (jwt, auth, perm, serialize, hash) и SQL запросов.
+    При REQUEST_TIMING_HEADER=True длительности отдаются в заголовке Server-Timing,
+    запросы дольше SLOW_REQUEST_THRESHOLD_MS пишутся в журнал вместе с SQL,
+    при METRICS_ENABLED=True запрос учитывается в метриках HTTP.
+    Если все режимы выключены, middleware не подключается.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.header = settings.REQUEST_TIMING_HEADER
+        self.threshold = settings.SLOW_REQUEST_THRESHOLD_MS / 1000
+        self.metrics = settings.METRICS_ENABLED
+        if not self.header and not self.threshold and not self.metrics:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer, token = start_timer(capture_sql=bool(self.threshold))
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_timer(token)
+        self.finish(request, response, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer, token = start_timer(capture_sql=bool(self.threshold))
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_timer(token)
+        self.finish(request, response, timer)
+        return response
+
+    def finish(self, request, response, timer):
+        elapsed = timer.elapsed()
+        if self.header:
+            response["Server-Timing"] = timer.server_timing(elapsed)
+        if self.threshold and elapsed >= self.threshold:
+            slow_request_logger.warning(json.dumps({
+                "event": "slow_request",
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "duration_ms": round(elapsed * 1000, 3),
+                **timer.as_dict(),
+            }, ensure_ascii=False))
+        if self.metrics:
+            method = request.method if request.method in KNOWN_METHODS else "other"
+            # Имя маршрута вместо пути: идентификаторы в URL не размножают ряды метрик
+            match = request.resolver_match
+            route = (match.view_name or match.route) if match is not None else "unmatched"
+            http_requests_total.inc(method, route, str(response.status_code))
+            http_request_seconds.observe(elapsed, method, route)
+            http_request_db_seconds.observe(timer.query_seconds, method, route)
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование запроса по заголовку X-Profile: cpu,sample,memory (или
+    параметру ?_profile=...). Профиль снимается только для администратора
+    (IsAdmin по JWT токену запроса), id сохраненного профиля возвращается в
+    заголовке X-Profile-Id, артефакты отдаются через /api/admin/profiles/.
+    При PROFILING_ENABLED=False middleware не подключается.
+    Ставится после JWTAuthenticationMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        modes = self.get_modes(request)
+        if not modes or not is_admin(request) or not profiling.acquire():
+            return self.get_response(request)
+        try:
+            profiler = profiling.RequestProfiler(modes)
+            profiler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.stop()
+            response["X-Profile-Id"] = profiler.save(request, response)
+        finally:
+            profiling.release()
+        return response
+
+    async def __acall__(self, request):
+        # Под ASGI профилируется поток event loop: синхронный код views,
+        # выполняемый через sync_to_async в другом потоке, в профиль не попадает
+        modes = self.get_modes(request)
+        if not modes or not await sync_to_async(is_admin)(request) or not profiling.acquire():
+            return await self.get_response(request)
+        try:
+            profiler = profiling.RequestProfiler(modes)
+            profiler.start()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.stop()
+            response["X-Profile-Id"] = await sync_to_async(profiler.save)(request, response)
+        finally:
+            profiling.release()
+        return response
+
+    @staticmethod
+    def get_modes(request):
+        value = request.META.get("HTTP_X_PROFILE")
+        if value is None and "_profile=" in request.META.get("QUERY_STRING", ""):
+            value = request.GET.get("_profile", "")
+        return profiling.parse_modes(value) if value else []
+
+
+def is_admin(request) -> bool:
+    return getattr(request, "user", None) is not None and IsAdmin().has_permission(request, None)
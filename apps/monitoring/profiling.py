@@ -0,0 +1,227 @@
+"""
+Профилирование отдельных запросов по запросу администратора.
+
+Режимы: cpu - детерминированный профилировщик cProfile (артефакт в формате
+pstats), sample - сэмплирующий профилировщик потока запроса (collapsed stacks
+для flamegraph.pl / speedscope), memory - разница снимков tracemalloc до и
+после запроса. Одновременно профилируется не больше одного запроса: cProfile
+и tracemalloc глобальны для процесса, и параллельные профили искажали бы
+друг друга.
+
+Артефакты профиля лежат в PROFILING_DIR: <id>.json с описанием запроса и
+файлы артефактов; хранятся последние PROFILING_MAX_PROFILES профилей.
+"""
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from django.conf import settings
+
+MODES = ("cpu", "sample", "memory")
+
+# Тип артефакта -> суффикс файла
+ARTIFACTS = {
+    "pstats": ".pstats",
+    "collapsed": ".collapsed.txt",
+    "memory": ".memory.txt",
+}
+
+PROFILE_ID_RE = re.compile(r"\d{8}T\d{6}-[0-9a-f]{8}")
+TRACEMALLOC_FRAMES = 10
+MEMORY_TOP_LINES = 50
+
+_profiling_lock = threading.Lock()
+
+
+def parse_modes(value: str) -> List[str]:
+    """Режимы из заголовка X-Profile или параметра _profile ("1" - cpu)"""
+    modes = [mode.strip() for mode in value.lower().split(",")]
+    if modes == ["1"]:
+        return ["cpu"]
+    return [mode for mode in MODES if mode in modes]
+
+
+class StackSampler:
+    """Сэмплирование стека одного потока через sys._current_frames()"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """Стеки в формате "frame;frame;frame count" """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})".replace(";", ":"))
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+
+class RequestProfiler:
+    """Профиль одного запроса в выбранных режимах"""
+
+    def __init__(self, modes: List[str]):
+        self.modes = modes
+        self.started_at = datetime.now(timezone.utc)
+        self.duration = 0.0
+        self._cpu: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._memory_before = None
+        self._started_tracemalloc = False
+        self._started = 0.0
+
+    def start(self) -> None:
+        if "memory" in self.modes:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self._started_tracemalloc = True
+            self._memory_before = tracemalloc.take_snapshot()
+        if "sample" in self.modes:
+            self._sampler = StackSampler(threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL_MS / 1000)
+            self._sampler.start()
+        self._started = time.perf_counter()
+        if "cpu" in self.modes:
+            self._cpu = cProfile.Profile()
+            self._cpu.enable()
+
+    def stop(self) -> None:
+        if self._cpu is not None:
+            self._cpu.disable()
+        self.duration = time.perf_counter() - self._started
+        if self._sampler is not None:
+            self._sampler.stop()
+
+    def save(self, request, response) -> str:
+        """Сохранение артефактов; возвращает id профиля"""
+        profile_id = f"{self.started_at:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        directory = settings.PROFILING_DIR
+        os.makedirs(directory, exist_ok=True)
+
+        artifacts = []
+        if self._cpu is not None:
+            self._cpu.dump_stats(os.path.join(directory, profile_id + ARTIFACTS["pstats"]))
+            artifacts.append("pstats")
+        if self._sampler is not None:
+            write_text(os.path.join(directory, profile_id + ARTIFACTS["collapsed"]), self._sampler.collapsed())
+            artifacts.append("collapsed")
+        if self._memory_before is not None:
+            write_text(os.path.join(directory, profile_id + ARTIFACTS["memory"]), self._memory_diff())
+            artifacts.append("memory")
+
+        user = getattr(request, "user", None)
+        write_text(os.path.join(directory, f"{profile_id}.json"), json.dumps({
+            "id": profile_id,
+            "created_at": self.started_at.isoformat(),
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": round(self.duration * 1000, 3),
+            "user_id": str(user.id) if user is not None else None,
+            "modes": self.modes,
+            "artifacts": artifacts,
+        }, ensure_ascii=False))
+        prune_profiles(directory, settings.PROFILING_MAX_PROFILES)
+        return profile_id
+
+    def _memory_diff(self) -> str:
+        after = tracemalloc.take_snapshot()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        # Память самого профилировщика (стеки сэмплера) в разницу не входит
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        stats = after.filter_traces(ignore).compare_to(self._memory_before.filter_traces(ignore), "lineno")
+        growth = sum(stat.size_diff for stat in stats)
+        lines = [f"Прирост памяти за запрос: {growth / 1024:.1f} KiB", ""]
+        lines.extend(str(stat) for stat in stats[:MEMORY_TOP_LINES])
+        return "\n".join(lines) + "\n"
+
+
+def acquire() -> bool:
+    """Занять профилировщик без ожидания; False - уже профилируется другой запрос"""
+    return _profiling_lock.acquire(blocking=False)
+
+
+def release() -> None:
+    _profiling_lock.release()
+
+
+def write_text(path: str, content: str) -> None:
+    with open(path, "w", encoding="utf-8") as output:
+        output.write(content)
+
+
+def prune_profiles(directory: str, keep: int) -> None:
+    """Удаление самых старых профилей сверх лимита (id начинается со времени)"""
+    profile_ids = sorted(name[:-len(".json")] for name in os.listdir(directory) if name.endswith(".json"))
+    for profile_id in profile_ids[:max(0, len(profile_ids) - keep)]:
+        delete_profile(profile_id)
+
+
+def list_profiles() -> List[Dict]:
+    """Описания сохраненных профилей, новые первыми"""
+    directory = settings.PROFILING_DIR
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if name.endswith(".json"):
+            profile = get_profile(name[:-len(".json")])
+            if profile is not None:
+                profiles.append(profile)
+    return profiles
+
+
+def get_profile(profile_id: str) -> Optional[Dict]:
+    if not PROFILE_ID_RE.fullmatch(profile_id):
+        return None
+    try:
+        with open(os.path.join(settings.PROFILING_DIR, f"{profile_id}.json"), encoding="utf-8") as meta:
+            return json.load(meta)
+    except (OSError, ValueError):
+        return None
+
+
+def artifact_path(profile_id: str, kind: str) -> Optional[str]:
+    """Путь к файлу артефакта, если профиль и артефакт существуют"""
+    profile = get_profile(profile_id)
+    if profile is None or kind not in profile["artifacts"]:
+        return None
+    return os.path.join(settings.PROFILING_DIR, profile_id + ARTIFACTS[kind])
+
+
+def delete_profile(profile_id: str) -> bool:
+    if not PROFILE_ID_RE.fullmatch(profile_id):
+        return False
+    deleted = False
+    for suffix in [".json", *ARTIFACTS.values()]:
+        try:
+            os.remove(os.path.join(settings.PROFILING_DIR, profile_id + suffix))
+            deleted = True
+        except FileNotFoundError:
+            pass
+    return deleted
@@ -0,0 +1,209 @@
+import json
+import os
+import pstats
+import subprocess
+import sys
+import tempfile
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from apps.authentication.utils import generate_access_token
+from apps.authorization.models import Role
+from apps.monitoring.metrics import DEAD_SNAPSHOT, MetricsRegistry, merge_snapshot, registry
+
+User = get_user_model()
+
+
+@override_settings(PASSWORD_BCRYPT_ROUNDS=4, PASSWORD_HASHING_EXECUTOR="inline")
+class RequestTimingTests(TestCase):
+    """Server-Timing и журнал медленных запросов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("timing@example.com", "password123")
+
+    @override_settings(REQUEST_TIMING_HEADER=True, SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_server_timing_header(self):
+        client = APIClient()
+        response = client.post(
+            "/api/auth/login/",
+            {"email": "timing@example.com", "password": "password123"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        metrics = {item.split(";")[0] for item in response["Server-Timing"].split(", ")}
+        self.assertTrue({"hash", "serialize", "db", "total"} <= metrics, metrics)
+
+        token = generate_access_token(self.user.id, self.user.role_id)
+        response = client.get("/api/users/me/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertIn('auth;dur=', response["Server-Timing"])
+        self.assertIn('jwt;dur=', response["Server-Timing"])
+
+    @override_settings(REQUEST_TIMING_HEADER=False, SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_disabled(self):
+        response = APIClient().get("/api/auth/.well-known/jwks.json")
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(REQUEST_TIMING_HEADER=False, SLOW_REQUEST_THRESHOLD_MS=1)
+    def test_slow_request_log_contains_sql(self):
+        with self.assertLogs("apps.monitoring.slow_requests", level="WARNING") as logs:
+            APIClient().post(
+                "/api/auth/login/",
+                {"email": "timing@example.com", "password": "password123"},
+                format="json",
+            )
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["path"], "/api/auth/login/")
+        self.assertGreaterEqual(record["db"]["queries"], 1)
+        self.assertTrue(any(query["sql"].startswith("SELECT") for query in record["sql"]))
+        self.assertIn("hash", record["phases"])
+
+
+@override_settings(PASSWORD_BCRYPT_ROUNDS=4, PASSWORD_HASHING_EXECUTOR="inline", METRICS_TOKEN="")
+class MetricsTests(TestCase):
+    """Endpoint /metrics и суммирование снимков воркеров"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("metrics@example.com", "password123")
+
+    def setUp(self):
+        registry.reset()
+
+    def test_hot_paths_are_counted(self):
+        client = APIClient()
+        client.post("/api/auth/login/", {"email": "metrics@example.com", "password": "wrong"}, format="json")
+        client.post("/api/auth/login/", {"email": "metrics@example.com", "password": "password123"}, format="json")
+        token = generate_access_token(self.user.id, self.user.role_id)
+        client.get("/api/users/me/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        response = client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn('auth_login_total{result="invalid_credentials"} 1', body)
+        self.assertIn('auth_login_total{result="success"} 1', body)
+        self.assertIn('jwt_middleware_auth_total{result="authenticated"} 1', body)
+        self.assertIn('password_hash_seconds_count 2', body)
+        self.assertIn('http_requests_total{method="POST",route="authentication:login",status="200"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="user-me",le="+Inf"} 1', body)
+        self.assertIn("user_cache_hits{pid=", body)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token_required(self):
+        self.assertEqual(APIClient().get("/metrics").status_code, 401)
+        response = APIClient().get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+
+    def test_merge_worker_snapshots(self):
+        workers = []
+        for _ in range(2):
+            worker = MetricsRegistry()
+            worker.counter("requests_total", "Запросы", ("status",)).inc("200")
+            worker.histogram("latency_seconds", "Задержка", buckets=(0.1, 1.0)).observe(0.5)
+            workers.append(worker.snapshot())
+
+        merged = workers[0]
+        merge_snapshot(merged, workers[1])
+        self.assertEqual(merged["requests_total"]["values"], [[["200"], 2]])
+        self.assertEqual(merged["latency_seconds"]["values"], [[[], [0, 2, 0, 1.0]]])
+
+
+
+class MultiprocessSnapshotTests(TestCase):
+    """Снимки воркеров в METRICS_MULTIPROC_DIR: новый запуск сервиса и завершившиеся воркеры"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        overrides = override_settings(METRICS_MULTIPROC_DIR=self.directory, METRICS_FLUSH_SECONDS=3600)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def write(self, pid, value):
+        worker = MetricsRegistry()
+        worker.counter("requests_total", "Запросы").inc(amount=value)
+        path = os.path.join(self.directory, f"metrics-{pid}-test.json")
+        with open(path, "w", encoding="utf-8") as snapshot_file:
+            json.dump(worker.snapshot(), snapshot_file)
+
+    def dead_pid(self):
+        process = subprocess.Popen([sys.executable, "-c", ""])
+        process.wait()
+        return process.pid
+
+    def start_worker(self):
+        worker = MetricsRegistry()
+        worker.counter("requests_total", "Запросы").inc()
+        worker._start_flusher()
+        self.addCleanup(worker._stop.set)
+        return worker
+
+    def files(self):
+        return sorted(name for name in os.listdir(self.directory) if name.startswith("metrics-"))
+
+    def test_new_server_start_drops_previous_snapshots(self):
+        self.write(self.dead_pid(), 5)
+        self.write(self.dead_pid(), 7)
+        worker = self.start_worker()
+        self.assertEqual(self.files(), [os.path.basename(worker._file)])
+        self.assertIn("requests_total 1\n", worker.render())
+
+    def test_dead_worker_snapshots_merged(self):
+        self.write(os.getppid(), 2)
+        self.write(self.dead_pid(), 5)
+        self.write(self.dead_pid(), 7)
+        worker = self.start_worker()
+
+        self.assertEqual(len(self.files()), 3)
+        self.assertIn(DEAD_SNAPSHOT, self.files())
+        # Счетчики завершившихся воркеров сохраняются
+        self.assertIn("requests_total 15\n", worker.render())
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_INTERVAL_MS=1)
+class ProfilingTests(TestCase):
+    """Профилирование запросов администратором и скачивание артефактов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create_user("profiler@example.com", role=Role.objects.create(name="admin"))
+        user = User.objects.create_user("regular@example.com", role=Role.objects.create(name="user"))
+        cls.admin_headers = {"HTTP_AUTHORIZATION": f"Bearer {generate_access_token(admin.id, admin.role_id)}"}
+        cls.user_headers = {"HTTP_AUTHORIZATION": f"Bearer {generate_access_token(user.id, user.role_id)}"}
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(PROFILING_DIR=directory.name))
+
+    def test_admin_profile_artifacts(self):
+        client = APIClient()
+        response = client.get("/api/users/me/", HTTP_X_PROFILE="cpu,sample,memory", **self.admin_headers)
+        self.assertEqual(response.status_code, 200)
+        profile_id = response["X-Profile-Id"]
+
+        profiles = client.get("/api/admin/profiles/", **self.admin_headers).json()
+        self.assertEqual([profile["id"] for profile in profiles], [profile_id])
+        self.assertEqual(profiles[0]["path"], "/api/users/me/")
+        self.assertEqual(profiles[0]["artifacts"], ["pstats", "collapsed", "memory"])
+
+        response = client.get(f"/api/admin/profiles/{profile_id}/download/pstats/", **self.admin_headers)
+        with tempfile.NamedTemporaryFile(suffix=".pstats") as artifact:
+            artifact.write(b"".join(response.streaming_content))
+            artifact.flush()
+            self.assertGreater(pstats.Stats(artifact.name).total_calls, 0)
+
+        response = client.get(f"/api/admin/profiles/{profile_id}/download/memory/", **self.admin_headers)
+        self.assertTrue(b"".join(response.streaming_content).decode().startswith("Прирост памяти"))
+
+        response = client.delete(f"/api/admin/profiles/{profile_id}/", **self.admin_headers)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(client.get("/api/admin/profiles/", **self.admin_headers).json(), [])
+
+    def test_non_admin_is_not_profiled(self):
+        client = APIClient()
+        response = client.get("/api/users/me/?_profile=cpu", **self.user_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(client.get("/api/admin/profiles/", **self.user_headers).status_code, 403)
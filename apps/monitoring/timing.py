@@ -0,0 +1,170 @@
+"""
+Замер длительности фаз обработки запроса.
+
+RequestTimingMiddleware создает RequestTimer и кладет его в contextvar, а код
+на горячих путях отмечает фазы через phase("jwt") / @timed("perm"). Вне
+запроса (или при выключенном замере) phase возвращает пустой контекстный
+менеджер. SQL запросы учитываются обработчиком execute_wrapper, который
+ставится на каждое соединение с БД и относит запрос к текущей фазе.
+"""
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional
+
+MAX_CAPTURED_QUERIES = 100
+
+_current_timer: ContextVar[Optional["RequestTimer"]] = ContextVar("request_timer", default=None)
+_noop = nullcontext()
+
+
+class PhaseStats:
+    __slots__ = ("seconds", "calls", "queries", "query_seconds")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+class RequestTimer:
+    """Длительности фаз и SQL запросы одного запроса"""
+
+    def __init__(self, capture_sql: bool = False):
+        self.started = time.perf_counter()
+        self.capture_sql = capture_sql
+        self.phases: Dict[str, PhaseStats] = {}
+        self.stack: List[str] = []
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.captured: List[Dict] = []
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats()
+        stats.seconds += seconds
+        stats.calls += 1
+
+    def add_query(self, sql: str, seconds: float) -> None:
+        self.queries += 1
+        self.query_seconds += seconds
+        phase = self.stack[-1] if self.stack else None
+        if phase is not None:
+            stats = self.phases.get(phase)
+            if stats is None:
+                stats = self.phases[phase] = PhaseStats()
+            stats.queries += 1
+            stats.query_seconds += seconds
+        if self.capture_sql and len(self.captured) < MAX_CAPTURED_QUERIES:
+            self.captured.append({"sql": sql, "ms": round(seconds * 1000, 3), "phase": phase})
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total_seconds: float) -> str:
+        """Значение заголовка Server-Timing"""
+        metrics = []
+        for name, stats in self.phases.items():
+            metric = f"{name};dur={stats.seconds * 1000:.3f}"
+            if stats.queries:
+                metric += f';desc="{stats.queries} sql"'
+            metrics.append(metric)
+        metrics.append(f'db;dur={self.query_seconds * 1000:.3f};desc="{self.queries} sql"')
+        metrics.append(f"total;dur={total_seconds * 1000:.3f}")
+        return ", ".join(metrics)
+
+    def as_dict(self) -> Dict:
+        """Данные для журнала медленных запросов"""
+        return {
+            "phases": {
+                name: {
+                    "ms": round(stats.seconds * 1000, 3),
+                    "calls": stats.calls,
+                    "queries": stats.queries,
+                    "query_ms": round(stats.query_seconds * 1000, 3),
+                }
+                for name, stats in self.phases.items()
+            },
+            "db": {"queries": self.queries, "ms": round(self.query_seconds * 1000, 3)},
+            "sql": self.captured,
+        }
+
+
+def start_timer(capture_sql: bool = False):
+    """Новый замер для текущего контекста; возвращает (timer, token для stop_timer)"""
+    timer = RequestTimer(capture_sql)
+    return timer, _current_timer.set(timer)
+
+
+def stop_timer(token) -> None:
+    _current_timer.reset(token)
+
+
+def current_timer() -> Optional[RequestTimer]:
+    return _current_timer.get()
+
+
+def phase(name: str):
+    """
+    Контекстный менеджер фазы; без активного замера ничего не делает.
+    Вложенный вызов той же фазы (вложенные сериализаторы) не учитывается повторно.
+    """
+    timer = _current_timer.get()
+    if timer is None or (timer.stack and timer.stack[-1] == name):
+        return _noop
+    return _phase(timer, name)
+
+
+@contextmanager
+def _phase(timer: RequestTimer, name: str):
+    timer.stack.append(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add_phase(name, time.perf_counter() - started)
+        timer.stack.pop()
+
+
+def timed(name: str):
+    """Декоратор: вызов функции учитывается как фаза name"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TimedSerializerMixin:
+    """Миксин сериализатора DRF: валидация и сериализация учитываются как фаза serialize"""
+
+    def is_valid(self, *args, **kwargs):
+        with phase("serialize"):
+            return super().is_valid(*args, **kwargs)
+
+    def to_representation(self, instance):
+        with phase("serialize"):
+            return super().to_representation(instance)
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper: время SQL запроса учитывается в активном замере"""
+    timer = _current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.add_query(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(sender, connection, **kwargs) -> None:
+    """Обработчик connection_created: record_query ставится на соединение один раз"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,11 @@
+"""
+URLs мониторинга
+"""
+from django.urls import path
+from apps.monitoring import views
+
+app_name = "monitoring"
+
+urlpatterns = [
+    path("metrics", views.metrics, name="metrics"),
+]
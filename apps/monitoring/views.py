@@ -0,0 +1,27 @@
+"""
+Views мониторинга
+"""
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from apps.authentication.decorators import skip_authentication
+from apps.authentication.utils import get_bearer_token
+from apps.monitoring.metrics import registry
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@skip_authentication
+@require_GET
+def metrics(request):
+    """Метрики в текстовом формате Prometheus (доступ по METRICS_TOKEN, если задан)"""
+    if not settings.METRICS_ENABLED:
+        raise Http404()
+    if settings.METRICS_TOKEN and not constant_time_compare(
+        get_bearer_token(request) or "", settings.METRICS_TOKEN
+    ):
+        return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+    response = HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+    response["Cache-Control"] = "no-store"
+    return response
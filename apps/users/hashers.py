@@ -0,0 +1,250 @@
+"""
+Реестр алгоритмов хеширования паролей.
+
+Алгоритм определяется по префиксу хеша, поэтому в базе одновременно могут
+храниться хеши разных алгоритмов и стоимости. Новые хеши создаются алгоритмом
+PASSWORD_HASHER с параметрами из настроек.
+"""
+import base64
+import hashlib
+import hmac
+import os
+from typing import Dict, Iterator, List, Optional
+import bcrypt
+from django.conf import settings
+
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
+
+class UnknownHashFormat(ValueError):
+    """Хеш не относится ни к одному зарегистрированному алгоритму"""
+
+
+class PasswordHasher:
+    """
+    Базовый класс алгоритма хеширования.
+
+    Параметры стоимости передаются в encode явно: хеширование может выполняться
+    в дочернем процессе пула, где настройки Django недоступны.
+    """
+
+    algorithm = ""
+    prefixes: tuple = ()
+
+    def identify(self, encoded: str) -> bool:
+        return encoded.startswith(self.prefixes)
+
+    def params(self) -> Dict[str, int]:
+        """Текущие параметры стоимости из настроек"""
+        raise NotImplementedError
+
+    def encode(self, raw_password: bytes, params: Dict[str, int]) -> str:
+        raise NotImplementedError
+
+    def verify(self, raw_password: bytes, encoded: str) -> bool:
+        raise NotImplementedError
+
+    def cost(self, encoded: str) -> Dict[str, int]:
+        """Параметры стоимости, с которыми создан хеш"""
+        raise NotImplementedError
+
+    def calibration_steps(self) -> Iterator[Dict[str, int]]:
+        """Параметры по возрастанию стоимости для calibrate_hasher"""
+        raise NotImplementedError
+
+    def settings_for(self, params: Dict[str, int]) -> Dict[str, int]:
+        """Переменные окружения, задающие параметры"""
+        raise NotImplementedError
+
+
+class BCryptHasher(PasswordHasher):
+    """bcrypt, стоимость задается PASSWORD_BCRYPT_ROUNDS"""
+
+    algorithm = "bcrypt"
+    prefixes = ("$2a$", "$2b$", "$2y$")
+
+    def params(self):
+        return {"rounds": settings.PASSWORD_BCRYPT_ROUNDS}
+
+    def encode(self, raw_password, params):
+        return bcrypt.hashpw(raw_password, bcrypt.gensalt(rounds=params["rounds"])).decode("ascii")
+
+    def verify(self, raw_password, encoded):
+        return bcrypt.checkpw(raw_password, encoded.encode("ascii"))
+
+    def cost(self, encoded):
+        return {"rounds": int(encoded.split("$")[2])}
+
+    def calibration_steps(self):
+        for rounds in range(8, 17):
+            yield {"rounds": rounds}
+
+    def settings_for(self, params):
+        return {"PASSWORD_BCRYPT_ROUNDS": params["rounds"]}
+
+
+class ScryptHasher(PasswordHasher):
+    """
+    scrypt из hashlib. Формат: scrypt$n$r$p$salt$hash (salt и hash в base64).
+    """
+
+    algorithm = "scrypt"
+    prefixes = ("scrypt$",)
+    salt_size = 16
+    hash_size = 64
+
+    def params(self):
+        return {
+            "n": settings.PASSWORD_SCRYPT_N,
+            "r": settings.PASSWORD_SCRYPT_R,
+            "p": settings.PASSWORD_SCRYPT_P,
+        }
+
+    def encode(self, raw_password, params):
+        salt = os.urandom(self.salt_size)
+        derived = self._derive(raw_password, salt, params)
+        return "$".join([
+            self.algorithm,
+            str(params["n"]),
+            str(params["r"]),
+            str(params["p"]),
+            base64.b64encode(salt).decode("ascii"),
+            base64.b64encode(derived).decode("ascii"),
+        ])
+
+    def verify(self, raw_password, encoded):
+        _, n, r, p, salt, expected = encoded.split("$")
+        params = {"n": int(n), "r": int(r), "p": int(p)}
+        derived = self._derive(raw_password, base64.b64decode(salt), params)
+        return hmac.compare_digest(derived, base64.b64decode(expected))
+
+    def cost(self, encoded):
+        _, n, r, p, _, _ = encoded.split("$")
+        return {"n": int(n), "r": int(r), "p": int(p)}
+
+    def calibration_steps(self):
+        r = settings.PASSWORD_SCRYPT_R
+        p = settings.PASSWORD_SCRYPT_P
+        for power in range(12, 21):
+            yield {"n": 2 ** power, "r": r, "p": p}
+
+    def settings_for(self, params):
+        return {
+            "PASSWORD_SCRYPT_N": params["n"],
+            "PASSWORD_SCRYPT_R": params["r"],
+            "PASSWORD_SCRYPT_P": params["p"],
+        }
+
+    def _derive(self, raw_password: bytes, salt: bytes, params: Dict[str, int]) -> bytes:
+        n, r, p = params["n"], params["r"], params["p"]
+        return hashlib.scrypt(
+            raw_password,
+            salt=salt,
+            n=n,
+            r=r,
+            p=p,
+            # Значение по умолчанию (32 МБ) меньше, чем нужно при n >= 2**15
+            maxmem=256 * n * r * p,
+            dklen=self.hash_size,
+        )
+
+
+class Argon2Hasher(PasswordHasher):
+    """argon2id (пакет argon2-cffi, регистрируется только если установлен)"""
+
+    algorithm = "argon2"
+    prefixes = ("$argon2",)
+
+    def params(self):
+        return {
+            "time_cost": settings.PASSWORD_ARGON2_TIME_COST,
+            "memory_cost": settings.PASSWORD_ARGON2_MEMORY_COST,
+            "parallelism": settings.PASSWORD_ARGON2_PARALLELISM,
+        }
+
+    def encode(self, raw_password, params):
+        return argon2.PasswordHasher(**params).hash(raw_password)
+
+    def verify(self, raw_password, encoded):
+        try:
+            return argon2.PasswordHasher().verify(encoded, raw_password)
+        except argon2.exceptions.VerificationError:
+            return False
+        except argon2.exceptions.InvalidHashError as exc:
+            raise ValueError(str(exc)) from exc
+
+    def cost(self, encoded):
+        parameters = argon2.extract_parameters(encoded)
+        return {
+            "time_cost": parameters.time_cost,
+            "memory_cost": parameters.memory_cost,
+            "parallelism": parameters.parallelism,
+        }
+
+    def calibration_steps(self):
+        memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+        parallelism = settings.PASSWORD_ARGON2_PARALLELISM
+        for time_cost in range(1, 11):
+            yield {"time_cost": time_cost, "memory_cost": memory_cost, "parallelism": parallelism}
+
+    def settings_for(self, params):
+        return {
+            "PASSWORD_ARGON2_TIME_COST": params["time_cost"],
+            "PASSWORD_ARGON2_MEMORY_COST": params["memory_cost"],
+            "PASSWORD_ARGON2_PARALLELISM": params["parallelism"],
+        }
+
+
+HASHERS: Dict[str, PasswordHasher] = {
+    hasher.algorithm: hasher
+    for hasher in (BCryptHasher(), ScryptHasher(), Argon2Hasher() if argon2 is not None else None)
+    if hasher is not None
+}
+
+
+def available_hashers() -> List[str]:
+    return list(HASHERS)
+
+
+def get_hasher(algorithm: Optional[str] = None) -> PasswordHasher:
+    """Алгоритм по имени, по умолчанию - PASSWORD_HASHER"""
+    algorithm = algorithm or settings.PASSWORD_HASHER
+    try:
+        return HASHERS[algorithm]
+    except KeyError:
+        raise ValueError(
+            f"Алгоритм хеширования {algorithm} недоступен, допустимые: {', '.join(HASHERS)}"
+        ) from None
+
+
+def identify_hasher(encoded: str) -> PasswordHasher:
+    """Алгоритм, которым создан хеш"""
+    for hasher in HASHERS.values():
+        if hasher.identify(encoded):
+            return hasher
+    raise UnknownHashFormat("Неизвестный формат хеша пароля")
+
+
+def needs_rehash(encoded: str) -> bool:
+    """Создан ли хеш другим алгоритмом или с другими параметрами стоимости"""
+    try:
+        hasher = identify_hasher(encoded)
+        if hasher.algorithm != settings.PASSWORD_HASHER:
+            return True
+        return hasher.cost(encoded) != hasher.params()
+    except ValueError:
+        # Неразбираемый хеш нельзя проверить, перехеширование ничего не даст
+        return False
+
+
+def encode_password(algorithm: str, raw_password: bytes, params: Dict[str, int]) -> str:
+    """Хеширование (выполняется в пуле хеширования)"""
+    return HASHERS[algorithm].encode(raw_password, params)
+
+
+def verify_encoded(raw_password: bytes, encoded: str) -> bool:
+    """Проверка пароля по хешу любого зарегистрированного алгоритма (выполняется в пуле)"""
+    return identify_hasher(encoded).verify(raw_password, encoded)
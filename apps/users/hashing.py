@@ -0,0 +1,204 @@
+"""
+Выполнение хеширования и проверки паролей в отдельном ограниченном пуле
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from django.conf import settings
+from apps.monitoring.metrics import password_hash_seconds, password_hash_wait_seconds
+from apps.monitoring.timing import phase, timed
+from apps.users.hashers import encode_password, get_hasher, verify_encoded
+
+
+class PasswordHashingBusy(Exception):
+    """Очередь хеширования паролей переполнена"""
+
+    retry_after = 1
+
+
+class PasswordHashingExecutor:
+    """
+    Пул для хеширования паролей с ограниченной очередью.
+
+    Одновременно принимается не больше PASSWORD_HASHING_WORKERS +
+    PASSWORD_HASHING_QUEUE_SIZE задач; сверх этого вызывающий сразу получает
+    PasswordHashingBusy, чтобы всплеск login/register не занимал потоки
+    воркера, обслуживающие остальные запросы.
+    PASSWORD_HASHING_EXECUTOR: "thread", "process" или "inline" (без пула).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[threading.BoundedSemaphore] = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    def run(self, func: Callable, *args):
+        """Выполнение func(*args) в пуле с ожиданием результата"""
+        if settings.PASSWORD_HASHING_EXECUTOR == "inline":
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self._record(0.0, time.perf_counter() - started)
+
+        executor, slots = self._get_executor()
+        if not slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHashingBusy()
+
+        with self._lock:
+            self.in_flight += 1
+        submitted = time.perf_counter()
+        try:
+            future = executor.submit(_timed, func, *args)
+            result, hash_seconds = future.result()
+        finally:
+            slots.release()
+            with self._lock:
+                self.in_flight -= 1
+        total_seconds = time.perf_counter() - submitted
+        self._record(max(0.0, total_seconds - hash_seconds), hash_seconds)
+        return result
+
+    async def arun(self, func: Callable, *args):
+        """Выполнение func(*args) в пуле без блокировки event loop"""
+        if settings.PASSWORD_HASHING_EXECUTOR == "inline":
+            result, hash_seconds = await asyncio.to_thread(_timed, func, *args)
+            self._record(0.0, hash_seconds)
+            return result
+
+        executor, slots = self._get_executor()
+        if not slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHashingBusy()
+
+        with self._lock:
+            self.in_flight += 1
+        submitted = time.perf_counter()
+        try:
+            future = executor.submit(_timed, func, *args)
+            result, hash_seconds = await asyncio.wrap_future(future)
+        finally:
+            slots.release()
+            with self._lock:
+                self.in_flight -= 1
+        total_seconds = time.perf_counter() - submitted
+        self._record(max(0.0, total_seconds - hash_seconds), hash_seconds)
+        return result
+
+    def stats(self) -> Dict[str, float]:
+        """Глубина очереди, время ожидания и время хеширования"""
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "queue_depth": max(0, self.in_flight - settings.PASSWORD_HASHING_WORKERS),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_seconds_total": self.wait_seconds,
+                "wait_seconds_max": self.max_wait_seconds,
+                "hash_seconds_total": self.hash_seconds,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+            self._executor = None
+            self._slots = None
+
+    def _get_executor(self):
+        executor, slots = self._executor, self._slots
+        if executor is not None:
+            return executor, slots
+
+        with self._lock:
+            if self._executor is None:
+                workers = settings.PASSWORD_HASHING_WORKERS
+                if settings.PASSWORD_HASHING_EXECUTOR == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=workers,
+                        thread_name_prefix="password-hashing",
+                    )
+                self._slots = threading.BoundedSemaphore(workers + settings.PASSWORD_HASHING_QUEUE_SIZE)
+            return self._executor, self._slots
+
+    def _record(self, wait_seconds: float, hash_seconds: float) -> None:
+        with self._lock:
+            self.completed += 1
+            self.wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+            self.hash_seconds += hash_seconds
+        password_hash_seconds.observe(hash_seconds)
+        password_hash_wait_seconds.observe(wait_seconds)
+
+
+def _timed(func: Callable, *args):
+    """Выполнение с замером времени внутри пула (без ожидания в очереди)"""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+password_hashing = PasswordHashingExecutor()
+
+
+@timed("hash")
+def hash_password(raw_password: str, algorithm: Optional[str] = None) -> str:
+    """Хеш пароля алгоритмом PASSWORD_HASHER (или algorithm) через пул хеширования"""
+    hasher = get_hasher(algorithm)
+    return password_hashing.run(
+        encode_password,
+        hasher.algorithm,
+        raw_password.encode("utf-8"),
+        hasher.params(),
+    )
+
+
+@timed("hash")
+def verify_password(raw_password: str, hashed_password: str) -> bool:
+    """Проверка пароля через пул хеширования"""
+    try:
+        return password_hashing.run(
+            verify_encoded,
+            raw_password.encode("utf-8"),
+            hashed_password,
+        )
+    except (AttributeError, ValueError):
+        return False
+
+
+async def ahash_password(raw_password: str, algorithm: Optional[str] = None) -> str:
+    """Асинхронный вариант hash_password"""
+    hasher = get_hasher(algorithm)
+    with phase("hash"):
+        return await password_hashing.arun(
+            encode_password,
+            hasher.algorithm,
+            raw_password.encode("utf-8"),
+            hasher.params(),
+        )
+
+
+async def averify_password(raw_password: str, hashed_password: str) -> bool:
+    """Асинхронный вариант verify_password"""
+    try:
+        with phase("hash"):
+            return await password_hashing.arun(
+                verify_encoded,
+                raw_password.encode("utf-8"),
+                hashed_password,
+            )
+    except (AttributeError, ValueError):
+        return False
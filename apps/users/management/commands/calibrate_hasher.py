@@ -0,0 +1,77 @@
+"""
+Management команда для подбора стоимости хеширования паролей под целевое время
+"""
+import statistics
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.users.hashers import available_hashers, get_hasher
+
+
+class Command(BaseCommand):
+    help = (
+        "Замер времени хеширования пароля на текущей машине с возрастающей стоимостью "
+        "и рекомендация параметров, укладывающихся в целевое время"
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--algorithm",
+            choices=available_hashers(),
+            default=settings.PASSWORD_HASHER,
+            help="Алгоритм хеширования (по умолчанию - PASSWORD_HASHER)",
+        )
+        parser.add_argument(
+            "--target-ms",
+            type=float,
+            default=250.0,
+            help="Целевое время одного хеширования в миллисекундах",
+        )
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=3,
+            help="Число замеров для каждого значения стоимости (берется медиана)",
+        )
+    
+    def handle(self, *args, **options):
+        hasher = get_hasher(options["algorithm"])
+        target = options["target_ms"]
+        if target <= 0 or options["samples"] < 1:
+            raise CommandError("--target-ms и --samples должны быть положительными")
+        
+        self.stdout.write(f"Алгоритм: {hasher.algorithm}, цель: {target:.0f} мс")
+        self.stdout.write(f"Текущие параметры: {self.format_params(hasher.params())}")
+        
+        recommended = None
+        for params in hasher.calibration_steps():
+            elapsed_ms = self.measure(hasher, params, options["samples"])
+            self.stdout.write(f"  {self.format_params(params)}: {elapsed_ms:.1f} мс")
+            if elapsed_ms > target:
+                break
+            recommended = params
+        
+        if recommended is None:
+            self.stdout.write(self.style.WARNING(
+                "Даже минимальная стоимость превышает целевое время, оставьте минимальные параметры"
+            ))
+            return
+        
+        self.stdout.write(self.style.SUCCESS("Рекомендуемые настройки:"))
+        self.stdout.write(f"PASSWORD_HASHER={hasher.algorithm}")
+        for name, value in hasher.settings_for(recommended).items():
+            self.stdout.write(f"{name}={value}")
+    
+    @staticmethod
+    def measure(hasher, params, samples):
+        """Медиана времени хеширования в миллисекундах"""
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            hasher.encode(b"calibration-password", params)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+    
+    @staticmethod
+    def format_params(params):
+        return ", ".join(f"{name}={value}" for name, value in params.items())
@@ -0,0 +1,313 @@
+"""
+Management команда для массового импорта пользователей из CSV или JSONL
+"""
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from apps.authorization.models import Role
+from apps.users.hashers import encode_password, get_hasher
+
+User = get_user_model()
+
+NAME_FIELDS = ("first_name", "last_name", "patronymic")
+TRUE_VALUES = {"1", "true", "yes", "y", "да"}
+FALSE_VALUES = {"0", "false", "no", "n", "нет"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоковый импорт пользователей из CSV или JSONL: пароли хешируются в пуле "
+        "процессов на всех ядрах, пользователи записываются через bulk_create в транзакции "
+        "на каждую порцию. Прогресс сохраняется после каждой порции, повторный запуск "
+        "продолжает импорт, отклоненные строки записываются в отчет"
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл с пользователями (.csv или .jsonl)")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Формат файла (по умолчанию - по расширению)",
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Число строк в одной порции (транзакции)")
+        parser.add_argument("--batch-size", type=int, default=500, help="Число строк в одном INSERT")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Число процессов хеширования (по умолчанию - число ядер)",
+        )
+        parser.add_argument("--default-role", help="Роль для строк без роли")
+        parser.add_argument("--progress-file", help="Файл прогресса (по умолчанию - <path>.progress.json)")
+        parser.add_argument("--rejects-file", help="Отчет об отклоненных строках (по умолчанию - <path>.rejects.jsonl)")
+        parser.add_argument("--restart", action="store_true", help="Начать импорт заново, игнорируя сохраненный прогресс")
+    
+    def handle(self, *args, **options):
+        path = os.path.abspath(options["path"])
+        if not os.path.isfile(path):
+            raise CommandError(f"Файл не найден: {path}")
+        if options["chunk_size"] < 1 or options["batch_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--chunk-size, --batch-size и --workers должны быть положительными")
+        
+        file_format = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        progress_path = options["progress_file"] or f"{path}.progress.json"
+        rejects_path = options["rejects_file"] or f"{path}.rejects.jsonl"
+        
+        # Роли загружаются один раз, строки сопоставляются по имени без запросов
+        self.roles = {role.name: role for role in Role.objects.all()}
+        self.default_role = None
+        if options["default_role"]:
+            self.default_role = self.roles.get(options["default_role"])
+            if self.default_role is None:
+                raise CommandError(f"Роль не найдена: {options['default_role']}")
+        
+        hasher = get_hasher()
+        self.algorithm = hasher.algorithm
+        self.params = hasher.params()
+        self.batch_size = options["batch_size"]
+        self.workers = options["workers"]
+        
+        self.progress = self.load_progress(progress_path, path, options["restart"])
+        self.progress_path = progress_path
+        if self.progress["row"]:
+            self.stdout.write(
+                f"Продолжение импорта после строки {self.progress['row']} "
+                f"(создано: {self.progress['created']}, отклонено: {self.progress['rejected']})"
+            )
+        
+        started = time.perf_counter()
+        created_before = self.progress["created"]
+        rows = (
+            (number, record)
+            for number, record in read_records(path, file_format)
+            if number > self.progress["row"]
+        )
+        with open(rejects_path, "a" if self.progress["row"] else "w", encoding="utf-8") as rejects, \
+                ProcessPoolExecutor(max_workers=self.workers) as executor:
+            self.rejects = rejects
+            pending = None
+            # Пароли следующей порции хешируются, пока записывается текущая;
+            # в памяти не больше двух порций независимо от размера файла
+            for chunk in iter(lambda: list(islice(rows, options["chunk_size"])), []):
+                job = self.prepare_chunk(chunk, executor)
+                if pending is not None:
+                    self.write_chunk(pending)
+                pending = job
+            if pending is not None:
+                self.write_chunk(pending)
+        
+        elapsed = time.perf_counter() - started
+        created = self.progress["created"] - created_before
+        self.stdout.write(self.style.SUCCESS(
+            f"Импорт завершен: создано {self.progress['created']}, отклонено {self.progress['rejected']} "
+            f"({created / elapsed if elapsed else 0:.0f} пользователей/с)"
+        ))
+        if self.progress["rejected"]:
+            self.stdout.write(f"Отклоненные строки: {rejects_path}")
+    
+    def prepare_chunk(self, chunk, executor):
+        """Проверка строк порции и запуск хеширования паролей в пуле"""
+        job = ImportJob(last_row=chunk[-1][0])
+        passwords = []
+        seen = set()
+        for number, record in chunk:
+            user, password, errors = self.build_user(record)
+            if not errors and user.email in seen:
+                errors = ["email повторяется в файле"]
+            if errors:
+                job.reject(number, record, errors)
+                continue
+            seen.add(user.email)
+            job.users.append((number, user))
+            passwords.append(password.encode("utf-8"))
+        
+        # Уже существующие пользователи отклоняются до хеширования
+        existing = existing_emails(user.email for _, user in job.users)
+        if existing:
+            kept = []
+            for (number, user), password in zip(job.users, passwords):
+                if user.email in existing:
+                    job.reject(number, {"email": user.email}, ["пользователь с таким email уже существует"])
+                else:
+                    kept.append(((number, user), password))
+            job.users = [item for item, _ in kept]
+            passwords = [password for _, password in kept]
+        
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        job.hashes = executor.map(
+            encode_password,
+            repeat(self.algorithm),
+            passwords,
+            repeat(self.params),
+            chunksize=chunksize,
+        )
+        return job
+    
+    def write_chunk(self, job):
+        """Запись порции одной транзакцией и сохранение прогресса"""
+        for (_, user), encoded in zip(job.users, job.hashes):
+            user.password = encoded
+        
+        users = [user for _, user in job.users]
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users, batch_size=self.batch_size)
+        except IntegrityError:
+            # email занят между проверкой и вставкой (или повторяется в соседних порциях)
+            existing = existing_emails(user.email for user in users)
+            users = []
+            for number, user in job.users:
+                if user.email in existing:
+                    job.reject(number, {"email": user.email}, ["пользователь с таким email уже существует"])
+                else:
+                    users.append(user)
+            with transaction.atomic():
+                User.objects.bulk_create(users, batch_size=self.batch_size)
+        
+        for reject in job.rejected:
+            self.rejects.write(json.dumps(reject, ensure_ascii=False) + "\n")
+        self.rejects.flush()
+        
+        self.progress["row"] = job.last_row
+        self.progress["created"] += len(users)
+        self.progress["rejected"] += len(job.rejected)
+        save_progress(self.progress_path, self.progress)
+        self.stdout.write(
+            f"  строка {job.last_row}: создано {self.progress['created']}, "
+            f"отклонено {self.progress['rejected']}"
+        )
+    
+    def build_user(self, record):
+        """Пользователь без хеша пароля, пароль и список ошибок строки"""
+        if not isinstance(record, dict):
+            return None, None, [record if isinstance(record, str) else "ожидается JSON объект"]
+        
+        errors = []
+        email = str(record.get("email") or "").strip()
+        try:
+            validate_email(email)
+        except ValidationError:
+            errors.append("некорректный email")
+        if len(email) > 254:
+            errors.append("email длиннее 254 символов")
+        
+        password = record.get("password")
+        if not isinstance(password, str) or len(password) < 8:
+            errors.append("пароль должен содержать не менее 8 символов")
+        
+        names = {}
+        for field in NAME_FIELDS:
+            value = str(record.get(field) or "").strip()
+            if len(value) > 100:
+                errors.append(f"{field} длиннее 100 символов")
+            names[field] = value
+        
+        role = self.default_role
+        role_name = str(record.get("role") or "").strip()
+        if role_name:
+            role = self.roles.get(role_name)
+            if role is None:
+                errors.append(f"роль не найдена: {role_name}")
+        
+        is_active = parse_bool(record.get("is_active"), default=True)
+        if is_active is None:
+            errors.append("некорректное значение is_active")
+        
+        if errors:
+            return None, None, errors
+        user = User(
+            email=User.objects.normalize_email(email),
+            role=role,
+            is_active=is_active,
+            **names,
+        )
+        return user, password, []
+    
+    @staticmethod
+    def load_progress(progress_path, path, restart):
+        progress = {"source": path, "row": 0, "created": 0, "rejected": 0}
+        if restart or not os.path.exists(progress_path):
+            return progress
+        with open(progress_path, encoding="utf-8") as progress_file:
+            saved = json.load(progress_file)
+        if saved.get("source") != path:
+            raise CommandError(
+                f"Файл прогресса {progress_path} относится к {saved.get('source')}, "
+                "используйте --restart или --progress-file"
+            )
+        progress.update(saved)
+        return progress
+
+
+class ImportJob:
+    """Порция импорта: пользователи, их хеши (итератор результатов пула) и отклоненные строки"""
+    
+    def __init__(self, last_row):
+        self.last_row = last_row
+        self.users = []
+        self.hashes = ()
+        self.rejected = []
+    
+    def reject(self, number, record, errors):
+        email = record.get("email") if isinstance(record, dict) else None
+        self.rejected.append({"row": number, "email": email, "errors": errors})
+
+
+def read_records(path, file_format):
+    """
+    Потоковое чтение файла: пары (номер строки, запись).
+    Некорректная строка возвращается как текст ошибки вместо записи.
+    """
+    with open(path, encoding="utf-8-sig", newline="") as source:
+        if file_format == "csv":
+            for number, row in enumerate(csv.DictReader(source), start=1):
+                if None in row:
+                    yield number, "лишние значения в строке CSV"
+                else:
+                    yield number, row
+            return
+        
+        for number, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError as exc:
+                yield number, f"некорректный JSON: {exc}"
+
+
+def existing_emails(emails):
+    """Email из списка, уже занятые в БД (один запрос)"""
+    emails = list(emails)
+    if not emails:
+        return set()
+    return set(User.objects.order_by().filter(email__in=emails).values_list("email", flat=True))
+
+
+def parse_bool(value, default):
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    return None
+
+
+def save_progress(progress_path, progress):
+    """Атомарная запись прогресса: файл не остается обрезанным при падении"""
+    tmp_path = f"{progress_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as progress_file:
+        json.dump(progress, progress_file)
+    os.replace(tmp_path, progress_path)
@@ -0,0 +1,60 @@
+"""
+Management команда для отчета о распределении алгоритмов и стоимости хешей паролей
+"""
+from collections import Counter
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from apps.users.hashers import get_hasher, identify_hasher
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Распределение хранимых хешей паролей по алгоритмам и параметрам стоимости; "
+        "устаревшие хеши обновляются при следующем входе пользователя"
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--include-inactive",
+            action="store_true",
+            help="Учитывать неактивных (удаленных) пользователей",
+        )
+    
+    def handle(self, *args, **options):
+        users = User.objects.order_by()
+        if not options["include_inactive"]:
+            users = users.filter(is_active=True)
+        
+        current = get_hasher()
+        current_params = current.params()
+        distribution = Counter()
+        for encoded in users.values_list("password", flat=True).iterator(chunk_size=2000):
+            try:
+                hasher = identify_hasher(encoded)
+                cost = tuple(sorted(hasher.cost(encoded).items()))
+                distribution[(hasher.algorithm, cost)] += 1
+            except ValueError:
+                distribution[("unknown", ())] += 1
+        
+        total = sum(distribution.values())
+        self.stdout.write(
+            f"Текущий алгоритм: {settings.PASSWORD_HASHER} "
+            f"({', '.join(f'{name}={value}' for name, value in current_params.items())})"
+        )
+        if not total:
+            self.stdout.write("Хешей паролей нет")
+            return
+        
+        outdated = 0
+        for (algorithm, cost), count in distribution.most_common():
+            is_current = algorithm == current.algorithm and dict(cost) == current_params
+            if not is_current:
+                outdated += count
+            params = ", ".join(f"{name}={value}" for name, value in cost) or "-"
+            mark = "" if is_current else "  (устарел)"
+            self.stdout.write(f"  {algorithm:<8} {params:<40} {count:>8} {count / total:>7.1%}{mark}")
+        
+        self.stdout.write(f"Всего: {total}, устаревших: {outdated} ({outdated / total:.1%})")
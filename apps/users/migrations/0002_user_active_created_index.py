@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_active', 'created_at', 'id'], name='user_active_created_idx'),
+        ),
+    ]
@@ -1,8 +1,15 @@
 import uuid
-import bcrypt
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from apps.authorization.models import Role
+from apps.users.hashers import needs_rehash
+from apps.users.hashing import (
+    PasswordHashingBusy,
+    ahash_password,
+    averify_password,
+    hash_password,
+    verify_password,
+)
 
 
 class UserManager(BaseUserManager):
@@ -62,24 +69,55 @@ class User(AbstractBaseUser):
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
         ordering = ["-created_at"]
+        indexes = [
+            # Страницы списка активных пользователей (KeysetPagination)
+            models.Index(fields=["is_active", "created_at", "id"], name="user_active_created_idx"),
+        ]
     
     def __str__(self):
         return self.email
     
     def set_password(self, raw_password):
-        """Хеширование пароля с помощью bcrypt"""
-        salt = bcrypt.gensalt()
-        self.password = bcrypt.hashpw(raw_password.encode("utf-8"), salt).decode("utf-8")
+        """Хеширование пароля алгоритмом PASSWORD_HASHER (в пуле хеширования)"""
+        self.password = hash_password(raw_password)
     
     def check_password(self, raw_password):
-        """Проверка пароля"""
+        """Проверка пароля (в пуле хеширования)"""
+        return verify_password(raw_password, self.password)
+    
+    def upgrade_password(self, raw_password):
+        """
+        Перехеширование уже проверенного пароля, если хеш создан другим
+        алгоритмом или с устаревшей стоимостью. Возвращает True, если хеш обновлен.
+        """
+        if not needs_rehash(self.password):
+            return False
+        try:
+            self.set_password(raw_password)
+        except PasswordHashingBusy:
+            # Пул занят: вход не задерживается, хеш обновится при следующем входе
+            return False
+        User.objects.filter(pk=self.pk).update(password=self.password)
+        return True
+    
+    async def aset_password(self, raw_password):
+        """Асинхронный вариант set_password"""
+        self.password = await ahash_password(raw_password)
+    
+    async def acheck_password(self, raw_password):
+        """Асинхронный вариант check_password"""
+        return await averify_password(raw_password, self.password)
+    
+    async def aupgrade_password(self, raw_password):
+        """Асинхронный вариант upgrade_password"""
+        if not needs_rehash(self.password):
+            return False
         try:
-            return bcrypt.checkpw(
-                raw_password.encode("utf-8"),
-                self.password.encode("utf-8")
-            )
-        except (AttributeError, ValueError):
+            await self.aset_password(raw_password)
+        except PasswordHashingBusy:
             return False
+        await User.objects.filter(pk=self.pk).aupdate(password=self.password)
+        return True
     
     @property
     def is_authenticated(self):
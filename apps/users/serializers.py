@@ -3,11 +3,12 @@
 """
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from apps.monitoring.timing import TimedSerializerMixin
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для отображения пользователя"""
     role_name = serializers.CharField(source="role.name", read_only=True)
     full_name = serializers.CharField(read_only=True)
@@ -30,7 +31,7 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at"]
 
 
-class UserUpdateSerializer(serializers.ModelSerializer):
+class UserUpdateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для обновления пользователя"""
     
     class Meta:
@@ -42,7 +43,7 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         ]
 
 
-class UserListSerializer(serializers.ModelSerializer):
+class UserListSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для списка пользователей (для админа)"""
     role_name = serializers.CharField(source="role.name", read_only=True)
     full_name = serializers.CharField(read_only=True)
@@ -1,3 +1,259 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from unittest import mock, skipIf
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APITestCase
+from apps.authentication.throttling import login_throttle
+from apps.authorization.models import Role
+from apps.users import hashers
+from apps.users.hashers import UnknownHashFormat, identify_hasher, needs_rehash
+from apps.users.management.commands.import_users import Command as ImportUsersCommand
+from tests import query_budget
+from tests.query_budget import Endpoint
+from tests.support import api_request, load_test_users
 
-# Create your tests here.
+User = get_user_model()
+
+
+class UsersQueryBudgetTests(query_budget.QueryBudgetTestCase):
+    """Бюджеты SQL запросов endpoints /api/users/"""
+    endpoints = [
+        Endpoint("GET", "/api/users/", 2),
+        Endpoint("GET", "/api/users/?limit=100", 2),
+        Endpoint("GET", "/api/users/{other_user_id}/", 2),
+        Endpoint("GET", "/api/users/me/", 1),
+        Endpoint("PATCH", "/api/users/me/", 2, {"first_name": "Имя"}),
+        Endpoint("POST", "/api/users/me/authorize/", 1, {"checks": [
+            {"element_code": "products", "action": "read"},
+            {"element_code": "orders", "action": "update", "owner_id": "00000000-0000-0000-0000-000000000000"},
+        ]}),
+    ]
+
+
+class UserListPaginationTests(APITestCase):
+    """Курсорная пагинация списка пользователей: число запросов не зависит от размера страницы"""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = load_test_users()
+        cls.admin = users["admin"]
+        User.objects.bulk_create([
+            User(email=f"extra{index}@example.com", role=users["user"].role) for index in range(10)
+        ])
+
+    def test_pages_cover_active_users(self):
+        User.objects.filter(email="extra0@example.com").update(is_active=False)
+        url, emails = "/api/users/?limit=3", []
+        while url:
+            body = api_request(self.client, self.admin, "GET", url).json()
+            self.assertLessEqual(len(body["users"]), 3)
+            emails.extend(item["email"] for item in body["users"])
+            url = body["next"]
+
+        expected = list(User.objects.filter(is_active=True).order_by("-created_at", "-id").values_list("email", flat=True))
+        self.assertEqual(emails, expected)
+        self.assertNotIn("extra0@example.com", emails)
+
+    def test_query_count_independent_of_page_size(self):
+        counts = []
+        for limit in (1, 100):
+            api_request(self.client, self.admin, "GET", f"/api/users/?limit={limit}")
+            with CaptureQueriesContext(connection) as queries:
+                body = api_request(self.client, self.admin, "GET", f"/api/users/?limit={limit}").json()
+            self.assertTrue(all(item["role_name"] for item in body["users"]))
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        response = api_request(self.client, self.admin, "GET", "/api/users/?cursor=garbage")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"error": "Некорректный курсор"})
+
+
+@override_settings(
+    PASSWORD_HASHING_EXECUTOR="inline",
+    PASSWORD_BCRYPT_ROUNDS=4,
+    PASSWORD_SCRYPT_N=2 ** 10,
+)
+class PasswordHasherTests(TestCase):
+    """Определение алгоритма по хешу и перехеширование при входе"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("hasher@example.com", "password123")
+
+    def setUp(self):
+        login_throttle.reset()
+        self.addCleanup(login_throttle.reset)
+
+    def login(self, password):
+        return APIClient().post(
+            "/api/auth/login/", {"email": "hasher@example.com", "password": password}, format="json",
+        )
+
+    def stored_hash(self):
+        return User.objects.values_list("password", flat=True).get(pk=self.user.pk)
+
+    def test_identify_hasher(self):
+        self.assertEqual(identify_hasher(self.user.password).algorithm, "bcrypt")
+        with override_settings(PASSWORD_HASHER="scrypt"):
+            self.user.set_password("password123")
+        self.assertEqual(identify_hasher(self.user.password).algorithm, "scrypt")
+        self.assertTrue(self.user.check_password("password123"))
+        for encoded in ("", "md5$abc", "pbkdf2_sha256$1$a$b"):
+            with self.subTest(encoded):
+                with self.assertRaises(UnknownHashFormat):
+                    identify_hasher(encoded)
+                self.assertFalse(User(password=encoded).check_password("password123"))
+
+    def test_needs_rehash(self):
+        encoded = self.user.password
+        self.assertFalse(needs_rehash(encoded))
+        with override_settings(PASSWORD_BCRYPT_ROUNDS=5):
+            self.assertTrue(needs_rehash(encoded))
+        with override_settings(PASSWORD_HASHER="scrypt"):
+            self.assertTrue(needs_rehash(encoded))
+        self.assertFalse(needs_rehash("unknown$hash"))
+
+    def test_login_upgrades_bcrypt_hash(self):
+        # argon2-cffi может быть не установлен, поэтому целевой алгоритм - scrypt
+        with override_settings(PASSWORD_HASHER="scrypt"):
+            self.assertEqual(self.login("password123").status_code, 200)
+            encoded = self.stored_hash()
+            self.assertEqual(identify_hasher(encoded).algorithm, "scrypt")
+            self.assertFalse(needs_rehash(encoded))
+
+            self.assertEqual(self.login("password123").status_code, 200)
+            self.assertEqual(self.stored_hash(), encoded)
+
+    @skipIf(hashers.argon2 is None, "argon2-cffi не установлен")
+    @override_settings(PASSWORD_HASHER="argon2", PASSWORD_ARGON2_MEMORY_COST=1024, PASSWORD_ARGON2_TIME_COST=1)
+    def test_login_upgrades_bcrypt_hash_to_argon2(self):
+        self.assertEqual(self.login("password123").status_code, 200)
+        self.assertEqual(identify_hasher(self.stored_hash()).algorithm, "argon2")
+
+    def test_login_upgrades_bcrypt_cost(self):
+        with override_settings(PASSWORD_BCRYPT_ROUNDS=5):
+            self.assertEqual(self.login("password123").status_code, 200)
+            self.assertEqual(identify_hasher(self.stored_hash()).cost(self.stored_hash()), {"rounds": 5})
+
+    def test_failed_login_does_not_rehash(self):
+        encoded = self.stored_hash()
+        with override_settings(PASSWORD_HASHER="scrypt"):
+            self.assertEqual(self.login("wrong-password").status_code, 401)
+        self.assertEqual(self.stored_hash(), encoded)
+
+
+@override_settings(PASSWORD_BCRYPT_ROUNDS=4)
+class ImportUsersTests(TestCase):
+    """Импорт пользователей: продолжение после сбоя, отчет об ошибках и дубликаты"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Role.objects.get_or_create(name="user")
+        User.objects.create_user("existing@example.com", "password123", first_name="Старый")
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "users.jsonl")
+
+    def write(self, records):
+        with open(self.path, "w", encoding="utf-8") as source:
+            for record in records:
+                source.write((record if isinstance(record, str) else json.dumps(record)) + "\n")
+
+    def run_import(self, **options):
+        call_command("import_users", self.path, workers=1, stdout=io.StringIO(), **options)
+
+    def rejects(self):
+        with open(f"{self.path}.rejects.jsonl", encoding="utf-8") as rejects:
+            return {reject["row"]: reject for reject in map(json.loads, rejects)}
+
+    def progress(self):
+        with open(f"{self.path}.progress.json", encoding="utf-8") as progress:
+            return json.load(progress)
+
+    @staticmethod
+    def user(number, **fields):
+        return {"email": f"import-{number}@example.com", "password": "password123", **fields}
+
+    def imported(self):
+        return set(User.objects.filter(email__startswith="import-").values_list("email", flat=True))
+
+    def test_resumes_after_last_committed_chunk(self):
+        self.write([self.user(number) for number in range(1, 7)])
+        write_chunk = ImportUsersCommand.write_chunk
+        calls = []
+
+        def fail_on_second_chunk(command, job):
+            calls.append(job.last_row)
+            if len(calls) == 2:
+                raise RuntimeError("прервано")
+            return write_chunk(command, job)
+
+        with mock.patch.object(ImportUsersCommand, "write_chunk", fail_on_second_chunk):
+            with self.assertRaises(RuntimeError):
+                self.run_import(chunk_size=2)
+        self.assertEqual(self.imported(), {"import-1@example.com", "import-2@example.com"})
+        self.assertEqual(self.progress()["row"], 2)
+
+        self.run_import(chunk_size=2)
+        self.assertEqual(self.imported(), {f"import-{number}@example.com" for number in range(1, 7)})
+        self.assertEqual(self.progress(), {"source": self.path, "row": 6, "created": 6, "rejected": 0})
+        self.assertTrue(User.objects.get(email="import-5@example.com").check_password("password123"))
+
+    def test_bad_rows_written_to_rejects(self):
+        self.write([
+            self.user(1),
+            self.user(2, email="not-an-email"),
+            self.user(3, password="short"),
+            self.user(4, role="missing"),
+            self.user(5, is_active="maybe"),
+            "{broken json",
+            "[1, 2]",
+            self.user(8, role="user", is_active="нет"),
+        ])
+        self.run_import()
+
+        self.assertEqual(self.imported(), {"import-1@example.com", "import-8@example.com"})
+        imported = User.objects.get(email="import-8@example.com")
+        self.assertEqual((imported.role.name, imported.is_active), ("user", False))
+        rejects = self.rejects()
+        self.assertEqual(sorted(rejects), [2, 3, 4, 5, 6, 7])
+        self.assertEqual(rejects[2]["errors"], ["некорректный email"])
+        self.assertEqual(rejects[4]["errors"], ["роль не найдена: missing"])
+        self.assertTrue(rejects[6]["errors"][0].startswith("некорректный JSON"))
+        self.assertEqual(self.progress()["rejected"], 6)
+
+    def test_duplicates_skipped(self):
+        self.write([
+            self.user(1),
+            self.user(1, first_name="Повтор"),
+            self.user(2, email="existing@example.com"),
+            self.user(3),
+        ])
+        self.run_import()
+
+        self.assertEqual(self.imported(), {"import-1@example.com", "import-3@example.com"})
+        self.assertEqual(User.objects.get(email="import-1@example.com").first_name, "")
+        self.assertEqual(User.objects.get(email="existing@example.com").first_name, "Старый")
+        rejects = self.rejects()
+        self.assertEqual(rejects[2]["errors"], ["email повторяется в файле"])
+        self.assertEqual(rejects[3]["errors"], ["пользователь с таким email уже существует"])
+
+    def test_integrity_error_falls_back_to_remaining_rows(self):
+        # Следующая порция проверяется до записи текущей, поэтому повтор
+        # из соседней порции обнаруживается только по нарушению уникальности
+        self.write([self.user(1), self.user(2), self.user(1), self.user(3)])
+        self.run_import(chunk_size=2)
+
+        self.assertEqual(
+            self.imported(), {"import-1@example.com", "import-2@example.com", "import-3@example.com"},
+        )
+        self.assertEqual(self.rejects()[3]["errors"], ["пользователь с таким email уже существует"])
+        self.assertEqual(self.progress()["created"], 3)
@@ -6,20 +6,25 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth import get_user_model
-from apps.authorization.permissions import IsAdmin
+from apps.authentication.principal import TokenPrincipal
+from apps.authentication.revocation import revocation_list
+from apps.authorization.permissions import IsAdmin, authorize_many
+from apps.authorization.serializers import AuthorizationBatchSerializer
 from apps.users.serializers import (
     UserSerializer,
     UserUpdateSerializer,
     UserListSerializer,
 )
+from config.pagination import KeysetPagination
 
 User = get_user_model()
 
 
 class UserViewSet(viewsets.ModelViewSet):
     """ViewSet для работы с пользователями"""
-    queryset = User.objects.filter(is_active=True)
+    queryset = User.objects.filter(is_active=True).select_related("role")
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_serializer_class(self):
         if self.action == "list":
@@ -38,6 +43,13 @@ class UserViewSet(viewsets.ModelViewSet):
     def me(self, request):
         """Получение, обновление или удаление текущего пользователя"""
         user = request.user
+        if isinstance(user, TokenPrincipal):
+            user = user.load_user()
+            if user is None:
+                return Response(
+                    {"error": "Пользователь не найден"},
+                    status=status.HTTP_401_UNAUTHORIZED,
+                )
         
         if request.method == "GET":
             serializer = UserSerializer(user)
@@ -55,16 +67,34 @@ class UserViewSet(viewsets.ModelViewSet):
             # Мягкое удаление
             user.is_active = False
             user.save()
+            revocation_list.revoke_all_for_user(user.id)
             return Response(
                 {"message": "Аккаунт успешно удален"},
                 status=status.HTTP_200_OK,
             )
     
+    @action(detail=False, methods=["post"], url_path="me/authorize")
+    def authorize(self, request):
+        """
+        Пакетная проверка прав текущего пользователя: список
+        (element_code, action, owner_id) -> список булевых значений в том же порядке
+        """
+        serializer = AuthorizationBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = authorize_many(request, serializer.validated_data["checks"])
+        return Response({"results": results})
+    
     def list(self, request, *args, **kwargs):
-        """Список пользователей (только для админа)"""
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        """Список пользователей (только для админа) с курсорной пагинацией"""
+        # Только колонки UserListSerializer, страница - по индексу (is_active, created_at, id)
+        queryset = self.filter_queryset(self.get_queryset()).only(
+            "id", "email", "first_name", "last_name", "patronymic", "is_active", "created_at", "role__name",
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.paginator.get_paginated_response(serializer.data, key="users")
     
     def retrieve(self, request, *args, **kwargs):
         """Детали пользователя (только для админа)"""
@@ -24,6 +24,60 @@ class EnvSettings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    JWT_KEYS_FILE: str = ""
+    JWT_KEYS_RELOAD_SECONDS: int = 30
+    JWT_JWKS_MAX_AGE_SECONDS: int = 3600
+    JWT_STATELESS: bool = False
+    JWT_ASYNC_VIEWS: bool = False
+    JWT_USER_CACHE_SIZE: int = 10000
+    JWT_USER_CACHE_TTL_SECONDS: int = 30
+    JWT_USER_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    JWT_TOKEN_CACHE_SIZE: int = 10000
+    JWT_TOKEN_NEGATIVE_TTL_SECONDS: int = 30
+    JWT_REVOCATION_SYNC_SECONDS: int = 5
+    JWT_REVOCATION_SWEEP_SECONDS: int = 3600
+    JWT_REVOCATION_BLOOM_CAPACITY: int = 100000
+    JWT_REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    JWT_INTROSPECT_MAX_BATCH: int = 100
+    JWT_INTROSPECT_MAX_AGE_SECONDS: int = 60
+    
+    # Login throttling settings
+    LOGIN_THROTTLE_STORE: str = "memory"
+    LOGIN_THROTTLE_CACHE_ALIAS: str = "default"
+    LOGIN_THROTTLE_EMAIL_LIMIT: int = 5
+    LOGIN_THROTTLE_EMAIL_WINDOW_SECONDS: int = 300
+    LOGIN_THROTTLE_IP_LIMIT: int = 50
+    LOGIN_THROTTLE_IP_WINDOW_SECONDS: int = 300
+    LOGIN_THROTTLE_TRUSTED_PROXIES: int = 0
+    
+    # Password hashing settings
+    PASSWORD_HASHING_EXECUTOR: str = "thread"
+    PASSWORD_HASHING_WORKERS: int = 2
+    PASSWORD_HASHING_QUEUE_SIZE: int = 16
+    PASSWORD_HASHER: str = "bcrypt"
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_SCRYPT_N: int = 2 ** 15
+    PASSWORD_SCRYPT_R: int = 8
+    PASSWORD_SCRYPT_P: int = 1
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_COST: int = 65536
+    PASSWORD_ARGON2_PARALLELISM: int = 4
+    
+    # RBAC settings
+    RBAC_MATRIX_TTL_SECONDS: int = 60
+    RBAC_AUTHORIZE_MAX_CHECKS: int = 200
+    
+    # Monitoring settings
+    REQUEST_TIMING_HEADER: bool = False
+    SLOW_REQUEST_THRESHOLD_MS: int = 1000
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str = ""
+    METRICS_MULTIPROC_DIR: str = ""
+    METRICS_FLUSH_SECONDS: float = 5.0
+    PROFILING_ENABLED: bool = False
+    PROFILING_DIR: str = ""
+    PROFILING_MAX_PROFILES: int = 20
+    PROFILING_SAMPLE_INTERVAL_MS: float = 5.0
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,116 @@
+"""
+Keyset (cursor) пагинация списков моделей с полями created_at и id.
+
+Объекты упорядочены по (created_at, id) от новых к старым, курсор хранит
+ключ последнего (или первого, для предыдущей страницы) объекта страницы.
+Следующая страница - условие created_at <= c AND (created_at < c OR id < i)
+по индексу (created_at, id) или (owner_id, created_at, id), поэтому дальние
+страницы стоят столько же, сколько первая (в отличие от OFFSET).
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Параметры запроса: ?limit= (не больше max_limit) и ?cursor= из ссылок
+    next/previous предыдущего ответа.
+    """
+    default_limit = api_settings.PAGE_SIZE or 20
+    max_limit = 100
+    limit_query_param = "limit"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Некорректный курсор"
+
+    def paginate_queryset(self, queryset, request, view=None) -> List:
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.limit = self.get_limit(request)
+        cursor = self.decode_cursor(request, queryset.model)
+        self.has_next = self.has_previous = False
+
+        if cursor is None:
+            created_at = object_id = None
+            reverse = False
+        else:
+            created_at, object_id, reverse = cursor
+
+        if reverse:
+            # Предыдущая страница: объекты новее курсора в обратном порядке
+            if created_at is not None:
+                queryset = queryset.filter(
+                    Q(created_at__gte=created_at) & (Q(created_at__gt=created_at) | Q(id__gt=object_id))
+                )
+            queryset = queryset.order_by("created_at", "id")
+        else:
+            if created_at is not None:
+                queryset = queryset.filter(
+                    Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(id__lt=object_id))
+                )
+            queryset = queryset.order_by("-created_at", "-id")
+
+        # Лишний объект показывает, есть ли страница дальше, без COUNT(*)
+        page = list(queryset[:self.limit + 1])
+        has_more = len(page) > self.limit
+        page = page[:self.limit]
+        if reverse:
+            page.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = page
+        return page
+
+    def get_paginated_response(self, data, key: str = "results") -> Response:
+        return Response({key: data, "next": self.get_next_link(), "previous": self.get_previous_link()})
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Курсор за последним объектом: предыдущая страница - первая
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_limit(self, request) -> int:
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return min(limit, self.max_limit) if limit > 0 else self.default_limit
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            data: Dict = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            object_id = model._meta.pk.to_python(data["i"])
+            return datetime.fromisoformat(data["c"]), object_id, bool(data.get("r"))
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, ValidationError):
+            # Словарь в detail отдается как есть: {"error": "..."} в любом ViewSet
+            raise NotFound({"error": self.invalid_cursor_message})
+
+    def encode_cursor(self, obj, reverse: bool) -> str:
+        # id - число или UUID (пользователи), в JSON хранится как есть или строкой
+        object_id = obj.pk if isinstance(obj.pk, int) else str(obj.pk)
+        data = {"c": obj.created_at.isoformat(), "i": object_id}
+        if reverse:
+            data["r"] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
@@ -43,15 +43,18 @@ INSTALLED_APPS = [
     "apps.authentication",
     "apps.authorization",
     "apps.business",
+    "apps.monitoring",
 ]
 
 MIDDLEWARE = [
+    "apps.monitoring.middleware.RequestTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "apps.authentication.middleware.JWTAuthenticationMiddleware",
+    "apps.monitoring.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -146,13 +149,111 @@ JWT_SECRET_KEY = env_settings.JWT_SECRET_KEY
 JWT_ALGORITHM = env_settings.JWT_ALGORITHM
 JWT_ACCESS_TOKEN_EXPIRE_MINUTES = env_settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES
 JWT_REFRESH_TOKEN_EXPIRE_DAYS = env_settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS
+# Асимметричные ключи подписи (RS256/ES256/EdDSA) с kid, пустое значение - HS с JWT_SECRET_KEY
+JWT_KEYS_FILE = env_settings.JWT_KEYS_FILE
+JWT_KEYS_RELOAD_SECONDS = env_settings.JWT_KEYS_RELOAD_SECONDS
+JWT_JWKS_MAX_AGE_SECONDS = env_settings.JWT_JWKS_MAX_AGE_SECONDS
+# Stateless режим: роль и права передаются в claims access токена
+JWT_STATELESS = env_settings.JWT_STATELESS
+# Кэш пользователей в JWTAuthenticationMiddleware (размер 0 отключает кэш)
+JWT_USER_CACHE_SIZE = env_settings.JWT_USER_CACHE_SIZE
+JWT_USER_CACHE_TTL_SECONDS = env_settings.JWT_USER_CACHE_TTL_SECONDS
+JWT_USER_CACHE_MAX_BYTES = env_settings.JWT_USER_CACHE_MAX_BYTES
+# Кэш проверенных токенов (размер 0 отключает кэш) и время жизни отклоненных токенов
+JWT_TOKEN_CACHE_SIZE = env_settings.JWT_TOKEN_CACHE_SIZE
+JWT_TOKEN_NEGATIVE_TTL_SECONDS = env_settings.JWT_TOKEN_NEGATIVE_TTL_SECONDS
+# Отзыв токенов: период синхронизации с БД, период очистки истекших записей, параметры фильтра Блума
+JWT_REVOCATION_SYNC_SECONDS = env_settings.JWT_REVOCATION_SYNC_SECONDS
+JWT_REVOCATION_SWEEP_SECONDS = env_settings.JWT_REVOCATION_SWEEP_SECONDS
+JWT_REVOCATION_BLOOM_CAPACITY = env_settings.JWT_REVOCATION_BLOOM_CAPACITY
+JWT_REVOCATION_BLOOM_ERROR_RATE = env_settings.JWT_REVOCATION_BLOOM_ERROR_RATE
+# Introspection: максимальное число токенов в запросе и верхняя граница max-age ответа (отзыв токена
+# становится виден кэшу шлюза не позже чем через это время)
+JWT_INTROSPECT_MAX_BATCH = env_settings.JWT_INTROSPECT_MAX_BATCH
+JWT_INTROSPECT_MAX_AGE_SECONDS = env_settings.JWT_INTROSPECT_MAX_AGE_SECONDS
+# Префиксы путей, для которых JWTAuthenticationMiddleware не выполняет аутентификацию
+JWT_AUTH_EXEMPT_PATHS = ["/admin/", f"/{STATIC_URL}", f"/{MEDIA_URL}"]
+# Асинхронные views регистрации, входа и обновления токена (для запуска под ASGI)
+JWT_ASYNC_VIEWS = env_settings.JWT_ASYNC_VIEWS
+
+# Login Throttling Settings
+# Хранилище счетчиков неудачных входов: "memory" (один узел) или "cache" (кэш Django с алиасом LOGIN_THROTTLE_CACHE_ALIAS)
+LOGIN_THROTTLE_STORE = env_settings.LOGIN_THROTTLE_STORE
+LOGIN_THROTTLE_CACHE_ALIAS = env_settings.LOGIN_THROTTLE_CACHE_ALIAS
+# Допустимое число неудачных входов за окно по email и по IP клиента (0 отключает ограничение)
+LOGIN_THROTTLE_EMAIL_LIMIT = env_settings.LOGIN_THROTTLE_EMAIL_LIMIT
+LOGIN_THROTTLE_EMAIL_WINDOW_SECONDS = env_settings.LOGIN_THROTTLE_EMAIL_WINDOW_SECONDS
+LOGIN_THROTTLE_IP_LIMIT = env_settings.LOGIN_THROTTLE_IP_LIMIT
+LOGIN_THROTTLE_IP_WINDOW_SECONDS = env_settings.LOGIN_THROTTLE_IP_WINDOW_SECONDS
+# Число доверенных обратных прокси перед приложением: при 0 IP клиента - REMOTE_ADDR,
+# иначе адрес, который дописал в X-Forwarded-For самый дальний доверенный прокси
+LOGIN_THROTTLE_TRUSTED_PROXIES = env_settings.LOGIN_THROTTLE_TRUSTED_PROXIES
+
+# Password Hashing Settings
+# Пул хеширования паролей: "thread", "process" или "inline", число воркеров и длина очереди
+PASSWORD_HASHING_EXECUTOR = env_settings.PASSWORD_HASHING_EXECUTOR
+PASSWORD_HASHING_WORKERS = env_settings.PASSWORD_HASHING_WORKERS
+PASSWORD_HASHING_QUEUE_SIZE = env_settings.PASSWORD_HASHING_QUEUE_SIZE
+# Алгоритм для новых хешей: "bcrypt", "scrypt" или "argon2" (если установлен argon2-cffi)
+PASSWORD_HASHER = env_settings.PASSWORD_HASHER
+# Параметры стоимости; хеши с другими параметрами обновляются при входе
+PASSWORD_BCRYPT_ROUNDS = env_settings.PASSWORD_BCRYPT_ROUNDS
+PASSWORD_SCRYPT_N = env_settings.PASSWORD_SCRYPT_N
+PASSWORD_SCRYPT_R = env_settings.PASSWORD_SCRYPT_R
+PASSWORD_SCRYPT_P = env_settings.PASSWORD_SCRYPT_P
+PASSWORD_ARGON2_TIME_COST = env_settings.PASSWORD_ARGON2_TIME_COST
+PASSWORD_ARGON2_MEMORY_COST = env_settings.PASSWORD_ARGON2_MEMORY_COST
+PASSWORD_ARGON2_PARALLELISM = env_settings.PASSWORD_ARGON2_PARALLELISM
+
+# RBAC Settings
+# Максимальное время жизни матрицы прав в памяти воркера (секунды)
+RBAC_MATRIX_TTL_SECONDS = env_settings.RBAC_MATRIX_TTL_SECONDS
+# Максимальное число проверок в одном запросе /api/users/me/authorize/
+RBAC_AUTHORIZE_MAX_CHECKS = env_settings.RBAC_AUTHORIZE_MAX_CHECKS
+
+# Monitoring Settings
+# Длительности фаз запроса (jwt, auth, perm, serialize, hash, db) в заголовке Server-Timing
+REQUEST_TIMING_HEADER = env_settings.REQUEST_TIMING_HEADER
+# Запросы дольше порога (мс) пишутся в журнал медленных запросов вместе с SQL; 0 - отключено
+SLOW_REQUEST_THRESHOLD_MS = env_settings.SLOW_REQUEST_THRESHOLD_MS
+# Счетчики и гистограммы задержек горячих путей, endpoint /metrics в формате Prometheus
+METRICS_ENABLED = env_settings.METRICS_ENABLED
+# Bearer токен для доступа к /metrics; пустое значение - без проверки (закрывается на уровне сети)
+METRICS_TOKEN = env_settings.METRICS_TOKEN
+# Каталог снимков метрик воркеров (gunicorn/uvicorn с несколькими процессами); пусто - один процесс
+METRICS_MULTIPROC_DIR = env_settings.METRICS_MULTIPROC_DIR
+# Период сохранения снимка метрик воркера в METRICS_MULTIPROC_DIR (секунды)
+METRICS_FLUSH_SECONDS = env_settings.METRICS_FLUSH_SECONDS
+# Профилирование отдельных запросов администратором (заголовок X-Profile); выключено - без накладных расходов
+PROFILING_ENABLED = env_settings.PROFILING_ENABLED
+# Каталог артефактов профилей (pstats, collapsed stacks, разница снимков tracemalloc)
+PROFILING_DIR = env_settings.PROFILING_DIR or str(BASE_DIR / "profiles")
+# Число хранимых профилей, старые удаляются
+PROFILING_MAX_PROFILES = env_settings.PROFILING_MAX_PROFILES
+# Интервал сэмплирования стека в режиме sample (мс)
+PROFILING_SAMPLE_INTERVAL_MS = env_settings.PROFILING_SAMPLE_INTERVAL_MS
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "apps.monitoring": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
 
 # REST Framework settings
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": [],
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "apps.authentication.authentication.JWTMiddlewareAuthentication",
+    ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
+    # Без явного значения DRF считает IP клиента весь заголовок X-Forwarded-For
+    "NUM_PROXIES": LOGIN_THROTTLE_TRUSTED_PROXIES,
 }
@@ -0,0 +1,27 @@
+"""
+Настройки для офлайн бенчмарков (benchmark_hot_paths): SQLite в памяти,
+без PostgreSQL и других внешних сервисов.
+
+python manage.py benchmark_hot_paths --settings=config.settings_bench
+"""
+import os
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-jwt-secret-key-0123456789abcdef")
+
+from config.settings import *  # noqa: E402,F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ["testserver", "localhost"]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
+
+# Стоимость bcrypt замеряется отдельно (check_password); в запросах login
+# минимальная стоимость, чтобы замер отражал накладные расходы стека
+PASSWORD_HASHER = "bcrypt"
+PASSWORD_BCRYPT_ROUNDS = 4
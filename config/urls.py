@@ -24,4 +24,5 @@ urlpatterns = [
     path("api/users/", include("apps.users.urls")),
     path("api/admin/", include("apps.authorization.urls")),
     path("api/", include("apps.business.urls")),
+    path("", include("apps.monitoring.urls")),
 ]
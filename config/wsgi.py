@@ -11,6 +11,11 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from apps.monitoring.metrics import registry
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+# Снимки метрик воркеров (METRICS_MULTIPROC_DIR) пишут только процессы сервера
+registry.start()
@@ -0,0 +1,3 @@
+"""
+Общие средства тестов приложений (не входят в код приложений)
+"""
@@ -0,0 +1,135 @@
+"""
+Тестовый стенд бюджетов SQL запросов для endpoints.
+
+Каждый endpoint из QueryBudgetTestCase.endpoints вызывается от имени
+пользователей с ролями admin, manager, user и guest; тест падает с
+перечнем выполненных запросов, если их больше бюджета. Кэш пользователей
+сбрасывается перед каждым запросом, поэтому бюджет учитывает загрузку
+пользователя. Матрица прав и список отозванных токенов синхронизируются
+заранее: они обновляются раз в TTL на процесс, а не на каждый запрос.
+"""
+from itertools import count
+from typing import Dict, List, NamedTuple, Optional
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from apps.authentication.cache import user_cache
+from apps.authentication.revocation import revocation_list
+from apps.authentication.utils import generate_access_token, generate_refresh_token
+from apps.authorization.matrix import permission_matrix
+from apps.authorization.models import AccessRoleRule, BusinessElement, Role
+from apps.business.models import Order, Product, Store
+from apps.users.hashing import hash_password
+from tests.support import ROLES, api_request, load_test_users
+
+User = get_user_model()
+
+PASSWORD = "password123"
+
+
+class Endpoint(NamedTuple):
+    """
+    Endpoint с бюджетом запросов. В path и строковых значениях data
+    подставляются параметры из QueryBudgetTestCase.get_params.
+    """
+    method: str
+    path: str
+    budget: int
+    data: Optional[Dict] = None
+
+
+@override_settings(
+    PASSWORD_BCRYPT_ROUNDS=4,
+    PASSWORD_HASHING_EXECUTOR="inline",
+    JWT_REVOCATION_SYNC_SECONDS=3600,
+    RBAC_MATRIX_TTL_SECONDS=3600,
+)
+class QueryBudgetTestCase(TestCase):
+    """
+    Базовый класс: наследники задают endpoints. В модулях тестов импортируется
+    как query_budget.QueryBudgetTestCase, чтобы сам базовый класс не запускался.
+    """
+    endpoints: List[Endpoint] = []
+    # Дополнительные пользователи, чтобы N+1 в списках превышал бюджет
+    extra_users = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = load_test_users()
+        roles = {role.name: role for role in Role.objects.all()}
+        User.objects.bulk_create([
+            User(email=f"extra{index}@example.com", role=roles["user"])
+            for index in range(cls.extra_users)
+        ])
+        User.objects.update(password=hash_password(PASSWORD))
+        for user in cls.users.values():
+            user.refresh_from_db()
+
+        cls.rule = AccessRoleRule.objects.get(role=roles["user"], element__code="products")
+        cls.element = BusinessElement.objects.get(code="products")
+        # Объекты пользователя с ролью user: для него это свои объекты, для остальных - чужие
+        cls.owned = {
+            f"{model._meta.model_name}_id": model.objects.filter(owner=cls.users["user"]).first().id
+            for model in (Product, Order, Store)
+        }
+        cls.sequence = count()
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_query_budgets(self):
+        for endpoint in self.endpoints:
+            for role in ROLES:
+                with self.subTest(endpoint=f"{endpoint.method} {endpoint.path}", role=role):
+                    self.assertWithinBudget(endpoint, role)
+
+    def get_params(self, role) -> Dict:
+        user = self.users[role]
+        return {
+            "n": next(self.sequence),
+            "email": user.email,
+            "password": PASSWORD,
+            "user_id": user.id,
+            "other_user_id": self.users["user"].id,
+            "other_role_id": self.users["user"].role_id,
+            "role_id": user.role_id,
+            "rule_id": self.rule.id,
+            "element_id": self.element.id,
+            "refresh_token": generate_refresh_token(user.id),
+            **self.owned,
+        }
+
+    def assertWithinBudget(self, endpoint: Endpoint, role: str):
+        user = self.users[role]
+        params = self.get_params(role)
+        path = endpoint.path.format(**params)
+        data = {
+            key: value.format(**params) if isinstance(value, str) else value
+            for key, value in (endpoint.data or {}).items()
+        }
+
+        # Состояние процесса, обновляемое раз в TTL, в бюджет не входит
+        user_cache.clear()
+        permission_matrix.snapshot()
+        revocation_list.is_revoked({})
+        token = generate_access_token(user.id, user.role_id)
+
+        with CaptureQueriesContext(connection) as captured:
+            response = api_request(
+                self.client, None, endpoint.method, path, data if endpoint.data else None,
+                HTTP_AUTHORIZATION=f"Bearer {token}",
+            )
+
+        self.assertLess(response.status_code, 500, f"{endpoint.method} {path}: {response.status_code}")
+        queries = [
+            query["sql"] for query in captured.captured_queries
+            if not query["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT"))
+        ]
+        if len(queries) > endpoint.budget:
+            self.fail(
+                f"{endpoint.method} {path} от имени {role}: {len(queries)} запросов "
+                f"при бюджете {endpoint.budget} (ответ {response.status_code})\n"
+                + "\n".join(f"{index}. {sql}" for index, sql in enumerate(queries, start=1))
+            )
@@ -0,0 +1,53 @@
+"""
+Тестовые данные и запросы к API от имени пользователя.
+"""
+import io
+import json
+from typing import Dict, List, Optional
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from apps.authentication.utils import generate_access_token
+from apps.authorization.models import Role
+
+User = get_user_model()
+
+ROLES = ("admin", "manager", "user", "guest")
+
+
+def load_test_users() -> Dict[str, "User"]:
+    """
+    Роли, правила и объекты из load_test_data и пользователь с ролью guest.
+    Возвращает пользователей по названию роли (admin@example.com и т.д.).
+    """
+    call_command("load_test_data", stdout=io.StringIO())
+    User.objects.create_user("guest@example.com", role=Role.objects.get(name="guest"))
+    return {role: User.objects.get(email=f"{role}@example.com") for role in ROLES}
+
+
+def api_request(client, user, method: str, path: str, data: Optional[Dict] = None, **extra):
+    """Запрос с JSON телом и access токеном пользователя (None - без токена)"""
+    if user is not None:
+        extra.setdefault("HTTP_AUTHORIZATION", f"Bearer {generate_access_token(user.id, user.role_id)}")
+    return client.generic(
+        method,
+        path,
+        data=json.dumps(data) if data is not None else "",
+        content_type="application/json",
+        **extra,
+    )
+
+
+def auth_urlpatterns(auth_views) -> List:
+    """
+    URL конфигурация проекта, в которой register, login и refresh обслуживаются
+    модулем auth_views независимо от JWT_ASYNC_VIEWS
+    """
+    from django.urls import path
+    from config.urls import urlpatterns
+
+    return [
+        path("api/auth/register/", auth_views.register),
+        path("api/auth/login/", auth_views.login),
+        path("api/auth/refresh/", auth_views.refresh_token_view),
+        *urlpatterns,
+    ]
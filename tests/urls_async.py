@@ -0,0 +1,7 @@
+"""
+URL конфигурация с асинхронными views аутентификации (JWT_ASYNC_VIEWS=True)
+"""
+from apps.authentication import async_views
+from tests.support import auth_urlpatterns
+
+urlpatterns = auth_urlpatterns(async_views)
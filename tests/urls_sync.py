@@ -0,0 +1,7 @@
+"""
+URL конфигурация с синхронными views аутентификации (JWT_ASYNC_VIEWS=False)
+"""
+from apps.authentication import views
+from tests.support import auth_urlpatterns
+
+urlpatterns = auth_urlpatterns(views)